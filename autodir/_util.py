@@ -0,0 +1,27 @@
+""" helper functions
+"""
+import contextvars
+import collections
+import concurrent.futures
+
+
+def thread_map(function, *iterables, nworkers=None):
+    """ lazily map a function over iterables, optionally on a thread pool
+
+    At most `2 * nworkers` calls are in flight at once, and results are
+    yielded in order. Calls run in a copy of the caller's context (so
+    context variables, such as the validation policy, carry over).
+    """
+    if nworkers is None:
+        yield from map(function, *iterables)
+        return
+
+    with concurrent.futures.ThreadPoolExecutor(nworkers) as executor:
+        futures = collections.deque()
+        for args in zip(*iterables):
+            futures.append(executor.submit(
+                contextvars.copy_context().run, function, *args))
+            if len(futures) >= 2 * nworkers:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
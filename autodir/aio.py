@@ -0,0 +1,179 @@
+""" asyncio API for DataSeriesDir and DataSeriesFile operations
+
+The blocking operations are run on an executor, with a bound on the number
+in flight at once, so that thousands of reads can overlap without
+exhausting file descriptors:
+
+    ene = await autodir.aio.read(ene_dsfile, prefix, specs)
+    async for ene in autodir.aio.read_many(ene_dsfile, prefix, specs_lst):
+        ...
+
+The module-level functions share a default Runner. A Runner with its own
+bound and executor can be used instead:
+
+    runner = autodir.aio.Runner(max_concurrency=256)
+    await runner.create(cnf_leaf_dsdir, prefix, specs)
+"""
+import weakref
+import asyncio
+import contextvars
+import functools
+import collections
+from autodir import index
+
+DEFAULT_MAX_CONCURRENCY = 32
+
+
+class Runner():
+    """ runs autodir operations on an executor, with bounded concurrency
+    """
+
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 executor=None):
+        """
+        :param max_concurrency: the maximum number of operations in flight
+        :type max_concurrency: int
+        :param executor: the executor to run operations on (the event loop's
+            default executor, if None)
+        :type executor: concurrent.futures.Executor
+        """
+        assert max_concurrency > 0
+        self.max_concurrency = max_concurrency
+        self.executor = executor
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    async def run(self, function, *args, **kwargs):
+        """ run a blocking function on the executor
+
+        (in a copy of the caller's context, as for `asyncio.to_thread()`, so
+        context variables such as the validation policy carry over)
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores.setdefault(
+                loop, asyncio.Semaphore(self.max_concurrency))
+
+        async with semaphore:
+            return await loop.run_in_executor(
+                self.executor, functools.partial(
+                    contextvars.copy_context().run, function, *args,
+                    **kwargs))
+
+    async def read(self, dsfile, prefix, specs=()):
+        """ read data from a DataSeriesFile
+        """
+        return await self.run(dsfile.read, prefix, specs)
+
+    async def write(self, dsfile, val, prefix, specs=()):
+        """ write data to a DataSeriesFile
+        """
+        await self.run(dsfile.write, val, prefix, specs)
+
+    async def exists(self, dsobj, prefix, specs=()):
+        """ does this DataSeriesDir or DataSeriesFile exist?
+        """
+        return await self.run(dsobj.exists, prefix, specs)
+
+    async def create(self, dsdir, prefix, specs=(), lock=False):
+        """ create a DataSeriesDir directory (see `DataSeriesDir.create()`)
+        """
+        await self.run(dsdir.create, prefix, specs, lock=lock)
+
+    async def existing(self, dsdir, prefix, source_specs=()):
+        """ the specifiers for existing DataSeriesDir directories, sorted
+        """
+        return await self.run(dsdir.existing, prefix, source_specs)
+
+    async def iter_existing(self, dsdir, prefix, source_specs=()):
+        """ an async generator over the specifiers for existing DataSeriesDir
+        directories
+
+        The specifier files are read concurrently, and the specifiers yielded
+        in order of their directory paths (rather than sorted by specifier).
+        """
+        if await self.run(index.usable, prefix):
+            for specs in await self.existing(dsdir, prefix, source_specs):
+                yield specs
+            return
+
+        assert dsdir.spec_dfile is not None
+        pths = await self.run(dsdir.existing_paths, prefix, source_specs)
+        async for specs in self._map(dsdir.spec_dfile.read,
+                                     ((pth,) for pth in pths)):
+            yield specs
+
+    async def read_many(self, dsfile, prefix, specs_iter):
+        """ an async generator over data read from a DataSeriesFile for a
+        sequence of specifiers
+
+        Reads are run concurrently and yielded in order of the specifiers.
+        """
+        async for val in self._map(dsfile.read,
+                                   ((prefix, specs) for specs in specs_iter)):
+            yield val
+
+    # helpers
+    async def _map(self, function, args_iter):
+        """ run a function on each set of arguments, yielding the results in
+        order, with at most `max_concurrency` calls scheduled ahead
+        """
+        pending = collections.deque()
+        try:
+            for args in args_iter:
+                pending.append(asyncio.ensure_future(self.run(function,
+                                                              *args)))
+                if len(pending) >= self.max_concurrency:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+_RUNNER = Runner()
+
+
+async def read(dsfile, prefix, specs=()):
+    """ read data from a DataSeriesFile
+    """
+    return await _RUNNER.read(dsfile, prefix, specs)
+
+
+async def write(dsfile, val, prefix, specs=()):
+    """ write data to a DataSeriesFile
+    """
+    await _RUNNER.write(dsfile, val, prefix, specs)
+
+
+async def exists(dsobj, prefix, specs=()):
+    """ does this DataSeriesDir or DataSeriesFile exist?
+    """
+    return await _RUNNER.exists(dsobj, prefix, specs)
+
+
+async def create(dsdir, prefix, specs=(), lock=False):
+    """ create a DataSeriesDir directory (see `DataSeriesDir.create()`)
+    """
+    await _RUNNER.create(dsdir, prefix, specs, lock=lock)
+
+
+async def existing(dsdir, prefix, source_specs=()):
+    """ the specifiers for existing DataSeriesDir directories, sorted
+    """
+    return await _RUNNER.existing(dsdir, prefix, source_specs)
+
+
+def iter_existing(dsdir, prefix, source_specs=()):
+    """ an async generator over the specifiers for existing DataSeriesDir
+    directories (see `Runner.iter_existing()`)
+    """
+    return _RUNNER.iter_existing(dsdir, prefix, source_specs)
+
+
+def read_many(dsfile, prefix, specs_iter):
+    """ an async generator over data read from a DataSeriesFile for a
+    sequence of specifiers (see `Runner.read_many()`)
+    """
+    return _RUNNER.read_many(dsfile, prefix, specs_iter)
@@ -0,0 +1,331 @@
+""" single-file (SQLite) archives of autodir trees
+
+A finished tree can be packed into one archive file, which is much kinder to
+inode quotas and to rsync/tar than millions of tiny files:
+
+    autodir.archive.pack(prefix, 'tree.sqlite')
+
+The archive is then served through the usual DataSeriesDir/DataSeriesFile
+API by selecting an archive backend for the prefix it was packed from:
+
+    with autodir.backend.using(autodir.archive.Backend('tree.sqlite', prefix)):
+        cnf_leaf_dsdir.existing(prefix, thy_specs)
+
+Archives are read-only unless opened with `writable=True`, in which case new
+directories and files are added to the archive.
+
+usage: python -m autodir.archive <directory> <archive file>
+"""
+import io
+import os
+import sys
+import pathlib
+import sqlite3
+import threading
+import contextlib
+from autofile import instrument
+from autofile._util import lazy_import as _lazy_import
+from autodir import index
+
+numpy = _lazy_import('numpy')
+
+TIMEOUT = 60.
+PACK_BATCH_SIZE = 1000
+
+
+class Backend():
+    """ stores data in a single SQLite archive file
+
+    Paths below the prefix map to entries in the archive (paths outside of it
+    are not in the archive).
+    """
+
+    def __init__(self, archive_pth, prefix, writable=False):
+        """
+        :param archive_pth: the archive file path
+        :param prefix: the path the archive is served at
+        :param writable: allow new directories and files to be added?
+        :type writable: bool
+        """
+        assert os.path.isfile(archive_pth) or writable
+        self.archive_path = os.path.abspath(archive_pth)
+        self.prefix = os.path.abspath(prefix)
+        self.writable = writable
+        self._conn = _connect(self.archive_path, writable=writable)
+        self._lock = threading.RLock()
+        if writable:
+            with self._lock:
+                _create_table(self._conn)
+
+    def close(self):
+        """ close the archive file
+        """
+        with self._lock:
+            self._conn.close()
+
+    def isfile(self, pth):
+        """ is there a file at this path?
+        """
+        return self._entry_type(pth) == 0
+
+    def isdir(self, pth):
+        """ is there a directory at this path?
+        """
+        return self._entry_type(pth) == 1
+
+    def version(self, pth):
+        """ an (archive mtime_ns, size) key, which changes when the file does
+        """
+        name = self._name(pth)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT length(data) FROM entries WHERE name=? AND is_dir=0",
+                (name,)).fetchone()
+        if row is None:
+            raise FileNotFoundError(pth)
+        return (os.stat(self.archive_path).st_mtime_ns, row[0])
+
+    def makedirs(self, pth):
+        """ create a directory and its parents, if they don't already exist
+        """
+        self._check_writable()
+        name = self._name(pth)
+        assert name is not None and not self.isfile(pth)
+        rows = []
+        while name:
+            rows.append((name, _parent_name(name)))
+            name = _parent_name(name)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO entries VALUES (?, ?, 1, NULL)", rows)
+
+    def subdirectories(self, pth):
+        """ paths to the (non-hidden) subdirectories of a directory
+        """
+        name = self._name(pth)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name FROM entries WHERE parent=? AND is_dir=1",
+                (name,)).fetchall()
+        return [os.path.join(self.prefix, *sub_name.split('/'))
+                for sub_name, in rows
+                if not _base_name(sub_name).startswith('.')]
+
+    def remove(self, pth):
+        """ remove a file
+        """
+        self._check_writable()
+        assert self.isfile(pth)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries WHERE name=?",
+                               (self._name(pth),))
+
+    def read_file(self, pth):
+        """ read a file as a string
+        """
+        return self._read(pth).decode('utf-8')
+
+    def write_file(self, pth, string, fsync=False, exclusive=False):
+        """ write a string to a file
+        """
+        self._write(pth, string.encode('utf-8'), exclusive=exclusive)
+        assert fsync in (True, False)
+
+    def link_file(self, src_pth, pth, fsync=False, exclusive=False):
+        """ copy a file (archives have no links)
+        """
+        self._write(pth, self._read(src_pth), exclusive=exclusive)
+        assert fsync in (True, False)
+
+    def append_file(self, pth, string):
+        """ append a string to a file
+
+        :returns: the byte offset at which the string was written
+        """
+        with self._lock:
+            data = self._read(pth) if self.isfile(pth) else b''
+            self._write(pth, data + string.encode('utf-8'))
+        return len(data)
+
+    def read_array_file(self, pth, mmap=False):
+        """ read a numpy array from a file
+
+        (archived arrays can't be memory-mapped, so `mmap` makes no difference)
+        """
+        assert mmap in (True, False)
+        return numpy.load(io.BytesIO(self._read(pth)), allow_pickle=False)
+
+    def write_array_file(self, pth, arr, fsync=False, exclusive=False):
+        """ write a numpy array to a file
+        """
+        arr_file = io.BytesIO()
+        numpy.save(arr_file, arr, allow_pickle=False)
+        self._write(pth, arr_file.getvalue(), exclusive=exclusive)
+        assert fsync in (True, False)
+
+    def open(self, pth, mode='r'):
+        """ open a file for reading
+        """
+        assert mode in ('r', 'rb')
+        instrument.record('open')
+        data = self._read(pth)
+        return (io.StringIO(data.decode('utf-8')) if mode == 'r' else
+                io.BytesIO(data))
+
+    @contextlib.contextmanager
+    def lock(self, pth):
+        """ hold an exclusive lock on a directory
+
+        (the lock is per-archive, rather than per-directory)
+        """
+        assert self.isdir(pth)
+        with self._lock:
+            yield
+
+    # helpers
+    def _name(self, pth):
+        """ the archive entry name for a path, or None if it isn't below the
+        prefix
+        """
+        rel_pth = os.path.relpath(os.path.abspath(pth), self.prefix)
+        if rel_pth == os.curdir:
+            return ''
+        if rel_pth == os.pardir or rel_pth.startswith(os.pardir + os.sep):
+            return None
+        return '/'.join(rel_pth.split(os.sep))
+
+    def _entry_type(self, pth):
+        name = self._name(pth)
+        if name is None:
+            return None
+        if name == '':
+            return 1
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT is_dir FROM entries WHERE name=?", (name,)).fetchone()
+        return None if row is None else row[0]
+
+    def _read(self, pth):
+        name = self._name(pth)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM entries WHERE name=? AND is_dir=0",
+                (name,)).fetchone()
+        if row is None:
+            raise FileNotFoundError(pth)
+        instrument.record('read', nbytes=len(row[0]))
+        return bytes(row[0])
+
+    def _write(self, pth, data, exclusive=False):
+        self._check_writable()
+        name = self._name(pth)
+        assert name
+        with self._lock:
+            if not self.isdir(os.path.dirname(os.path.abspath(pth))):
+                raise FileNotFoundError(pth)
+            if exclusive and self.isfile(pth):
+                raise FileExistsError(pth)
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, 0, ?)",
+                    (name, _parent_name(name), data))
+        instrument.record('write', nbytes=len(data))
+
+    def _check_writable(self):
+        if not self.writable:
+            raise ValueError("Archive {} is read-only"
+                             .format(self.archive_path))
+
+
+def pack(dir_pth, archive_pth):
+    """ pack a directory tree into an archive file
+
+    The tree is walked and written in batches, so it is never held in memory
+    all at once. Hidden files (temporary files, locks) and the specifier
+    index are left out.
+
+    :param dir_pth: the root of the tree
+    :param archive_pth: the archive file, which must not already exist
+    :returns: the number of files packed
+    """
+    dir_pth = os.path.abspath(dir_pth)
+    assert os.path.isdir(dir_pth)
+    assert not os.path.exists(archive_pth)
+
+    conn = _connect(archive_pth, writable=True)
+    try:
+        _create_table(conn)
+        rows = []
+        nfiles = 0
+        for sub_pth, sub_dir_names, file_names in os.walk(dir_pth):
+            sub_dir_names[:] = sorted(name for name in sub_dir_names
+                                      if not name.startswith('.'))
+            file_names = sorted(
+                name for name in file_names
+                if not name.startswith('.') and
+                not (sub_pth == dir_pth and name == index.FILE_NAME))
+
+            name = _relative_name(sub_pth, dir_pth)
+            if name:
+                rows.append((name, _parent_name(name), 1, None))
+            for file_name in file_names:
+                with open(os.path.join(sub_pth, file_name), 'rb') as file_obj:
+                    data = file_obj.read()
+                file_name = '/'.join(filter(None, (name, file_name)))
+                rows.append((file_name, name, 0, data))
+                nfiles += 1
+
+            if len(rows) >= PACK_BATCH_SIZE:
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO entries VALUES (?, ?, ?, ?)", rows)
+                rows = []
+
+        with conn:
+            conn.executemany("INSERT INTO entries VALUES (?, ?, ?, ?)", rows)
+    finally:
+        conn.close()
+
+    return nfiles
+
+
+# helpers
+def _connect(archive_pth, writable=False):
+    if writable:
+        conn = sqlite3.connect(archive_pth, timeout=TIMEOUT,
+                               check_same_thread=False)
+    else:
+        uri = '{}?mode=ro'.format(
+            pathlib.Path(os.path.abspath(archive_pth)).as_uri())
+        conn = sqlite3.connect(uri, uri=True, timeout=TIMEOUT,
+                               check_same_thread=False)
+    return conn
+
+
+def _create_table(conn):
+    with conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS entries ("
+                     " name TEXT PRIMARY KEY,"
+                     " parent TEXT NOT NULL,"
+                     " is_dir INTEGER NOT NULL,"
+                     " data BLOB)")
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_parent "
+                     "ON entries (parent, is_dir)")
+
+
+def _relative_name(pth, dir_pth):
+    rel_pth = os.path.relpath(pth, dir_pth)
+    return '' if rel_pth == os.curdir else '/'.join(rel_pth.split(os.sep))
+
+
+def _parent_name(name):
+    return name.rpartition('/')[0]
+
+
+def _base_name(name):
+    return name.rpartition('/')[2]
+
+
+if __name__ == '__main__':
+    DIR_PTH, ARCHIVE_PTH = sys.argv[1:]
+    print("packed {:d} files".format(pack(DIR_PTH, ARCHIVE_PTH)))
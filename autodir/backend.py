@@ -0,0 +1,322 @@
+""" storage backends for autodir.model
+
+A backend implements the handful of storage operations that the model needs
+(directory creation and listing, file reads and writes, locking). The model
+uses the current backend, which is the file system unless another one has
+been selected with `using()`:
+
+    with autodir.backend.using(autodir.backend.MemoryBackend()):
+        ...
+"""
+import io
+import os
+import threading
+import contextlib
+import contextvars
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+import autofile
+from autofile import instrument
+from autofile._util import lazy_import as _lazy_import
+
+numpy = _lazy_import('numpy')
+
+LOCK_FILE_NAME = '.lock'
+
+
+class FileSystemBackend():
+    """ stores data in the file system """
+
+    @staticmethod
+    def isfile(pth):
+        """ is there a file at this path?
+        """
+        with instrument.timed('stat'):
+            return os.path.isfile(pth)
+
+    @staticmethod
+    def isdir(pth):
+        """ is there a directory at this path?
+        """
+        with instrument.timed('stat'):
+            return os.path.isdir(pth)
+
+    @staticmethod
+    def version(pth):
+        """ a (mtime_ns, size) key, which changes when the file does
+        """
+        with instrument.timed('stat'):
+            stat = os.stat(pth)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
+    def makedirs(pth):
+        """ create a directory and its parents, if they don't already exist
+        """
+        os.makedirs(pth, exist_ok=True)
+
+    @staticmethod
+    def subdirectories(pth):
+        """ paths to the (non-hidden) subdirectories of a directory
+        """
+        with instrument.timed('stat'), os.scandir(pth) as entries:
+            return [entry.path for entry in entries
+                    if not entry.name.startswith('.') and entry.is_dir()]
+
+    @staticmethod
+    def remove(pth):
+        """ remove a file
+        """
+        os.remove(pth)
+
+    @staticmethod
+    def read_file(pth):
+        """ read a file as a string
+        """
+        return autofile.read_file(pth)
+
+    @staticmethod
+    def write_file(pth, string, fsync=False, exclusive=False):
+        """ write a string to a file (atomically)
+        """
+        autofile.write_file(pth, string, fsync=fsync, exclusive=exclusive)
+
+    @staticmethod
+    def link_file(src_pth, pth, fsync=False, exclusive=False):
+        """ hard-link a file into place (atomically), or copy it where links
+        aren't supported
+        """
+        autofile.link_file(src_pth, pth, fsync=fsync, exclusive=exclusive)
+
+    @staticmethod
+    def append_file(pth, string):
+        """ append a string to a file
+
+        :returns: the byte offset at which the string was written
+        """
+        return autofile.append_file(pth, string)
+
+    @staticmethod
+    def read_array_file(pth, mmap=False):
+        """ read a numpy array from a file
+
+        :param mmap: memory-map the file, rather than loading it?
+        """
+        return autofile.read_array_file(pth, mmap=mmap)
+
+    @staticmethod
+    def write_array_file(pth, arr, fsync=False, exclusive=False):
+        """ write a numpy array to a file (atomically)
+        """
+        autofile.write_array_file(pth, arr, fsync=fsync, exclusive=exclusive)
+
+    @staticmethod
+    def open(pth, mode='r'):
+        """ open a file for reading
+        """
+        assert mode in ('r', 'rb')
+        with instrument.timed('open'):
+            return open(pth, mode)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def lock(pth):
+        """ hold an (advisory) exclusive lock on a directory
+
+        (a no-op where fcntl isn't available)
+        """
+        if fcntl is None:
+            yield
+            return
+
+        with open(os.path.join(pth, LOCK_FILE_NAME), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class MemoryBackend():
+    """ stores data in memory, in a dictionary of files and directories
+
+    The root directory always exists. Intended for tests and simulations that
+    shouldn't pay for disk I/O.
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.dirs = {os.path.abspath(os.sep): set()}
+        self._versions = {}
+        self._nwrites = 0
+        self._lock = threading.RLock()
+
+    def isfile(self, pth):
+        """ is there a file at this path?
+        """
+        return os.path.abspath(pth) in self.files
+
+    def isdir(self, pth):
+        """ is there a directory at this path?
+        """
+        return os.path.abspath(pth) in self.dirs
+
+    def version(self, pth):
+        """ a (write count, size) key, which changes when the file does
+        """
+        pth = os.path.abspath(pth)
+        with self._lock:
+            val = self.files[pth]
+            nbytes = (val.nbytes if isinstance(val, numpy.ndarray) else
+                      len(val))
+            return (self._versions[pth], nbytes)
+
+    def makedirs(self, pth):
+        """ create a directory and its parents, if they don't already exist
+        """
+        pth = os.path.abspath(pth)
+        with self._lock:
+            names = []
+            while pth not in self.dirs:
+                assert pth not in self.files
+                pth, name = os.path.split(pth)
+                names.append(name)
+
+            for name in reversed(names):
+                self.dirs[pth].add(name)
+                pth = os.path.join(pth, name)
+                self.dirs[pth] = set()
+
+    def subdirectories(self, pth):
+        """ paths to the (non-hidden) subdirectories of a directory
+        """
+        pth = os.path.abspath(pth)
+        with self._lock:
+            names = sorted(self.dirs[pth])
+        return [os.path.join(pth, name) for name in names
+                if not name.startswith('.')]
+
+    def remove(self, pth):
+        """ remove a file
+        """
+        with self._lock:
+            del self.files[os.path.abspath(pth)]
+            del self._versions[os.path.abspath(pth)]
+
+    def read_file(self, pth):
+        """ read a file as a string
+        """
+        val = self.files[os.path.abspath(pth)]
+        assert isinstance(val, str)
+        instrument.record('read', nbytes=len(val))
+        return val
+
+    def write_file(self, pth, string, fsync=False, exclusive=False):
+        """ write a string to a file
+        """
+        assert isinstance(string, str)
+        self._write(pth, string, exclusive=exclusive)
+        assert fsync in (True, False)
+
+    def link_file(self, src_pth, pth, fsync=False, exclusive=False):
+        """ share another file's contents (which are immutable in memory)
+        """
+        val = self.files.get(os.path.abspath(src_pth))
+        if val is None:
+            raise FileNotFoundError(src_pth)
+        self._write(pth, val, exclusive=exclusive)
+        assert fsync in (True, False)
+
+    def append_file(self, pth, string):
+        """ append a string to a file
+
+        :returns: the byte offset at which the string was written
+        """
+        pth = os.path.abspath(pth)
+        with self._lock:
+            self._check_parent(pth)
+            val = self.files.get(pth, '')
+            self.files[pth] = val + string
+            self._count_write(pth)
+        instrument.record('write', nbytes=len(string))
+        return len(val.encode('utf-8'))
+
+    def read_array_file(self, pth, mmap=False):
+        """ read a numpy array from a file
+
+        (arrays are held in memory, so `mmap` makes no difference)
+        """
+        assert mmap in (True, False)
+        arr = self.files[os.path.abspath(pth)]
+        assert isinstance(arr, numpy.ndarray)
+        instrument.record('read', nbytes=arr.nbytes)
+        return arr
+
+    def write_array_file(self, pth, arr, fsync=False, exclusive=False):
+        """ write a numpy array to a file
+        """
+        arr = numpy.array(arr)
+        arr.setflags(write=False)
+        self._write(pth, arr, exclusive=exclusive)
+        assert fsync in (True, False)
+
+    def open(self, pth, mode='r'):
+        """ open a file for reading
+        """
+        assert mode in ('r', 'rb')
+        instrument.record('open')
+        string = self.read_file(pth)
+        return (io.StringIO(string) if mode == 'r' else
+                io.BytesIO(string.encode('utf-8')))
+
+    @contextlib.contextmanager
+    def lock(self, pth):
+        """ hold an exclusive lock on a directory
+        """
+        assert self.isdir(pth)
+        with self._lock:
+            yield
+
+    def _write(self, pth, val, exclusive=False):
+        pth = os.path.abspath(pth)
+        with self._lock:
+            self._check_parent(pth)
+            if exclusive and pth in self.files:
+                raise FileExistsError(pth)
+            self.files[pth] = val
+            self._count_write(pth)
+        instrument.record('write', nbytes=(
+            val.nbytes if isinstance(val, numpy.ndarray) else len(val)))
+
+    def _count_write(self, pth):
+        self._nwrites += 1
+        self._versions[pth] = self._nwrites
+
+    def _check_parent(self, pth):
+        if os.path.dirname(pth) not in self.dirs:
+            raise FileNotFoundError(pth)
+
+
+# per-context, so that concurrent tasks and threads can each use their own
+# backend; autodir._util.thread_map and autodir.aio carry it over to workers
+_BACKEND = contextvars.ContextVar(
+    'autodir.backend', default=FileSystemBackend())
+
+
+def current():
+    """ the current storage backend
+    """
+    return _BACKEND.get()
+
+
+@contextlib.contextmanager
+def using(backend):
+    """ use a storage backend for autodir.model operations in this context
+    """
+    token = _BACKEND.set(backend)
+    try:
+        yield backend
+    finally:
+        _BACKEND.reset(token)
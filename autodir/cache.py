@@ -0,0 +1,99 @@
+""" a least-recently-used cache for DataFile reads
+
+Values are cached by path and validated against the file's version -- its
+(modification time in ns, size) on the file system -- so a file changed by
+anything else is re-read. Writes made through a DataFile drop its cached
+value straight away.
+
+    cache = autodir.cache.ReadCache(max_entries=1024, max_bytes=2 ** 28)
+    geo_dfile = autodir.lib.file_.geometry('geom')
+    geo_dfile.cache = cache
+
+Cached values are shared between reads, so they shouldn't be modified.
+"""
+import threading
+import collections
+
+CacheInfo = collections.namedtuple(
+    'CacheInfo', ['hits', 'misses', 'entries', 'nbytes'])
+
+
+class ReadCache():
+    """ LRU cache of values read from files, with an entry and byte budget
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=None):
+        """
+        :param max_entries: the maximum number of cached values
+        :type max_entries: int
+        :param max_bytes: the maximum total size of the cached files, in
+            bytes (unlimited, by default)
+        :type max_bytes: int
+        """
+        assert max_entries > 0
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        """ the cached value for this key and version
+
+        :param version: the file's version, as (mtime_ns, size)
+        :returns: (True, value) on a hit, (False, None) on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return (True, entry[1])
+
+            self.misses += 1
+            return (False, None)
+
+    def put(self, key, version, val):
+        """ cache a value read at this version of the file
+        """
+        _, nbytes = version
+        if self.max_bytes is not None and nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (version, val)
+            self.nbytes += nbytes
+            while (len(self._entries) > self.max_entries or
+                   (self.max_bytes is not None and
+                    self.nbytes > self.max_bytes)):
+                self._pop(next(iter(self._entries)))
+
+    def invalidate(self, key):
+        """ drop the cached value for this key, if there is one
+        """
+        with self._lock:
+            self._pop(key)
+
+    def clear(self):
+        """ drop all cached values and reset the counters
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.nbytes = 0
+
+    def info(self):
+        """ hit/miss counters and current size
+        """
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, len(self._entries),
+                             self.nbytes)
+
+    # helpers
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            (_, nbytes), _ = entry
+            self.nbytes -= nbytes
@@ -0,0 +1,75 @@
+""" a content-addressed store, for deduplicating identical files
+
+Run input files, shell scripts and specifier files are often byte-identical
+across thousands of directories. Written through a blob store, each distinct
+payload is written once, as a blob under the prefix keyed by its hash, and
+hard-linked into place wherever it is written again. Reads are unchanged.
+
+    store = autodir.dedup.BlobStore(prefix)
+    inp_dfile = autodir.lib.file_.input_file('run')
+    inp_dfile.store = store
+
+Files written through a store share their contents, so they must only ever
+be replaced (as DataFile writes do), never modified in place.
+"""
+import os
+import hashlib
+from autodir import backend
+
+DIR_NAME = '.blobs'
+
+
+class BlobStore():
+    """ content-addressed store of string payloads, under a prefix
+    """
+
+    def __init__(self, prefix):
+        self.path = os.path.join(os.path.abspath(prefix), DIR_NAME)
+
+    def blob_path(self, string):
+        """ the blob path for a payload
+        """
+        digest = hashlib.sha256(string.encode('utf-8')).hexdigest()
+        return os.path.join(self.path, digest[:2], digest[2:])
+
+    def write(self, pth, string, fsync=False, exclusive=False):
+        """ write a string to a file, by linking it to the blob for its
+        contents (which is written first, if it doesn't exist)
+
+        :param exclusive: raise FileExistsError if the file already exists,
+            rather than replacing it
+        :type exclusive: bool
+        """
+        bkend = backend.current()
+        blob_pth = self.blob_path(string)
+        try:
+            bkend.link_file(blob_pth, pth, fsync=fsync, exclusive=exclusive)
+        except FileNotFoundError:
+            # the blob hasn't been written yet (or was garbage-collected)
+            bkend.makedirs(os.path.dirname(blob_pth))
+            try:
+                bkend.write_file(blob_pth, string, fsync=fsync,
+                                 exclusive=True)
+            except FileExistsError:
+                pass
+            bkend.link_file(blob_pth, pth, fsync=fsync, exclusive=exclusive)
+
+    def collect_garbage(self):
+        """ remove blobs which are no longer linked to from anywhere (on the
+        file system)
+
+        :returns: the number of blobs removed
+        """
+        nremoved = 0
+        if not os.path.isdir(self.path):
+            return nremoved
+
+        for dir_entry in os.scandir(self.path):
+            if not dir_entry.is_dir():
+                continue
+            for blob_entry in os.scandir(dir_entry.path):
+                if (blob_entry.is_file() and
+                        blob_entry.stat().st_nlink == 1):
+                    os.remove(blob_entry.path)
+                    nremoved += 1
+        return nremoved
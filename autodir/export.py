@@ -0,0 +1,266 @@
+""" columnar export of the data in a directory tree
+
+Streams a table with one row per directory, with the specifiers and the data
+in each file as columns, into a single file for post-processing:
+
+    cnf_leaf_dsdir = autodir.lib.dir_.conformer_leaf(...)
+    ene_dsfile = model.DataSeriesFile(cnf_leaf_dsdir, file_.energy('geom'))
+    export('confs.npz', {'energy': ene_dsfile}, prefix, nworkers=16,
+           spec_names=('inchi', 'mult', 'method', 'basis', 'orb_restricted',
+                       'conformer_id'))
+    col_dct = read('confs.npz')
+
+Files are read on a thread pool and written out a chunk of rows at a time,
+so memory use is bounded by the chunk size, not by the size of the tree.
+The data must be scalars (energies, say) or fixed-shape arrays.
+
+Exports are written as .npz files, with each column stored as a series of
+chunk arrays (see `read()`), or as Parquet files, through pyarrow, if the
+path ends with .parquet. Parquet array columns are stored as fixed-size
+lists of the flattened arrays, with their shape in the field metadata.
+An export with no rows still writes a file, with empty columns.
+"""
+import json
+import zipfile
+import functools
+import contextlib
+from autofile._util import lazy_import as _lazy_import
+from autodir._util import thread_map as _thread_map
+
+numpy = _lazy_import('numpy')
+pyarrow = _lazy_import('pyarrow')
+pyarrow_parquet = _lazy_import('pyarrow.parquet')
+
+CHUNK_SIZE = 65536
+PARQUET_EXTENSION = '.parquet'
+PARQUET_SHAPE_KEY = b'shape'
+
+
+def specifiers(dsdir, prefix, source_specs=(), nworkers=None):
+    """ the specifiers of each existing DataSeriesDir directory below a
+    source directory, streamed
+
+    :param source_specs: specifiers for the subtree to search (all of them,
+        down to some layer of the source chain)
+    :param nworkers: if set, scan the tree on a thread pool with this many
+        workers
+    :rtype: iterator
+    """
+    source_specs = tuple(source_specs)
+    dsdirs = []
+    while dsdir is not None:
+        dsdirs.insert(0, dsdir)
+        dsdir = dsdir.source
+
+    # skip the layers that are given by the source specifiers
+    nspecs = 0
+    while dsdirs and nspecs + dsdirs[0].nspecs <= len(source_specs):
+        nspecs += dsdirs.pop(0).nspecs
+    assert nspecs == len(source_specs)
+
+    if dsdirs and dsdirs[0].source is not None:
+        if not dsdirs[0].source.exists(prefix, source_specs):
+            return iter(())
+
+    return _specifiers(dsdirs, prefix, source_specs, nworkers=nworkers)
+
+
+def rows(dsfile_dct, prefix, source_specs=(), nworkers=None):
+    """ (specifiers, values) for each existing directory below a source
+    directory, streamed
+
+    Directories missing any of the files are skipped.
+
+    :param dsfile_dct: the DataSeriesFiles to read, by name (all on the same
+        DataSeriesDir)
+    :param source_specs: specifiers for the subtree to export
+    :param nworkers: if set, read on a thread pool with this many workers
+    :rtype: iterator
+    """
+    dsfiles = tuple(dsfile_dct.values())
+    assert dsfiles
+    dsdir = dsfiles[0].dir
+    assert all(dsfile.dir is dsdir for dsfile in dsfiles)
+
+    specs_iter = specifiers(dsdir, prefix, source_specs, nworkers=nworkers)
+    rows_ = _thread_map(functools.partial(_read_row, dsfiles, prefix),
+                        specs_iter, nworkers=nworkers)
+    return (row for row in rows_ if row[1] is not None)
+
+
+def export(pth, dsfile_dct, prefix, source_specs=(), spec_names=None,
+           nworkers=None, chunk_size=CHUNK_SIZE):
+    """ export a tree (or a subtree) to a columnar file
+
+    :param pth: the file to write (.npz, or .parquet)
+    :param dsfile_dct: the DataSeriesFiles to read, by column name (all on
+        the same DataSeriesDir)
+    :param source_specs: specifiers for the subtree to export
+    :param spec_names: the column names for the specifiers ('spec0',
+        'spec1', ..., by default)
+    :param nworkers: if set, read on a thread pool with this many workers
+    :param chunk_size: the number of rows to hold in memory at once
+    :returns: the number of rows exported
+    """
+    assert chunk_size > 0
+    writer_ = (_parquet_writer if pth.endswith(PARQUET_EXTENSION) else
+               _npz_writer)
+
+    nrows = 0
+    rows_ = rows(dsfile_dct, prefix, source_specs, nworkers=nworkers)
+    with writer_(pth) as write_chunk:
+        for chunk in _chunks(rows_, chunk_size):
+            specs_lst, vals_lst = zip(*chunk)
+            if spec_names is None:
+                spec_names = tuple('spec{:d}'.format(idx)
+                                   for idx in range(len(specs_lst[0])))
+            assert all(len(specs) == len(spec_names) for specs in specs_lst)
+
+            col_dct = dict(zip(spec_names, zip(*specs_lst)))
+            col_dct.update(zip(dsfile_dct, zip(*vals_lst)))
+            write_chunk(col_dct)
+            nrows += len(chunk)
+
+        if not nrows:
+            # (write the empty columns, so that there is a file to read)
+            names = tuple(spec_names or ()) + tuple(dsfile_dct)
+            write_chunk({name: () for name in names})
+
+    return nrows
+
+
+def read(pth):
+    """ read an exported file, as a dictionary of column arrays
+    """
+    if pth.endswith(PARQUET_EXTENSION):
+        table = pyarrow_parquet.read_table(pth)
+        return {field.name: _numpy_column(table.column(field.name), field)
+                for field in table.schema}
+
+    chunks_dct = {}
+    with numpy.load(pth, allow_pickle=False) as npz:
+        for key in npz.files:
+            name, _ = key.rsplit('.', 1)
+            chunks_dct.setdefault(name, []).append(npz[key])
+    return {name: numpy.concatenate(chunks)
+            for name, chunks in chunks_dct.items()}
+
+
+# helpers
+def _specifiers(dsdirs, prefix, specs, nworkers=None):
+    """ recursively generate the specifiers along a source chain
+    """
+    if not dsdirs:
+        yield specs
+        return
+
+    dsdir = dsdirs[0]
+    if not dsdir.nspecs:
+        if dsdir.exists(prefix, specs):
+            yield from _specifiers(dsdirs[1:], prefix, specs,
+                                   nworkers=nworkers)
+        return
+
+    for seg_specs in dsdir.existing(prefix, specs, nworkers=nworkers):
+        yield from _specifiers(dsdirs[1:], prefix, specs + tuple(seg_specs),
+                               nworkers=nworkers)
+
+
+def _read_row(dsfiles, prefix, specs):
+    """ read the values in each file, or None if any of them is missing
+
+    (array values are loaded into memory, so that a chunk of rows doesn't
+    hold a memory map -- and a file descriptor -- for each of them)
+    """
+    dir_pth = dsfiles[0].dir.path(prefix, specs)
+    if not all(dsfile.file.exists(dir_pth) for dsfile in dsfiles):
+        return (specs, None)
+    vals = tuple(dsfile.file.read(dir_pth) for dsfile in dsfiles)
+    return (specs, tuple(numpy.array(val) if isinstance(val, numpy.ndarray)
+                         else val for val in vals))
+
+
+def _chunks(iterable, chunk_size):
+    """ split an iterable into lists of (at most) a given size
+    """
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@contextlib.contextmanager
+def _npz_writer(pth):
+    """ write chunks of columns to an .npz file, as '<column>.<chunk>'
+    arrays
+    """
+    with zipfile.ZipFile(pth, 'w', allowZip64=True) as zip_file:
+        nchunks = [0]
+
+        def _write_chunk(col_dct):
+            for name, col in col_dct.items():
+                arr = numpy.array(col)
+                member = '{}.{:06d}.npy'.format(name, nchunks[0])
+                with zip_file.open(member, 'w', force_zip64=True) as arr_file:
+                    numpy.lib.format.write_array(arr_file, arr,
+                                                 allow_pickle=False)
+            nchunks[0] += 1
+
+        yield _write_chunk
+
+
+@contextlib.contextmanager
+def _parquet_writer(pth):
+    """ write chunks of columns to a Parquet file, as row groups
+    """
+    writers = []
+
+    def _write_chunk(col_dct):
+        arrs, shapes = zip(*map(_arrow_column, col_dct.values()))
+        if not writers:
+            schema = pyarrow.schema([
+                pyarrow.field(
+                    name, arr.type,
+                    metadata=({PARQUET_SHAPE_KEY: json.dumps(shape)}
+                              if shape is not None else None))
+                for name, arr, shape in zip(col_dct, arrs, shapes)])
+            writers.append(pyarrow_parquet.ParquetWriter(pth, schema))
+        writer = writers[0]
+        writer.write_table(
+            pyarrow.Table.from_arrays(list(arrs), schema=writer.schema))
+
+    try:
+        yield _write_chunk
+    finally:
+        for writer in writers:
+            writer.close()
+
+
+def _arrow_column(col):
+    """ a column as an arrow array, and the shape of its values if they are
+    arrays (which are flattened into fixed-size lists), or None
+    """
+    if col and numpy.ndim(col[0]) and numpy.asarray(col[0]).dtype.kind in (
+            'biufc'):
+        arr = numpy.array(col)
+        size = int(numpy.prod(arr.shape[1:]))
+        vals = pyarrow.array(arr.reshape(-1))
+        return (pyarrow.FixedSizeListArray.from_arrays(vals, size),
+                list(arr.shape[1:]))
+    return pyarrow.array(list(col)), None
+
+
+def _numpy_column(col, field):
+    """ an arrow column as a numpy array, with array values restored to their
+    shape
+    """
+    metadata = field.metadata or {}
+    if PARQUET_SHAPE_KEY not in metadata:
+        return col.to_numpy()
+    shape = tuple(json.loads(metadata[PARQUET_SHAPE_KEY]))
+    vals = col.combine_chunks().flatten().to_numpy(zero_copy_only=False)
+    return vals.reshape((len(col),) + shape)
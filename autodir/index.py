@@ -0,0 +1,229 @@
+""" on-disk index of DataSeriesDir paths and specifiers
+
+The index is a single SQLite file at the root prefix. When it is present,
+`DataSeriesDir.create()` records every directory it makes and
+`DataSeriesDir.existing()`/`existing_paths()` query the index instead of
+globbing the tree and parsing each specifier file.
+
+The index also records which listings (the directories of a given depth
+below a source directory) it holds completely. Only those are answered from
+the index -- anything else is found by scanning the tree, as without an
+index. A listing is complete once it has been rebuilt, or if its source
+directory was created while the index was present.
+
+Trees written before the index existed can be brought up to date with
+`DataSeriesDir.rebuild_index()` and checked with
+`DataSeriesDir.verify_index()`. The index lives on the file system, so it is
+only used with the file-system backend.
+"""
+import os
+import json
+import sqlite3
+import contextlib
+from autodir import backend
+
+FILE_NAME = 'index.sqlite'
+TIMEOUT = 60.
+
+
+def path(prefix):
+    """ index file path for this prefix
+    """
+    return os.path.join(os.path.abspath(prefix), FILE_NAME)
+
+
+def exists(prefix):
+    """ is there an index at this prefix?
+    """
+    return os.path.isfile(path(prefix))
+
+
+def usable(prefix):
+    """ is there an index at this prefix, for the current backend?
+
+    (the index describes the file system, so it isn't used with other
+    backends)
+    """
+    return (isinstance(backend.current(), backend.FileSystemBackend) and
+            exists(prefix))
+
+
+def create(prefix):
+    """ create an (empty) index at this prefix, if there isn't one already
+    """
+    assert os.path.isdir(prefix)
+    with _connect(prefix) as conn:
+        _create_tables(conn)
+
+
+def add(prefix, entry_lst, listings=()):
+    """ add a sequence of (path, depth, specifiers) entries to the index,
+    leaving any that are already there as they are
+
+    :param entry_lst: (path, depth, specifiers) entries, where the path is the
+        absolute directory path, the depth is that of the directory segment
+        below its source prefix, and the specifiers are those for this
+        segment, if there are any
+    :param listings: (source path, depth) listings which are now complete
+    """
+    _insert(prefix, 'INSERT OR IGNORE', entry_lst, listings)
+
+
+def update(prefix, entry_lst, listings=()):
+    """ add a sequence of (path, depth, specifiers) entries to the index,
+    replacing any that are already there
+
+    :param listings: (source path, depth) listings which are now complete
+    """
+    _insert(prefix, 'INSERT OR REPLACE', entry_lst, listings)
+
+
+def remove(prefix, pth_depths):
+    """ remove a sequence of (path, depth) entries from the index, along with
+    the listings below them
+    """
+    prefix = os.path.abspath(prefix)
+    keys = []
+    srcs = []
+    for pth, depth in pth_depths:
+        src, _, rel, _ = _row(prefix, pth, depth, None)
+        keys.append((src, depth, rel))
+        srcs.append((_relative_path(pth, prefix),))
+    with _connect(prefix) as conn:
+        _create_tables(conn)
+        conn.executemany("DELETE FROM dirs WHERE src=? AND depth=? AND pth=?",
+                         keys)
+        conn.executemany("DELETE FROM listings WHERE src=?", srcs)
+
+
+def contains(prefix, pth_depths):
+    """ are all of a sequence of (path, depth) entries in the index?
+
+    (a read, so it doesn't wait on other processes writing to the index)
+    """
+    prefix = os.path.abspath(prefix)
+    keys = [_row(prefix, pth, depth, None)[:3] for pth, depth in pth_depths]
+    with _connect(prefix) as conn:
+        return all(conn.execute("SELECT 1 FROM dirs WHERE src=? AND depth=? "
+                                "AND pth=?", key).fetchone() is not None
+                   for key in keys)
+
+
+def entry_key(pth, depth, specs):
+    """ a hashable key for a (path, depth, specifiers) entry, for comparing
+    entries (specifiers may hold lists)
+    """
+    return (os.path.abspath(pth), depth, _encode_specifiers(specs))
+
+
+def is_listed(prefix, src_pth, depth):
+    """ does the index hold all of the directories of a given depth below a
+    source path?
+    """
+    prefix = os.path.abspath(prefix)
+    src = _relative_path(src_pth, prefix)
+    with _connect(prefix) as conn:
+        try:
+            rows = conn.execute("SELECT 1 FROM listings WHERE src=? AND "
+                                "depth=?", (src, depth))
+        except sqlite3.OperationalError:
+            # (an index written before listings were recorded)
+            return False
+        return rows.fetchone() is not None
+
+
+def entries(prefix):
+    """ all (path, depth, specifiers) entries in the index
+    """
+    prefix = os.path.abspath(prefix)
+    with _connect(prefix) as conn:
+        rows = conn.execute("SELECT src, depth, pth, specs FROM dirs")
+        return tuple((_absolute_path(prefix, src, rel), depth,
+                      _decode_specifiers(specs))
+                     for src, depth, rel, specs in rows)
+
+
+def paths(prefix, src_pth, depth):
+    """ indexed directory paths of a given depth below a source path
+    """
+    prefix = os.path.abspath(prefix)
+    src = _relative_path(src_pth, prefix)
+    with _connect(prefix) as conn:
+        rows = conn.execute("SELECT pth FROM dirs WHERE src=? AND depth=? "
+                            "ORDER BY pth", (src, depth))
+        return tuple(_absolute_path(prefix, src, rel) for rel, in rows)
+
+
+def specifiers(prefix, src_pth, depth):
+    """ indexed specifiers of a given depth below a source path
+    """
+    prefix = os.path.abspath(prefix)
+    src = _relative_path(src_pth, prefix)
+    with _connect(prefix) as conn:
+        rows = conn.execute("SELECT specs FROM dirs WHERE src=? AND depth=? "
+                            "AND specs IS NOT NULL", (src, depth))
+        return tuple(sorted(_decode_specifiers(specs) for specs, in rows))
+
+
+# helpers
+def _insert(prefix, statement, entry_lst, listings):
+    rows = [_row(prefix, pth, depth, specs)
+            for pth, depth, specs in entry_lst]
+    prefix = os.path.abspath(prefix)
+    listing_rows = [(_relative_path(src_pth, prefix), depth)
+                    for src_pth, depth in listings]
+    with _connect(prefix) as conn:
+        _create_tables(conn)
+        conn.executemany(statement + " INTO dirs VALUES (?, ?, ?, ?)", rows)
+        conn.executemany("INSERT OR IGNORE INTO listings VALUES (?, ?)",
+                         listing_rows)
+
+
+def _create_tables(conn):
+    conn.execute("CREATE TABLE IF NOT EXISTS dirs ("
+                 " src TEXT NOT NULL,"
+                 " depth INTEGER NOT NULL,"
+                 " pth TEXT NOT NULL,"
+                 " specs TEXT,"
+                 " PRIMARY KEY (src, depth, pth))")
+    conn.execute("CREATE TABLE IF NOT EXISTS listings ("
+                 " src TEXT NOT NULL,"
+                 " depth INTEGER NOT NULL,"
+                 " PRIMARY KEY (src, depth))")
+
+
+@contextlib.contextmanager
+def _connect(prefix):
+    conn = sqlite3.connect(path(prefix), timeout=TIMEOUT)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _row(prefix, pth, depth, specs):
+    prefix = os.path.abspath(prefix)
+    pth = os.path.abspath(pth)
+    src_pth = pth
+    for _ in range(depth):
+        src_pth = os.path.dirname(src_pth)
+    src = _relative_path(src_pth, prefix)
+    rel = os.path.relpath(pth, src_pth)
+    return (src, depth, rel, _encode_specifiers(specs))
+
+
+def _relative_path(pth, prefix):
+    return os.path.relpath(os.path.abspath(pth), prefix)
+
+
+def _absolute_path(prefix, src, rel):
+    return os.path.normpath(os.path.join(prefix, src, rel))
+
+
+def _encode_specifiers(specs):
+    return None if specs is None else json.dumps(list(specs))
+
+
+def _decode_specifiers(specs_str):
+    return None if specs_str is None else tuple(json.loads(specs_str))
@@ -4,9 +4,11 @@ import os
 import base64
 import hashlib
 import numbers
-import automol
-import autoparse.pattern as app
-import autoparse.find as apf
+from autofile._util import lazy_import as _lazy_import
+
+automol = _lazy_import('automol')
+app = _lazy_import('autoparse.pattern')
+apf = _lazy_import('autoparse.find')
 
 
 def is_valid_stereo_inchi(ich):
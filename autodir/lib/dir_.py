@@ -4,13 +4,16 @@ try:
     from inspect import getfullargspec as function_argspec
 except ImportError:
     from inspect import getargspec as function_argspec
-import automol
+import functools
+from autofile._util import lazy_import as _lazy_import
 from autodir import model
 from autodir.lib import map_
 from autodir.lib import file_
 
+automol = _lazy_import('automol')
 
 SPEC_FILE_PREFIX = 'dir'
+MAP_CACHE_SIZE = 4096
 
 
 def species_trunk(source_dsdir=None):
@@ -22,8 +25,11 @@ def species_trunk(source_dsdir=None):
                                source_dsdir=source_dsdir)
 
 
-def species_leaf(source_dsdir=None):
+def species_leaf(source_dsdir=None, trusted=False):
     """ species leaf DataDir
+
+    :param trusted: skip the specifier checks when mapping to a path?
+    :type trusted: bool
     """
     spec_dfile = file_.data_series_specifier(
         file_prefix=SPEC_FILE_PREFIX,
@@ -33,15 +39,18 @@ def species_leaf(source_dsdir=None):
             'multiplicity': lambda specs: specs[1]},
         spec_keys=['inchi', 'multiplicity'])
 
-    _map = _pack_arguments(map_.species_leaf)
+    _map = _pack_arguments(map_.species_leaf, check=not trusted)
     nspecs = _count_arguments(map_.species_leaf)
     return model.DataSeriesDir(map_=_map, nspecs=nspecs, depth=4,
                                spec_dfile=spec_dfile,
                                source_dsdir=source_dsdir)
 
 
-def theory_leaf(source_dsdir=None):
+def theory_leaf(source_dsdir=None, trusted=False):
     """ theory leaf DataDir
+
+    :param trusted: skip the specifier checks when mapping to a path?
+    :type trusted: bool
     """
     spec_dfile = file_.data_series_specifier(
         file_prefix=SPEC_FILE_PREFIX,
@@ -51,7 +60,7 @@ def theory_leaf(source_dsdir=None):
             'orb_restricted': lambda specs: specs[2]},
         spec_keys=['method', 'basis', 'orb_restricted'])
 
-    _map = _pack_arguments(map_.theory_leaf)
+    _map = _pack_arguments(map_.theory_leaf, check=not trusted)
     nspecs = _count_arguments(map_.theory_leaf)
     return model.DataSeriesDir(map_=_map, nspecs=nspecs, depth=1,
                                spec_dfile=spec_dfile,
@@ -67,33 +76,141 @@ def conformer_trunk(source_dsdir=None):
                                source_dsdir=source_dsdir)
 
 
-def conformer_leaf(source_dsdir=None):
+def conformer_leaf(source_dsdir=None, trusted=False):
     """ conformer leaf DataDir
+
+    :param trusted: skip the specifier checks when mapping to a path?
+    :type trusted: bool
     """
     spec_dfile = file_.data_series_specifier(
         file_prefix=SPEC_FILE_PREFIX,
         map_dct_={'conformer_id': lambda specs: specs[0]},
         spec_keys=['conformer_id'])
 
-    _map = _pack_arguments(map_.conformer_leaf)
+    _map = _pack_arguments(map_.conformer_leaf, check=not trusted)
     nspecs = _count_arguments(map_.conformer_leaf)
     return model.DataSeriesDir(map_=_map, nspecs=nspecs, depth=1,
                                spec_dfile=spec_dfile,
                                source_dsdir=source_dsdir)
 
 
+def scan_trunk(source_dsdir=None):
+    """ scan trunk DataDir
+    """
+    _map = _pack_arguments(map_.scan_trunk)
+    nspecs = _count_arguments(map_.scan_trunk)
+    return model.DataSeriesDir(map_=_map, nspecs=nspecs, depth=1,
+                               source_dsdir=source_dsdir)
+
+
+def scan_branch(source_dsdir=None, trusted=False):
+    """ scan branch DataDir, for a set of scan coordinates
+
+    :param trusted: skip the specifier checks when mapping to a path?
+    :type trusted: bool
+    """
+    spec_dfile = file_.data_series_specifier(
+        file_prefix=SPEC_FILE_PREFIX,
+        map_dct_={'tors_names': lambda specs: sorted(specs[0])},
+        spec_keys=['tors_names'])
+
+    _map = _pack_arguments(map_.scan_branch, check=not trusted)
+    nspecs = _count_arguments(map_.scan_branch)
+    return model.DataSeriesDir(map_=_map, nspecs=nspecs, depth=1,
+                               spec_dfile=spec_dfile,
+                               source_dsdir=source_dsdir)
+
+
+def scan_leaf(source_dsdir=None, trusted=False):
+    """ scan leaf DataDir, for a point on the scan grid
+
+    :param trusted: skip the specifier checks when mapping to a path?
+    :type trusted: bool
+    """
+    spec_dfile = file_.data_series_specifier(
+        file_prefix=SPEC_FILE_PREFIX,
+        map_dct_={'idxs': lambda specs: list(specs[0])},
+        spec_keys=['idxs'])
+
+    _map = _pack_arguments(map_.scan_leaf, check=not trusted)
+    nspecs = _count_arguments(map_.scan_leaf)
+    return model.DataSeriesDir(map_=_map, nspecs=nspecs, depth=1,
+                               spec_dfile=spec_dfile,
+                               source_dsdir=source_dsdir)
+
+
+def sparse_scan_leaf(source_dsdir=None, trusted=False):
+    """ sparse scan leaf DataDir, for a point given by its coordinate values
+
+    :param trusted: skip the specifier checks when mapping to a path?
+    :type trusted: bool
+    """
+    spec_dfile = file_.data_series_specifier(
+        file_prefix=SPEC_FILE_PREFIX,
+        map_dct_={'vals': lambda specs: list(specs[0])},
+        spec_keys=['vals'])
+
+    _map = _pack_arguments(map_.sparse_scan_leaf, check=not trusted)
+    nspecs = _count_arguments(map_.sparse_scan_leaf)
+    return model.DataSeriesDir(map_=_map, nspecs=nspecs, depth=1,
+                               spec_dfile=spec_dfile,
+                               source_dsdir=source_dsdir)
+
+
 # helpers
-def _pack_arguments(function):
+def _pack_arguments(function, **kwargs):
     """ generate an equivalent function that takes all of its arguments packed
     into a sequence
+
+    Results are memoized on the argument tuple, in a bounded LRU cache, so
+    repeated path lookups don't re-run the (expensive) map function. The
+    cache is keyed on the types of the arguments as well as their values, so
+    that values which compare equal (`True` and `1`, `2` and `2.0`) are
+    still checked by the map function.
     """
+    @functools.lru_cache(maxsize=MAP_CACHE_SIZE)
+    def _cached_function(typed_args):
+        return function(*typed_args.args, **kwargs)
+
     def _function(args=()):
-        return function(*args)
+        typed_args = _TypedArguments(tuple(args))
+        try:
+            hash(typed_args)
+        except TypeError:
+            return function(*typed_args.args, **kwargs)
+        return _cached_function(typed_args)
+
+    _function.cache_info = _cached_function.cache_info
+    _function.cache_clear = _cached_function.cache_clear
     return _function
 
 
+class _TypedArguments():
+    """ an argument tuple, which compares (and hashes) by type as well as value
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.key = _typed_key(args)
+
+    def __eq__(self, other):
+        return (isinstance(other, _TypedArguments) and
+                self.key == other.key)
+
+    def __hash__(self):
+        return hash(self.key)
+
+
+def _typed_key(val):
+    """ a (type, value) key, for a value and anything nested in it
+    """
+    if isinstance(val, (tuple, list)):
+        return (type(val), tuple(map(_typed_key, val)))
+    return (type(val), val)
+
+
 def _count_arguments(function):
-    """ conut the number of arguments that a function takes in
+    """ conut the number of (required) arguments that a function takes in
     """
     argspec = function_argspec(function)
-    return len(argspec.args)
+    return len(argspec.args) - len(argspec.defaults or ())
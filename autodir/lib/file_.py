@@ -9,19 +9,22 @@ def information(file_prefix, function=None):
     """ information DataFile
 
     :param function: optional information-generator function, for checking the
-        function signature against the information object
+        function signature against the information object (according to the
+        `autofile.validate` policy)
     :type function: callable
     """
     def writer_(inf_obj):
         if function is not None:
-            assert autoinf.matches_function_signature(inf_obj, function)
+            autofile.validate.check(autoinf.matches_function_signature,
+                                    inf_obj, function)
         inf_str = autofile.write.information(inf_obj)
         return inf_str
 
     def reader_(inf_str):
         inf_obj = autofile.read.information(inf_str)
         if function is not None:
-            assert autoinf.matches_function_signature(inf_obj, function)
+            autofile.validate.check(autoinf.matches_function_signature,
+                                    inf_obj, function)
         return inf_obj
 
     name = autofile.name.information(file_prefix)
@@ -107,6 +110,41 @@ def hessian(file_prefix):
     return model.DataFile(name=name, writer_=writer_, reader_=reader_)
 
 
+def gradient_array(file_prefix):
+    """ generate binary gradient DataFile
+
+    The gradient is stored as a .npy array. Trees with text gradient files
+    are read through those instead.
+    """
+    name = autofile.name.gradient_array(file_prefix)
+    writer_ = autofile.write.gradient_array
+    reader_ = autofile.read.gradient_array
+    fallback = model.DataFile(
+        name=autofile.name.gradient(file_prefix),
+        writer_=autofile.write.gradient,
+        reader_=_compose(autofile.read.gradient_array, autofile.read.gradient))
+    return model.DataFile(name=name, writer_=writer_, reader_=reader_,
+                          array=True, fallback=fallback)
+
+
+def hessian_array(file_prefix):
+    """ generate binary hessian DataFile
+
+    The hessian is stored as a .npy array and read back memory-mapped (each
+    map holds a file descriptor open while it is alive). Trees with text
+    hessian files are read through those instead.
+    """
+    name = autofile.name.hessian_array(file_prefix)
+    writer_ = autofile.write.hessian_array
+    reader_ = autofile.read.hessian_array
+    fallback = model.DataFile(
+        name=autofile.name.hessian(file_prefix),
+        writer_=autofile.write.hessian,
+        reader_=_compose(autofile.read.hessian_array, autofile.read.hessian))
+    return model.DataFile(name=name, writer_=writer_, reader_=reader_,
+                          array=True, fallback=fallback, mmap=True)
+
+
 def zmatrix(file_prefix):
     """ generate zmatrix DataFile
     """
@@ -130,7 +168,40 @@ def trajectory(file_prefix):
     """
     name = autofile.name.trajectory(file_prefix)
     writer_ = autofile.write.trajectory
-    reader_ = _not_implemented
+    reader_ = autofile.read.trajectory
+    return model.DataFile(name=name, writer_=writer_, reader_=reader_)
+
+
+def trajectory_index(file_prefix):
+    """ generate trajectory index DataFile
+
+    (frame offsets and energies for a trajectory file -- see `autodir.traj`)
+    """
+    name = autofile.name.trajectory_index(file_prefix)
+    writer_ = autofile.write.trajectory_index
+    reader_ = autofile.read.trajectory_index
+    return model.DataFile(name=name, writer_=writer_, reader_=reader_)
+
+
+def scan_index(file_prefix):
+    """ generate scan point index DataFile
+
+    (the points of a sparse scan -- see `autodir.scan`)
+    """
+    name = autofile.name.scan_index(file_prefix)
+    writer_ = autofile.write.scan_index
+    reader_ = autofile.read.scan_index
+    return model.DataFile(name=name, writer_=writer_, reader_=reader_)
+
+
+def energy_column(file_prefix):
+    """ generate energy column DataFile
+
+    (the energies in a directory series -- see `autodir.query`)
+    """
+    name = autofile.name.energy_column(file_prefix)
+    writer_ = autofile.write.energy_column
+    reader_ = autofile.read.energy_column
     return model.DataFile(name=name, writer_=writer_, reader_=reader_)
 
 
@@ -153,5 +224,7 @@ def lennard_jones_sigma(file_prefix):
 
 
 # helpers
-def _not_implemented(*_args, **_kwargs):
-    raise NotImplementedError
+def _compose(function2, function1):
+    def _function(arg):
+        return function2(function1(arg))
+    return _function
@@ -1,8 +1,8 @@
 """ directory naming functions
 """
 import os
-import elstruct
-import automol
+import numbers
+from autofile._util import lazy_import as _lazy_import
 from autodir.lib._util import is_valid_stereo_inchi as _is_valid_stereo_inchi
 from autodir.lib._util import (is_valid_inchi_multiplicity as
                                _is_valid_inchi_multiplicity)
@@ -12,6 +12,9 @@ from autodir.lib._util import (random_string_identifier as
 from autodir.lib._util import (is_random_string_identifier as
                                _is_random_string_identifier)
 
+elstruct = _lazy_import('elstruct')
+automol = _lazy_import('automol')
+
 
 # species
 def species_trunk():
@@ -20,13 +23,19 @@ def species_trunk():
     return 'SPC'
 
 
-def species_leaf(ich, mult):
+def species_leaf(ich, mult, check=True):
     """ species leaf directory name
+
+    :param check: check the InChI string and multiplicity? (skip this for
+        trusted specifiers -- the stereo and multiplicity checks are slow)
+    :type check: bool
     """
-    assert _is_valid_stereo_inchi(ich)
-    assert _is_valid_inchi_multiplicity(ich, mult)
+    if check:
+        assert _is_valid_stereo_inchi(ich)
+        assert _is_valid_inchi_multiplicity(ich, mult)
     ich_key = automol.inchi.inchi_key(ich)
-    assert automol.inchi.key.is_standard_neutral(ich_key)
+    if check:
+        assert automol.inchi.key.is_standard_neutral(ich_key)
 
     mult_str = '{:d}'.format(mult)
     dir_names = (automol.inchi.formula_layer(ich),
@@ -37,15 +46,19 @@ def species_leaf(ich, mult):
 
 
 # theory
-def theory_leaf(method, basis, orb_restricted):
+def theory_leaf(method, basis, orb_restricted, check=True):
     """ theory leaf directory name
 
     This need not be tied to elstruct -- just take out the name checks.
     Note that we are (no longer) checking the orbital restriction.
+
+    :param check: check the method and basis names?
+    :type check: bool
     """
-    assert elstruct.Method.contains(method)
-    assert elstruct.Basis.contains(basis)
-    assert isinstance(orb_restricted, bool)
+    if check:
+        assert elstruct.Method.contains(method)
+        assert elstruct.Basis.contains(basis)
+        assert isinstance(orb_restricted, bool)
 
     ref_char = 'R' if orb_restricted else 'U'
     dir_name = ''.join([_short_hash(method),
@@ -61,13 +74,68 @@ def conformer_trunk():
     return 'CONFS'
 
 
-def conformer_leaf(cid):
+def conformer_leaf(cid, check=True):
     """ conformer leaf directory name
+
+    :param check: check the conformer identifier?
+    :type check: bool
     """
-    assert _is_random_string_identifier(cid)
+    if check:
+        assert _is_random_string_identifier(cid)
     return cid
 
 
+# scan
+def scan_trunk():
+    """ scan trunk directory name
+    """
+    return 'SCANS'
+
+
+def scan_branch(tors_names, check=True):
+    """ scan branch directory name
+
+    :param tors_names: the names of the scan coordinates
+    :param check: check the coordinate names?
+    :type check: bool
+    """
+    if check:
+        assert tors_names and all(isinstance(name, str) and '_' not in name
+                                  for name in tors_names)
+    return '_'.join(sorted(tors_names))
+
+
+def scan_leaf(idxs, check=True):
+    """ scan leaf directory name
+
+    :param idxs: the grid indices of the scan point, one per coordinate (in
+        order of the sorted coordinate names)
+    :param check: check the grid indices?
+    :type check: bool
+    """
+    if check:
+        assert idxs and all(isinstance(idx, int) and idx >= 0
+                            for idx in idxs)
+    return '_'.join(map('{:0>2d}'.format, idxs))
+
+
+def sparse_scan_leaf(vals, check=True):
+    """ sparse scan leaf directory name
+
+    Points are named by their coordinate values (to six decimal places), so
+    a scan can be refined by adding points anywhere, with no limit on the
+    number of points per coordinate.
+
+    :param vals: the coordinate values of the scan point, one per coordinate
+        (in order of the sorted coordinate names)
+    :param check: check the coordinate values?
+    :type check: bool
+    """
+    if check:
+        assert vals and all(isinstance(val, numbers.Real) for val in vals)
+    return '_'.join('{:.6f}'.format(round(val, 6) + 0.) for val in vals)
+
+
 def generate_new_conformer_id():
     """ generate a new conformer identifier
     """
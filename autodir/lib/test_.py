@@ -1,11 +1,31 @@
 """ test autodir.lib
 """
 import os
+import sys
+import shutil
+import asyncio
 import tempfile
+import threading
+import subprocess
 import numbers
+import multiprocessing
 import numpy
+import pytest
 import automol
 import autoinf
+import autofile
+import autodir._util
+import autodir.model
+import autodir.backend
+import autodir.archive
+import autodir.cache
+import autodir.index
+import autodir.query
+import autodir.traj
+import autodir.aio
+import autodir.dedup
+import autodir.scan
+import autodir.export
 import autodir.lib
 
 PREFIX = tempfile.mkdtemp()
@@ -16,7 +36,7 @@ def test__dir__species_trunk():
     """ test dir_.species_trunk
     """
     prefix = os.path.join(PREFIX, 'species_trunk')
-    os.mkdir(prefix)
+    autodir.backend.current().makedirs(prefix)
 
     spc_trunk_dsdir = autodir.lib.dir_.species_trunk()
     assert not spc_trunk_dsdir.exists(prefix)
@@ -28,7 +48,7 @@ def test__dir__species_leaf():
     """ test dir_.species_leaf
     """
     prefix = os.path.join(PREFIX, 'species_leaf')
-    os.mkdir(prefix)
+    autodir.backend.current().makedirs(prefix)
 
     spc_trunk_dsdir = autodir.lib.dir_.species_trunk()
     spc_leaf_dsdir = autodir.lib.dir_.species_leaf(spc_trunk_dsdir)
@@ -48,13 +68,17 @@ def test__dir__species_leaf():
 
     print(spc_leaf_dsdir.existing(prefix))
     assert spc_leaf_dsdir.existing(prefix) == tuple(sorted(specs_lst))
+    assert (spc_leaf_dsdir.existing(prefix, nworkers=4)
+            == tuple(sorted(specs_lst)))
+    assert (spc_leaf_dsdir.existing_paths(prefix, nworkers=4)
+            == spc_leaf_dsdir.existing_paths(prefix))
 
 
 def test__dir__theory_leaf():
     """ test dir_.theory_leaf
     """
     prefix = os.path.join(PREFIX, 'theory_leaf')
-    os.mkdir(prefix)
+    autodir.backend.current().makedirs(prefix)
 
     spc_trunk_dsdir = autodir.lib.dir_.species_trunk()
     spc_leaf_dsdir = autodir.lib.dir_.species_leaf(spc_trunk_dsdir)
@@ -85,7 +109,7 @@ def test__dir__conformer_trunk():
     """ test dir_.conformer_trunk
     """
     prefix = os.path.join(PREFIX, 'conformer_trunk')
-    os.mkdir(prefix)
+    autodir.backend.current().makedirs(prefix)
 
     spc_trunk_dsdir = autodir.lib.dir_.species_trunk()
     spc_leaf_dsdir = autodir.lib.dir_.species_leaf(spc_trunk_dsdir)
@@ -111,7 +135,7 @@ def test__dir__conformer_leaf():
     """ test dir_.conformer_leaf
     """
     prefix = os.path.join(PREFIX, 'conformer_leaf')
-    os.mkdir(prefix)
+    autodir.backend.current().makedirs(prefix)
 
     spc_trunk_dsdir = autodir.lib.dir_.species_trunk()
     spc_leaf_dsdir = autodir.lib.dir_.species_leaf(spc_trunk_dsdir)
@@ -143,6 +167,637 @@ def test__dir__conformer_leaf():
             == tuple(sorted(cnf_seg_specs_lst)))
 
 
+def test__dir__trusted():
+    """ test trusted (unchecked) and memoized DataSeriesDir paths
+    """
+    spc_trunk_dsdir = autodir.lib.dir_.species_trunk()
+    spc_leaf_dsdir = autodir.lib.dir_.species_leaf(spc_trunk_dsdir)
+    thy_leaf_dsdir = autodir.lib.dir_.theory_leaf(spc_leaf_dsdir)
+    trusted_spc_leaf_dsdir = autodir.lib.dir_.species_leaf(
+        spc_trunk_dsdir, trusted=True)
+    trusted_thy_leaf_dsdir = autodir.lib.dir_.theory_leaf(
+        trusted_spc_leaf_dsdir, trusted=True)
+
+    specs = ('InChI=1S/CH3/h1H3', 2, 'hf', 'sto-3g', False)
+    pth = thy_leaf_dsdir.path(PREFIX, specs)
+    assert trusted_thy_leaf_dsdir.path(PREFIX, specs) == pth
+    assert trusted_thy_leaf_dsdir.path(PREFIX, list(specs)) == pth
+
+    # repeated lookups hit the cache
+    nhits = thy_leaf_dsdir.map_.cache_info().hits
+    thy_leaf_dsdir.path(PREFIX, specs)
+    assert thy_leaf_dsdir.map_.cache_info().hits == nhits + 1
+
+    # (but values that are equal to cached ones, with other types, are
+    # still checked)
+    with pytest.raises(AssertionError):
+        thy_leaf_dsdir.path(PREFIX, specs[:4] + (0,))
+    with pytest.raises(AssertionError):
+        thy_leaf_dsdir.path(PREFIX, specs[:1] + (2.0,) + specs[2:])
+
+
+def test__dir__index():
+    """ test the DataSeriesDir specifier index
+    """
+    prefix = os.path.join(PREFIX, 'index')
+    autodir.backend.current().makedirs(prefix)
+
+    spc_trunk_dsdir = autodir.lib.dir_.species_trunk()
+    spc_leaf_dsdir = autodir.lib.dir_.species_leaf(spc_trunk_dsdir)
+    thy_leaf_dsdir = autodir.lib.dir_.theory_leaf(spc_leaf_dsdir)
+
+    spc_specs_lst = (
+        ('InChI=1S/CH3/h1H3', 2),
+        ('InChI=1S/O', 3),
+    )
+    thy_specs_lst = (
+        ('hf', 'sto-3g', True),
+        ('b3lyp', '6-31g*', False),
+    )
+
+    # a tree written before the index existed
+    for spc_specs in spc_specs_lst:
+        thy_leaf_dsdir.create(prefix, spc_specs + thy_specs_lst[0])
+
+    assert not thy_leaf_dsdir.verify_index(prefix)
+    thy_leaf_dsdir.rebuild_index(prefix)
+    assert thy_leaf_dsdir.verify_index(prefix)
+
+    # new directories are added to the index as they are created
+    for spc_specs in spc_specs_lst:
+        thy_leaf_dsdir.create(prefix, spc_specs + thy_specs_lst[1])
+    assert thy_leaf_dsdir.verify_index(prefix)
+
+    assert spc_leaf_dsdir.existing(prefix) == spc_specs_lst
+    for spc_specs in spc_specs_lst:
+        assert (thy_leaf_dsdir.existing(prefix, spc_specs)
+                == tuple(sorted(thy_specs_lst)))
+        assert (thy_leaf_dsdir.existing_paths(prefix, spc_specs)
+                == tuple(sorted(thy_leaf_dsdir.path(prefix, spc_specs + specs)
+                                for specs in thy_specs_lst)))
+
+    # chains that weren't indexed are still found, by scanning the tree
+    cnf_trunk_dsdir = autodir.lib.dir_.conformer_trunk(thy_leaf_dsdir)
+    cnf_leaf_dsdir = autodir.lib.dir_.conformer_leaf(cnf_trunk_dsdir)
+    thy_specs = spc_specs_lst[0] + thy_specs_lst[0]
+    cnf_specs = (autodir.lib.generate_new_conformer_id(),)
+    os.remove(autodir.index.path(prefix))
+    cnf_leaf_dsdir.create(prefix, thy_specs + cnf_specs)
+    thy_leaf_dsdir.rebuild_index(prefix)
+    assert not cnf_leaf_dsdir.verify_index(prefix)
+    assert cnf_leaf_dsdir.existing(prefix, thy_specs) == (cnf_specs,)
+
+    # (and new directories below a new source directory are indexed)
+    new_thy_specs = spc_specs_lst[0] + ('mp2', 'sto-3g', True)
+    cnf_leaf_dsdir.create(prefix, new_thy_specs + cnf_specs)
+    new_cnf_trunk_pth = cnf_trunk_dsdir.path(prefix, new_thy_specs)
+    assert autodir.index.is_listed(prefix, new_cnf_trunk_pth, 1)
+    assert cnf_leaf_dsdir.existing(prefix, new_thy_specs) == (cnf_specs,)
+
+    # a directory missing from the index is added back by creating it again
+    cnf_pth = cnf_leaf_dsdir.path(prefix, new_thy_specs + cnf_specs)
+    autodir.index.remove(prefix, [(cnf_pth, 1)])
+    assert cnf_leaf_dsdir.existing(prefix, new_thy_specs) == ()
+    cnf_leaf_dsdir.create(prefix, new_thy_specs + cnf_specs)
+    assert cnf_leaf_dsdir.existing(prefix, new_thy_specs) == (cnf_specs,)
+
+    # indexed specifiers are those read back from the specifier files
+    scn_trunk_dsdir = autodir.lib.dir_.scan_trunk(thy_leaf_dsdir)
+    scn_branch_dsdir = autodir.lib.dir_.scan_branch(scn_trunk_dsdir)
+    scn_branch_dsdir.create(prefix, new_thy_specs + (('d4', 'd3'),))
+    ref_scn_specs_lst = ((['d3', 'd4'],),)
+    assert (scn_branch_dsdir.existing(prefix, new_thy_specs)
+            == ref_scn_specs_lst)
+    os.remove(autodir.index.path(prefix))
+    assert (scn_branch_dsdir.existing(prefix, new_thy_specs)
+            == ref_scn_specs_lst)
+
+    # trees with list specifiers can be verified
+    scn_leaf_dsdir = autodir.lib.dir_.scan_leaf(scn_branch_dsdir)
+    scn_leaf_dsdir.create(prefix, new_thy_specs + (('d3', 'd4'), (0, 1)))
+    assert not scn_leaf_dsdir.verify_index(prefix)
+    scn_leaf_dsdir.rebuild_index(prefix)
+    assert scn_leaf_dsdir.verify_index(prefix)
+
+    # creating directories that are already indexed doesn't write to it
+    nadds = []
+    add = autodir.index.add
+    autodir.index.add = lambda *args: nadds.append(args)
+    try:
+        scn_leaf_dsdir.create(prefix, new_thy_specs + (('d3', 'd4'), (0, 1)))
+        assert not nadds
+        scn_leaf_dsdir.create(prefix, new_thy_specs + (('d3', 'd4'), (1, 1)))
+        assert len(nadds) == 1
+    finally:
+        autodir.index.add = add
+
+
+def test__dir__index_backend():
+    """ test that the index is only used with the file-system backend
+    """
+    prefix = os.path.join(PREFIX, 'index_backend')
+    autodir.backend.current().makedirs(prefix)
+
+    spc_trunk_dsdir = autodir.lib.dir_.species_trunk()
+    spc_leaf_dsdir = autodir.lib.dir_.species_leaf(spc_trunk_dsdir)
+
+    fs_spc_specs = ('InChI=1S/CH3/h1H3', 2)
+    mem_spc_specs = ('InChI=1S/O', 3)
+
+    spc_leaf_dsdir.create(prefix, fs_spc_specs)
+    spc_leaf_dsdir.rebuild_index(prefix)
+    assert autodir.index.usable(prefix)
+
+    mem_backend = autodir.backend.MemoryBackend()
+    with autodir.backend.using(mem_backend):
+        mem_backend.makedirs(prefix)
+        assert not autodir.index.usable(prefix)
+        spc_leaf_dsdir.create(prefix, mem_spc_specs)
+        assert spc_leaf_dsdir.existing(prefix) == (mem_spc_specs,)
+        assert not spc_leaf_dsdir.verify_index(prefix)
+        with pytest.raises(AssertionError):
+            spc_leaf_dsdir.rebuild_index(prefix)
+
+    # (the on-disk index is left as it was)
+    assert spc_leaf_dsdir.verify_index(prefix)
+    assert spc_leaf_dsdir.existing(prefix) == (fs_spc_specs,)
+
+
+def test__dir__create_concurrently():
+    """ test concurrent DataSeriesDir.create calls on the same prefix
+    """
+    prefix = os.path.join(PREFIX, 'create_concurrently')
+    autodir.backend.current().makedirs(prefix)
+
+    nprocs = 8
+    thy_specs = ('InChI=1S/CH3/h1H3', 2, 'hf', 'sto-3g', False)
+    cids = tuple(autodir.lib.generate_new_conformer_id() for _ in range(10))
+    args_lst = [(prefix, thy_specs, cids, bool(idx % 2))
+                for idx in range(4 * nprocs)]
+
+    with multiprocessing.Pool(nprocs) as pool:
+        pool.map(_create_conformers, args_lst)
+
+    spc_trunk_dsdir = autodir.lib.dir_.species_trunk()
+    spc_leaf_dsdir = autodir.lib.dir_.species_leaf(spc_trunk_dsdir)
+    thy_leaf_dsdir = autodir.lib.dir_.theory_leaf(spc_leaf_dsdir)
+    cnf_trunk_dsdir = autodir.lib.dir_.conformer_trunk(thy_leaf_dsdir)
+    cnf_leaf_dsdir = autodir.lib.dir_.conformer_leaf(cnf_trunk_dsdir)
+    assert spc_leaf_dsdir.existing(prefix) == (thy_specs[:2],)
+    assert thy_leaf_dsdir.existing(prefix, thy_specs[:2]) == (thy_specs[2:],)
+    assert (cnf_leaf_dsdir.existing(prefix, thy_specs)
+            == tuple(sorted((cid,) for cid in cids)))
+
+
+def _create_conformers(args):
+    prefix, thy_specs, cids, lock = args
+
+    spc_trunk_dsdir = autodir.lib.dir_.species_trunk()
+    spc_leaf_dsdir = autodir.lib.dir_.species_leaf(spc_trunk_dsdir)
+    thy_leaf_dsdir = autodir.lib.dir_.theory_leaf(spc_leaf_dsdir)
+    cnf_trunk_dsdir = autodir.lib.dir_.conformer_trunk(thy_leaf_dsdir)
+    cnf_leaf_dsdir = autodir.lib.dir_.conformer_leaf(cnf_trunk_dsdir)
+    for cid in cids:
+        cnf_leaf_dsdir.create(prefix, thy_specs + (cid,), lock=lock)
+
+
+def test__series_file__read_many():
+    """ test autodir.model.DataSeriesFile.read_many/write_many
+    """
+    prefix = os.path.join(PREFIX, 'read_many')
+    autodir.backend.current().makedirs(prefix)
+
+    spc_trunk_dsdir = autodir.lib.dir_.species_trunk()
+    spc_leaf_dsdir = autodir.lib.dir_.species_leaf(spc_trunk_dsdir)
+    thy_leaf_dsdir = autodir.lib.dir_.theory_leaf(spc_leaf_dsdir)
+    cnf_trunk_dsdir = autodir.lib.dir_.conformer_trunk(thy_leaf_dsdir)
+    cnf_leaf_dsdir = autodir.lib.dir_.conformer_leaf(cnf_trunk_dsdir)
+    ene_dsfile = autodir.model.DataSeriesFile(
+        cnf_leaf_dsdir, autodir.lib.file_.energy('test'))
+
+    nconfs = 10
+    thy_specs = ('InChI=1S/CH3/h1H3', 2, 'hf', 'sto-3g', False)
+    specs_lst = tuple(thy_specs + (autodir.lib.generate_new_conformer_id(),)
+                      for _ in range(nconfs))
+    ref_enes = tuple(-39.5 - 0.01 * idx for idx in range(nconfs))
+
+    for specs in specs_lst:
+        cnf_leaf_dsdir.create(prefix, specs)
+
+    ene_dsfile.write_many(ref_enes, prefix, specs_lst)
+    enes = tuple(ene_dsfile.read_many(prefix, specs_lst))
+    assert enes == tuple(map(ene_dsfile.read, [prefix] * nconfs, specs_lst))
+    assert numpy.allclose(enes, ref_enes)
+
+    enes = tuple(ene_dsfile.read_many(prefix, iter(specs_lst), nworkers=4))
+    assert numpy.allclose(enes, ref_enes)
+
+    # (there must be a value for each set of specifiers)
+    with pytest.raises(AssertionError):
+        ene_dsfile.write_many(ref_enes[:-1], prefix, iter(specs_lst))
+    assert numpy.allclose(tuple(ene_dsfile.read_many(prefix, specs_lst)),
+                          ref_enes)
+
+
+def test__query__lowest_energy_geometries():
+    """ test autodir.query.lowest_energy_geometries
+    """
+    prefix = os.path.join(PREFIX, 'query')
+    autodir.backend.current().makedirs(prefix)
+
+    spc_trunk_dsdir = autodir.lib.dir_.species_trunk()
+    spc_leaf_dsdir = autodir.lib.dir_.species_leaf(spc_trunk_dsdir)
+    thy_leaf_dsdir = autodir.lib.dir_.theory_leaf(spc_leaf_dsdir)
+    cnf_trunk_dsdir = autodir.lib.dir_.conformer_trunk(thy_leaf_dsdir)
+    cnf_leaf_dsdir = autodir.lib.dir_.conformer_leaf(cnf_trunk_dsdir)
+    ene_dsfile = autodir.model.DataSeriesFile(
+        cnf_leaf_dsdir, autodir.lib.file_.energy('test'))
+    geo_dsfile = autodir.model.DataSeriesFile(
+        cnf_leaf_dsdir, autodir.lib.file_.geometry('test'))
+
+    thy_specs = ('InChI=1S/CH3/h1H3', 2, 'hf', 'sto-3g', False)
+    ref_geo = (('C', (0., 0., 0.)), ('H', (0., 0., 2.)),
+               ('H', (0., 1.7, -1.)), ('H', (0., -1.7, -1.)))
+    ref_enes = (-39.51, -39.54, -39.50, -39.53, -39.52)
+
+    def _write_conformers(enes):
+        for ene in enes:
+            specs = thy_specs + (autodir.lib.generate_new_conformer_id(),)
+            cnf_leaf_dsdir.create(prefix, specs)
+            ene_dsfile.write(ene, prefix, specs)
+            geo_dsfile.write(ref_geo, prefix, specs)
+
+    _write_conformers(ref_enes)
+
+    for cache in (False, True):
+        ene_specs_geos = autodir.query.lowest_energy_geometries(
+            ene_dsfile, geo_dsfile, prefix, thy_specs, nlowest=3, cache=cache)
+        assert [ene for ene, _, _ in ene_specs_geos] == [-39.54, -39.53,
+                                                         -39.52]
+        assert all(automol.geom.almost_equal(geo, ref_geo)
+                   for _, _, geo in ene_specs_geos)
+
+    # the cached energy column picks up energies written through it
+    specs = thy_specs + (autodir.lib.generate_new_conformer_id(),)
+    cnf_leaf_dsdir.create(prefix, specs)
+    autodir.query.write_energy(ene_dsfile, -39.60, prefix, specs)
+    ene_specs_lst = autodir.query.lowest_energies(
+        ene_dsfile, prefix, thy_specs, nlowest=2, cache=True)
+    assert ene_specs_lst == ((-39.60, specs[-1:]),
+                             (-39.54, ene_specs_lst[1][1]))
+    autodir.query.write_energy(ene_dsfile, -39.40, prefix, specs)
+    ene_specs_lst = autodir.query.lowest_energies(
+        ene_dsfile, prefix, thy_specs, nlowest=2, cache=True)
+    assert [ene for ene, _ in ene_specs_lst] == [-39.54, -39.53]
+
+    # (others are picked up when the column is updated)
+    _write_conformers([-39.70])
+    ene_specs_lst = autodir.query.lowest_energies(
+        ene_dsfile, prefix, thy_specs, nlowest=2, cache=True)
+    assert [ene for ene, _ in ene_specs_lst] == [-39.54, -39.53]
+    ene_specs_lst = autodir.query.update_energy_column(
+        ene_dsfile, prefix, thy_specs)
+    assert [ene for ene, _ in ene_specs_lst] == [
+        -39.70, -39.54, -39.53, -39.52, -39.51, -39.50, -39.40]
+    assert autodir.query.energy_column(
+        ene_dsfile, prefix, thy_specs) == ene_specs_lst
+
+    # the column is sorted once per version of the file, and queries on it
+    # only take a slice
+    ene_specs_lst = autodir.query.energy_column(ene_dsfile, prefix, thy_specs)
+    assert autodir.query.energy_column(
+        ene_dsfile, prefix, thy_specs) is ene_specs_lst
+    assert autodir.query.lowest_energies(
+        ene_dsfile, prefix, thy_specs, nlowest=3,
+        cache=True) == ene_specs_lst[:3]
+
+
+def test__scan__energy_grid():
+    """ test autodir.scan.energy_grid
+    """
+    prefix = os.path.join(PREFIX, 'scan')
+    autodir.backend.current().makedirs(prefix)
+
+    spc_trunk_dsdir = autodir.lib.dir_.species_trunk()
+    spc_leaf_dsdir = autodir.lib.dir_.species_leaf(spc_trunk_dsdir)
+    thy_leaf_dsdir = autodir.lib.dir_.theory_leaf(spc_leaf_dsdir)
+    scn_trunk_dsdir = autodir.lib.dir_.scan_trunk(thy_leaf_dsdir)
+    scn_branch_dsdir = autodir.lib.dir_.scan_branch(scn_trunk_dsdir)
+    scn_leaf_dsdir = autodir.lib.dir_.scan_leaf(scn_branch_dsdir)
+    ene_dsfile = autodir.model.DataSeriesFile(
+        scn_leaf_dsdir, autodir.lib.file_.energy('test'))
+
+    thy_specs = ('InChI=1S/CH3/h1H3', 2, 'hf', 'sto-3g', False)
+    tors_dct = {'d4': 5, 'd3': 3}
+    assert autodir.scan.grid_shape(tors_dct) == (3, 5)
+
+    # leave out the points with idx3 == idx4
+    ref_enes = numpy.full((3, 5), numpy.nan)
+    for specs in autodir.scan.grid_specifiers(tors_dct, thy_specs):
+        idx3, idx4 = idxs = specs[-1]
+        assert specs[-2] == ('d3', 'd4')
+        if idx3 != idx4:
+            ref_enes[idxs] = -39.5 - 0.01 * idx3 - 0.001 * idx4
+            scn_leaf_dsdir.create(prefix, specs)
+            ene_dsfile.write(ref_enes[idxs], prefix, specs)
+
+    assert (scn_branch_dsdir.existing(prefix, thy_specs)
+            == ((['d3', 'd4'],),))
+    assert len(scn_leaf_dsdir.existing(prefix, thy_specs + (('d3', 'd4'),))
+               ) == 12
+
+    enes = autodir.scan.energy_grid(ene_dsfile, prefix, tors_dct, thy_specs,
+                                    nworkers=4)
+    assert numpy.allclose(enes, ref_enes, equal_nan=True)
+
+    # the cached grid picks up new points
+    grid_pth = autodir.scan.energy_grid_path(ene_dsfile, prefix, tors_dct,
+                                             thy_specs)
+    assert not autodir.backend.current().isfile(grid_pth)
+    enes = autodir.scan.energy_grid(ene_dsfile, prefix, tors_dct, thy_specs,
+                                    cache=True)
+    assert numpy.allclose(enes, ref_enes, equal_nan=True)
+    assert autodir.backend.current().isfile(grid_pth)
+
+    specs = thy_specs + (('d3', 'd4'), (1, 1))
+    scn_leaf_dsdir.create(prefix, specs)
+    ene_dsfile.write(-40., prefix, specs)
+    ref_enes[1, 1] = -40.
+    enes = autodir.scan.energy_grid(ene_dsfile, prefix, tors_dct, thy_specs,
+                                    cache=True)
+    assert numpy.allclose(enes, ref_enes, equal_nan=True)
+
+    # overwritten energies are only picked up by an update
+    ene_dsfile.write(-41., prefix, specs)
+    enes = autodir.scan.energy_grid(ene_dsfile, prefix, tors_dct, thy_specs,
+                                    cache=True)
+    assert enes[1, 1] == -40.
+    enes = autodir.scan.update_energy_grid(ene_dsfile, prefix, tors_dct,
+                                           thy_specs)
+    assert enes[1, 1] == -41.
+
+
+def test__scan__sparse():
+    """ test autodir.scan sparse scans
+    """
+    prefix = os.path.join(PREFIX, 'sparse_scan')
+    autodir.backend.current().makedirs(prefix)
+
+    spc_trunk_dsdir = autodir.lib.dir_.species_trunk()
+    spc_leaf_dsdir = autodir.lib.dir_.species_leaf(spc_trunk_dsdir)
+    thy_leaf_dsdir = autodir.lib.dir_.theory_leaf(spc_leaf_dsdir)
+    scn_trunk_dsdir = autodir.lib.dir_.scan_trunk(thy_leaf_dsdir)
+    scn_branch_dsdir = autodir.lib.dir_.scan_branch(scn_trunk_dsdir)
+    scn_leaf_dsdir = autodir.lib.dir_.sparse_scan_leaf(scn_branch_dsdir)
+    ene_dsfile = autodir.model.DataSeriesFile(
+        scn_leaf_dsdir, autodir.lib.file_.energy('test'))
+
+    thy_specs = ('InChI=1S/CH3/h1H3', 2, 'hf', 'sto-3g', False)
+    scn_specs = thy_specs + (('d2', 'd3', 'd4'),)
+
+    # 120 points along d2, refined near the minimum, plus a few others
+    ref_pts = [(0.05 * idx, 0., 0.) for idx in range(100)]
+    ref_pts += [(2.4025 + 0.005 * idx, 0., 0.) for idx in range(20)]
+    ref_pts += [(0., -1.5, 1.5), (0., 1.5, -1.5)]
+    for pt in ref_pts:
+        autodir.scan.create_point(scn_leaf_dsdir, prefix, scn_specs + (pt,))
+        ene_dsfile.write(-39.5 + sum(pt), prefix, scn_specs + (pt,))
+    # (creating a point again doesn't change the index)
+    autodir.scan.create_point(scn_leaf_dsdir, prefix,
+                              scn_specs + (ref_pts[0],))
+
+    pts = autodir.scan.points(scn_leaf_dsdir, prefix, scn_specs)
+    assert len(pts) == len(ref_pts) == 122
+    assert numpy.allclose(pts, sorted(ref_pts))
+    assert (sorted(pts) ==
+            sorted(tuple(vals) for vals, in
+                   scn_leaf_dsdir.existing(prefix, scn_specs)))
+
+    pt_enes = tuple(autodir.scan.point_energies(ene_dsfile, prefix,
+                                                scn_specs, nworkers=4))
+    assert [pt for pt, _ in pt_enes] == list(pts)
+    assert numpy.allclose([ene for _, ene in pt_enes],
+                          [-39.5 + sum(pt) for pt in pts])
+
+    # the index is rebuilt from the tree if it is missing
+    branch_pth = scn_branch_dsdir.path(prefix, scn_specs)
+    pt_idx_pth = autodir.lib.file_.scan_index('points').path(branch_pth)
+    autodir.backend.current().remove(pt_idx_pth)
+    assert autodir.scan.points(scn_leaf_dsdir, prefix, scn_specs) == pts
+
+    # (and points created without the index aren't lost when it is made)
+    autodir.backend.current().remove(pt_idx_pth)
+    new_pts = [(0., 0., 0.5 * idx) for idx in range(1, 4)]
+    for pt in new_pts:
+        scn_leaf_dsdir.create(prefix, scn_specs + (pt,))
+    autodir.scan.create_point(scn_leaf_dsdir, prefix,
+                              scn_specs + ((0., 0., 2.),))
+    assert (autodir.scan.points(scn_leaf_dsdir, prefix, scn_specs)
+            == tuple(sorted(pts + tuple(new_pts) + ((0., 0., 2.),))))
+
+
+def test__export():
+    """ test autodir.export
+    """
+    prefix = os.path.join(PREFIX, 'export')
+    autodir.backend.current().makedirs(prefix)
+
+    spc_trunk_dsdir = autodir.lib.dir_.species_trunk()
+    spc_leaf_dsdir = autodir.lib.dir_.species_leaf(spc_trunk_dsdir)
+    thy_leaf_dsdir = autodir.lib.dir_.theory_leaf(spc_leaf_dsdir)
+    cnf_trunk_dsdir = autodir.lib.dir_.conformer_trunk(thy_leaf_dsdir)
+    cnf_leaf_dsdir = autodir.lib.dir_.conformer_leaf(cnf_trunk_dsdir)
+    ene_dsfile = autodir.model.DataSeriesFile(
+        cnf_leaf_dsdir, autodir.lib.file_.energy('test'))
+    grad_dsfile = autodir.model.DataSeriesFile(
+        cnf_leaf_dsdir, autodir.lib.file_.gradient_array('test'))
+
+    spc_specs = ('InChI=1S/CH3/h1H3', 2)
+    thy_specs_lst = (spc_specs + ('hf', 'sto-3g', False),
+                     spc_specs + ('b3lyp', '6-31g*', False))
+    ref_grad = ((0., 0., 0.1), (0., 0.1, 0.), (0.1, 0., 0.), (0., 0., 0.))
+
+    ref_rows = []
+    for thy_idx, thy_specs in enumerate(thy_specs_lst):
+        for idx in range(4):
+            specs = thy_specs + (autodir.lib.generate_new_conformer_id(),)
+            cnf_leaf_dsdir.create(prefix, specs)
+            ene = -39.5 - thy_idx - 0.01 * idx
+            ene_dsfile.write(ene, prefix, specs)
+            grad_dsfile.write(ref_grad, prefix, specs)
+            ref_rows.append((specs, ene))
+    # (a conformer without an energy is left out)
+    cnf_leaf_dsdir.create(
+        prefix, thy_specs_lst[0] + (autodir.lib.generate_new_conformer_id(),))
+    ref_rows.sort()
+
+    spec_names = ('inchi', 'mult', 'method', 'basis', 'orb_restricted',
+                  'conformer_id')
+    dsfile_dct = {'energy': ene_dsfile, 'gradient': grad_dsfile}
+    pth = os.path.join(PREFIX, 'export.npz')
+    nrows = autodir.export.export(pth, dsfile_dct, prefix,
+                                  spec_names=spec_names, nworkers=4,
+                                  chunk_size=3)
+    assert nrows == 8
+
+    col_dct = autodir.export.read(pth)
+    assert tuple(col_dct) == spec_names + ('energy', 'gradient')
+    assert (list(zip(*(col_dct[name].tolist() for name in spec_names)))
+            == [specs for specs, _ in ref_rows])
+    assert numpy.allclose(col_dct['energy'], [ene for _, ene in ref_rows])
+    assert col_dct['gradient'].shape == (8, 4, 3)
+    assert numpy.allclose(col_dct['gradient'], ref_grad)
+
+    # a subtree
+    nrows = autodir.export.export(pth, {'energy': ene_dsfile}, prefix,
+                                  source_specs=thy_specs_lst[1])
+    assert nrows == 4
+    col_dct = autodir.export.read(pth)
+    assert numpy.allclose(sorted(col_dct['energy']),
+                          sorted(ene for specs, ene in ref_rows
+                                 if specs[:5] == thy_specs_lst[1]))
+    assert set(col_dct['spec2'].tolist()) == {'b3lyp'}
+
+    # an empty subtree still writes a file, with empty columns
+    nrows = autodir.export.export(
+        pth, {'energy': ene_dsfile}, prefix, spec_names=spec_names[:5],
+        source_specs=spc_specs + ('mp2', 'sto-3g', False))
+    assert nrows == 0
+    col_dct = autodir.export.read(pth)
+    assert tuple(col_dct) == spec_names[:5] + ('energy',)
+    assert all(len(col) == 0 for col in col_dct.values())
+
+
+def test__export__many_arrays():
+    """ test exporting more memory-mapped arrays than there are file
+    descriptors
+    """
+    resource = pytest.importorskip('resource')
+    prefix = os.path.join(PREFIX, 'export_many')
+    autodir.backend.current().makedirs(prefix)
+
+    thy_leaf_dsdir = autodir.lib.dir_.theory_leaf(
+        autodir.lib.dir_.species_leaf(autodir.lib.dir_.species_trunk()))
+    cnf_leaf_dsdir = autodir.lib.dir_.conformer_leaf(
+        autodir.lib.dir_.conformer_trunk(thy_leaf_dsdir))
+    hess_dsfile = autodir.model.DataSeriesFile(
+        cnf_leaf_dsdir, autodir.lib.file_.hessian_array('test'))
+
+    thy_specs = ('InChI=1S/CH3/h1H3', 2, 'hf', 'sto-3g', False)
+    ref_hess = numpy.eye(6)
+    soft_limit, hard_limit = resource.getrlimit(resource.RLIMIT_NOFILE)
+    limit = 128 if soft_limit == resource.RLIM_INFINITY else (
+        min(soft_limit, 128))
+    nrows = limit + 32
+    for _ in range(nrows):
+        specs = thy_specs + (autodir.lib.generate_new_conformer_id(),)
+        cnf_leaf_dsdir.create(prefix, specs)
+        hess_dsfile.write(ref_hess, prefix, specs)
+
+    pth = os.path.join(PREFIX, 'export_many.npz')
+    resource.setrlimit(resource.RLIMIT_NOFILE, (limit, hard_limit))
+    try:
+        assert autodir.export.export(pth, {'hessian': hess_dsfile}, prefix,
+                                     source_specs=thy_specs) == nrows
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft_limit, hard_limit))
+    assert numpy.allclose(autodir.export.read(pth)['hessian'], ref_hess)
+
+
+def test__export__parquet():
+    """ test autodir.export to Parquet files
+    """
+    pytest.importorskip('pyarrow')
+    prefix = os.path.join(PREFIX, 'export_parquet')
+    autodir.backend.current().makedirs(prefix)
+
+    spc_trunk_dsdir = autodir.lib.dir_.species_trunk()
+    spc_leaf_dsdir = autodir.lib.dir_.species_leaf(spc_trunk_dsdir)
+    thy_leaf_dsdir = autodir.lib.dir_.theory_leaf(spc_leaf_dsdir)
+    ene_dsfile = autodir.model.DataSeriesFile(
+        thy_leaf_dsdir, autodir.lib.file_.energy('test'))
+    grad_dsfile = autodir.model.DataSeriesFile(
+        thy_leaf_dsdir, autodir.lib.file_.gradient_array('test'))
+
+    spc_specs = ('InChI=1S/CH3/h1H3', 2)
+    thy_specs_lst = (('b3lyp', '6-31g*', False), ('hf', 'sto-3g', False),
+                     ('hf', 'sto-3g', True))
+    ref_grad = numpy.array(((0., 0., 0.1), (0., 0.1, 0.), (0.1, 0., 0.),
+                            (0., 0., 0.)))
+    for idx, thy_specs in enumerate(thy_specs_lst):
+        thy_leaf_dsdir.create(prefix, spc_specs + thy_specs)
+        ene_dsfile.write(-39.5 - idx, prefix, spc_specs + thy_specs)
+        grad_dsfile.write(ref_grad * idx, prefix, spc_specs + thy_specs)
+
+    # an array column, over several row groups
+    dsfile_dct = {'energy': ene_dsfile, 'gradient': grad_dsfile}
+    pth = os.path.join(PREFIX, 'export.parquet')
+    nrows = autodir.export.export(pth, dsfile_dct, prefix, chunk_size=2)
+    assert nrows == 3
+    col_dct = autodir.export.read(pth)
+    assert col_dct['spec2'].tolist() == ['b3lyp', 'hf', 'hf']
+    assert numpy.allclose(col_dct['energy'], [-39.5, -40.5, -41.5])
+    assert col_dct['gradient'].shape == (3, 4, 3)
+    assert numpy.allclose(col_dct['gradient'],
+                          [ref_grad * idx for idx in range(3)])
+
+    # no rows
+    os.remove(pth)
+    nrows = autodir.export.export(
+        pth, dsfile_dct, prefix, spec_names=('inchi', 'mult'),
+        source_specs=('InChI=1S/O', 3))
+    assert nrows == 0
+    col_dct = autodir.export.read(pth)
+    assert tuple(col_dct) == ('inchi', 'mult', 'energy', 'gradient')
+    assert all(len(col) == 0 for col in col_dct.values())
+
+
+def test__aio():
+    """ test the autodir.aio asyncio API
+    """
+    prefix = os.path.join(PREFIX, 'aio')
+    autodir.backend.current().makedirs(prefix)
+
+    thy_leaf_dsdir = autodir.lib.dir_.theory_leaf(
+        autodir.lib.dir_.species_leaf(autodir.lib.dir_.species_trunk()))
+    cnf_leaf_dsdir = autodir.lib.dir_.conformer_leaf(
+        autodir.lib.dir_.conformer_trunk(thy_leaf_dsdir))
+    ene_dsfile = autodir.model.DataSeriesFile(
+        cnf_leaf_dsdir, autodir.lib.file_.energy('test'))
+
+    thy_specs = ('InChI=1S/CH3/h1H3', 2, 'hf', 'sto-3g', False)
+    specs_lst = tuple(thy_specs + (autodir.lib.generate_new_conformer_id(),)
+                      for _ in range(20))
+    ref_enes = tuple(-39.5 - 0.01 * idx for idx in range(len(specs_lst)))
+
+    async def _run():
+        runner = autodir.aio.Runner(max_concurrency=4)
+        assert not await autodir.aio.exists(cnf_leaf_dsdir, prefix,
+                                            specs_lst[0])
+        await asyncio.gather(*(
+            runner.create(cnf_leaf_dsdir, prefix, specs, lock=True)
+            for specs in specs_lst))
+        await asyncio.gather(*(
+            autodir.aio.write(ene_dsfile, ene, prefix, specs)
+            for ene, specs in zip(ref_enes, specs_lst)))
+        assert await autodir.aio.exists(ene_dsfile, prefix, specs_lst[0])
+        assert (await autodir.aio.read(ene_dsfile, prefix, specs_lst[0])
+                == ref_enes[0])
+
+        enes = [ene async for ene in runner.read_many(ene_dsfile, prefix,
+                                                      specs_lst)]
+        assert numpy.allclose(enes, ref_enes)
+
+        cnf_specs_lst = await autodir.aio.existing(cnf_leaf_dsdir, prefix,
+                                                   thy_specs)
+        assert cnf_specs_lst == tuple(sorted(specs[-1:]
+                                             for specs in specs_lst))
+        assert sorted([specs async for specs in autodir.aio.iter_existing(
+            cnf_leaf_dsdir, prefix, thy_specs)]) == list(cnf_specs_lst)
+
+    asyncio.run(_run())
+
+
 def test__file__input_file():
     """ test autodir.lib.file_.input_file
     """
@@ -200,6 +855,29 @@ def test__file__information():
     assert inf_obj == ref_inf_obj
     print(inf_obj)
 
+    # the validation policy carries over to reads on a thread pool
+    def other_information(nsamp):
+        return autoinf.Info(nsamp=nsamp)
+
+    other_inf_dfile = autodir.lib.file_.information(
+        'test', function=other_information)
+    with autofile.validate.using('off'):
+        assert list(autodir._util.thread_map(
+            other_inf_dfile.read, [PREFIX] * 2, nworkers=2)) == (
+                [ref_inf_obj] * 2)
+    with pytest.raises(AssertionError):
+        with autofile.validate.using('deferred'):
+            list(autodir._util.thread_map(
+                other_inf_dfile.read, [PREFIX] * 2, nworkers=2))
+
+    # (and to operations run on an asyncio executor)
+    async def _read():
+        with autofile.validate.using('off'):
+            return await autodir.aio.Runner().run(other_inf_dfile.read,
+                                                  PREFIX)
+
+    assert asyncio.run(_read()) == ref_inf_obj
+
 
 def test__file__energy():
     """ test autodir.lib.file_.energy
@@ -290,6 +968,203 @@ def test__file__hessian():
     print(hess)
 
 
+def test__file__hessian_array():
+    """ test autodir.lib.file_.hessian_array
+    """
+    ref_hess = (
+        (-0.21406, 0., 0., -0.06169, 0., 0., 0.27574, 0., 0.),
+        (0., 2.05336, 0.12105, 0., -0.09598, 0.08316, 0., -1.95737, -0.20421),
+        (0., 0.12105, 0.19177, 0., -0.05579, -0.38831, 0., -0.06525, 0.19654),
+        (-0.06169, 0., 0., 0.0316, 0., 0., 0.03009, 0., 0.),
+        (0., -0.09598, -0.05579, 0., 0.12501, -0.06487, 0., -0.02902,
+         0.12066),
+        (0., 0.08316, -0.38831, 0., -0.06487, 0.44623, 0., -0.01829,
+         -0.05792),
+        (0.27574, 0., 0., 0.03009, 0., 0., -0.30583, 0., 0.),
+        (0., -1.95737, -0.06525, 0., -0.02902, -0.01829, 0., 1.9864,
+         0.08354),
+        (0., -0.20421, 0.19654, 0., 0.12066, -0.05792, 0., 0.08354,
+         -0.13862))
+
+    prefix = os.path.join(PREFIX, 'hessian_array')
+    autodir.backend.current().makedirs(prefix)
+
+    # old trees with text hessian files are read through the fallback
+    hess_dfile = autodir.lib.file_.hessian('test')
+    hess_arr_dfile = autodir.lib.file_.hessian_array('test')
+
+    assert not hess_arr_dfile.exists(prefix)
+    hess_dfile.write(ref_hess, prefix)
+    assert hess_arr_dfile.exists(prefix)
+
+    hess = hess_arr_dfile.read(prefix)
+    assert numpy.allclose(hess, ref_hess)
+
+    hess_arr_dfile.write(ref_hess, prefix)
+    assert autodir.backend.current().isfile(hess_arr_dfile.path(prefix))
+
+    hess = hess_arr_dfile.read(prefix)
+    assert isinstance(hess, numpy.ndarray) and hess.shape == (9, 9)
+    assert numpy.allclose(hess, ref_hess)
+    print(hess)
+
+    # hessians are memory-mapped, but other arrays are read into memory
+    grad_arr_dfile = autodir.lib.file_.gradient_array('test')
+    grad_arr_dfile.write(numpy.zeros((3, 3)), prefix)
+    grad = grad_arr_dfile.read(prefix)
+    assert not isinstance(grad, numpy.memmap)
+    assert not isinstance(grad.base, numpy.memmap)
+    if isinstance(autodir.backend.current(),
+                  autodir.backend.FileSystemBackend):
+        assert isinstance(hess.base, numpy.memmap)
+
+
+def test__file__cache():
+    """ test DataFile reads through an autodir.cache.ReadCache
+    """
+    prefix = os.path.join(PREFIX, 'cache')
+    autodir.backend.current().makedirs(prefix)
+
+    cache = autodir.cache.ReadCache(max_entries=2)
+    ene_dfile = autodir.lib.file_.energy('test')
+    ene_dfile.cache = cache
+
+    ene_dfile.write(-39.51, prefix)
+    assert ene_dfile.read(prefix) == -39.51
+    assert ene_dfile.read(prefix) == -39.51
+    assert cache.info()[:3] == (1, 1, 1)
+
+    # writes through the DataFile invalidate the cached value
+    ene_dfile.write(-39.54, prefix)
+    assert ene_dfile.read(prefix) == -39.54
+    assert cache.info()[:2] == (1, 2)
+
+    # so do changes made by anything else
+    autodir.backend.current().write_file(ene_dfile.path(prefix), '-40.0\n')
+    assert ene_dfile.read(prefix) == -40.0
+    assert cache.info()[:2] == (1, 3)
+
+    # the least-recently-used values are dropped to stay within budget
+    for idx in range(3):
+        dir_pth = os.path.join(prefix, str(idx))
+        autodir.backend.current().makedirs(dir_pth)
+        ene_dfile.write(float(idx), dir_pth)
+        assert ene_dfile.read(dir_pth) == float(idx)
+    assert cache.info().entries == 2
+
+    cache = autodir.cache.ReadCache(max_bytes=10)
+    cache.put('a', (0, 6), 'a')
+    cache.put('b', (0, 6), 'b')
+    cache.put('c', (0, 20), 'c')
+    assert cache.get('a', (0, 6)) == (False, None)
+    assert cache.get('b', (0, 6)) == (True, 'b')
+    assert cache.get('c', (0, 20)) == (False, None)
+    assert cache.info() == (1, 2, 1, 6)
+
+
+def test__file__instrument():
+    """ test I/O instrumentation of DataFiles and DataSeriesFiles
+    """
+    prefix = os.path.join(PREFIX, 'instrument')
+    autodir.backend.current().makedirs(prefix)
+
+    thy_leaf_dsdir = autodir.lib.dir_.theory_leaf(
+        autodir.lib.dir_.species_leaf(autodir.lib.dir_.species_trunk()))
+    ene_dsfile = autodir.model.DataSeriesFile(
+        thy_leaf_dsdir, autodir.lib.file_.energy('test'))
+    thy_specs = ('InChI=1S/CH3/h1H3', 2, 'hf', 'sto-3g', False)
+    thy_leaf_dsdir.create(prefix, thy_specs)
+
+    events = []
+
+    def _hook(name, event, seconds, nbytes):
+        assert seconds >= 0. and nbytes >= 0
+        events.append((name, event))
+
+    autofile.instrument.add_hook(_hook)
+    with autofile.instrument.collect() as report:
+        ene_dsfile.write(-39.51, prefix, thy_specs)
+        assert ene_dsfile.read(prefix, thy_specs) == -39.51
+    autofile.instrument.remove_hook(_hook)
+    assert not autofile.instrument.active()
+    print(report.table())
+
+    ene_name = ene_dsfile.file.name
+    report_dct = report.as_dict()
+    for event in ('read', 'write', 'reader', 'writer'):
+        assert report_dct[ene_name][event]['count'] == 1
+        assert (ene_name, event) in events
+    assert report_dct[ene_name]['path']['count'] == 2
+    assert (report_dct[ene_name]['read']['bytes'] ==
+            report_dct[ene_name]['write']['bytes'] > 0)
+    assert report.totals()['path']['count'] == 2
+
+    # nothing is recorded outside of the context
+    ene_dsfile.read(prefix, thy_specs)
+    assert report.as_dict() == report_dct
+
+    # series reads record their path resolution under the file name, and
+    # streamed trajectory reads record their opens
+    traj_dfile = autodir.lib.file_.trajectory('instrument')
+    idx_dfile = autodir.lib.file_.trajectory_index('instrument')
+    autodir.traj.append(traj_dfile, idx_dfile, [('H', (('H', (0., 0., 0.)),))],
+                        [-0.5], prefix)
+    with autofile.instrument.collect() as report:
+        assert list(ene_dsfile.read_many(prefix, [thy_specs])) == [-39.51]
+        assert len(list(autodir.traj.sorted_frames(
+            traj_dfile, idx_dfile, prefix))) == 1
+    report_dct = report.as_dict()
+    print(report.table())
+    assert '' not in report_dct
+    assert report_dct[ene_name]['path']['count'] == 1
+    assert report_dct[traj_dfile.name]['open']['count'] == 1
+
+
+def test__file__dedup():
+    """ test DataFile writes through an autodir.dedup.BlobStore
+    """
+    prefix = os.path.join(PREFIX, 'dedup')
+    autodir.backend.current().makedirs(prefix)
+
+    store = autodir.dedup.BlobStore(prefix)
+    inp_dfile = autodir.lib.file_.input_file('test')
+    inp_dfile.store = store
+
+    dir_pths = [os.path.join(prefix, str(idx)) for idx in range(3)]
+    for dir_pth in dir_pths:
+        autodir.backend.current().makedirs(dir_pth)
+        inp_dfile.write('<input file contents>', dir_pth)
+    assert all(inp_dfile.read(dir_pth) == '<input file contents>'
+               for dir_pth in dir_pths)
+
+    inp_dfile.write('<new input file contents>', dir_pths[0])
+    assert inp_dfile.read(dir_pths[0]) == '<new input file contents>'
+    assert inp_dfile.read(dir_pths[1]) == '<input file contents>'
+
+    with pytest.raises(FileExistsError):
+        inp_dfile.write('<input file contents>', dir_pths[1], exclusive=True)
+
+    # on the file system, the copies are links to a single blob
+    if isinstance(autodir.backend.current(),
+                  autodir.backend.FileSystemBackend):
+        blob_pth = store.blob_path('<input file contents>')
+        assert os.stat(blob_pth).st_nlink == 3
+        assert os.path.samefile(inp_dfile.path(dir_pths[1]), blob_pth)
+        assert store.collect_garbage() == 0
+        os.remove(inp_dfile.path(dir_pths[0]))
+        assert store.collect_garbage() == 1
+
+        # rewriting identical contents leaves no temporary links behind
+        inp_dfile.write('<input file contents>', dir_pths[2])
+        inp_dfile.write('<input file contents>', dir_pths[2])
+        assert not [file_name for file_name in os.listdir(dir_pths[2])
+                    if file_name.endswith('.tmp')]
+        assert os.stat(blob_pth).st_nlink == 3
+        os.remove(inp_dfile.path(dir_pths[1]))
+        os.remove(inp_dfile.path(dir_pths[2]))
+        assert store.collect_garbage() == 1
+
+
 def test__file__zmatrix():
     """ test autodir.lib.file_.zmatrix
     """
@@ -370,8 +1245,56 @@ def test__file__trajectory():
     traj_dfile.write(ref_traj, PREFIX)
     assert traj_dfile.exists(PREFIX)
 
-    # I'm not going to bother implementing a reader, since the trajectory files
-    # are for human use only -- we aren't going to use this for data storage
+    traj = traj_dfile.read(PREFIX)
+    comments, geos = zip(*traj)
+    assert list(comments) == ref_comments
+    assert all(map(automol.geom.almost_equal, geos, ref_geos))
+
+
+def test__file__trajectory_append():
+    """ test autodir.traj.append and autodir.traj.sorted_frames
+    """
+    ref_geo = (('C', (0., 0., 0.)), ('H', (0., 0., 2.)),
+               ('H', (0., 1.7, -1.)), ('H', (0., -1.7, -1.)))
+    ref_enes = (-39.51, -39.54, -39.50, -39.53)
+
+    prefix = os.path.join(PREFIX, 'trajectory_append')
+    autodir.backend.current().makedirs(prefix)
+
+    traj_dfile = autodir.lib.file_.trajectory('test')
+    idx_dfile = autodir.lib.file_.trajectory_index('test')
+
+    for ene in ref_enes:
+        comment = 'energy: {}'.format(ene)
+        autodir.traj.append(traj_dfile, idx_dfile, [(comment, ref_geo)],
+                            [ene], prefix)
+
+    traj = traj_dfile.read(prefix)
+    assert [comment for comment, _ in traj] == [
+        'energy: {}'.format(ene) for ene in ref_enes]
+
+    frames = tuple(autodir.traj.sorted_frames(traj_dfile, idx_dfile, prefix,
+                                              nframes=3))
+    assert [ene for ene, _, _ in frames] == [-39.54, -39.53, -39.51]
+    assert all(comment == 'energy: {}'.format(ene)
+               for ene, comment, _ in frames)
+    assert all(automol.geom.almost_equal(geo, ref_geo)
+               for _, _, geo in frames)
+
+    # appends go through the DataFile, so a cached value is invalidated...
+    traj_dfile.cache = autodir.cache.ReadCache()
+    assert len(traj_dfile.read(prefix)) == 4
+    autodir.traj.append(traj_dfile, idx_dfile, [('energy: -39.55', ref_geo)],
+                        [-39.55], prefix)
+    assert len(traj_dfile.read(prefix)) == 5
+    assert next(autodir.traj.sorted_frames(
+        traj_dfile, idx_dfile, prefix))[:2] == (-39.55, 'energy: -39.55')
+
+    # ...and files written through a store can't be appended to
+    traj_dfile.store = autodir.dedup.BlobStore(prefix)
+    with pytest.raises(AssertionError):
+        autodir.traj.append(traj_dfile, idx_dfile, [('x', ref_geo)], [-39.],
+                            prefix)
 
 
 def test__file__lennard_jones_epsilon():
@@ -406,12 +1329,168 @@ def test__file__lennard_jones_sigma():
     print(sig)
 
 
+def test__backend__memory():
+    """ test the in-memory storage backend, by running the tests on it
+    """
+    mem_backend = autodir.backend.MemoryBackend()
+    with autodir.backend.using(mem_backend):
+        mem_backend.makedirs(PREFIX)
+        # (the index and concurrent creation are file-system only)
+        for test_ in (test__dir__species_trunk,
+                      test__dir__species_leaf,
+                      test__dir__theory_leaf,
+                      test__dir__conformer_trunk,
+                      test__dir__conformer_leaf,
+                      test__dir__trusted,
+                      test__series_file__read_many,
+                      test__query__lowest_energy_geometries,
+                      test__scan__energy_grid,
+                      test__scan__sparse,
+                      test__export,
+                      test__aio,
+                      test__file__input_file,
+                      test__file__output_file,
+                      test__file__information,
+                      test__file__energy,
+                      test__file__geometry,
+                      test__file__gradient,
+                      test__file__hessian,
+                      test__file__hessian_array,
+                      test__file__cache,
+                      test__file__instrument,
+                      test__file__dedup,
+                      test__file__zmatrix,
+                      test__file__vmatrix,
+                      test__file__trajectory,
+                      test__file__trajectory_append,
+                      test__file__lennard_jones_epsilon,
+                      test__file__lennard_jones_sigma):
+            test_()
+
+        # the backend is per context: thread_map workers see the caller's,
+        # and concurrent threads keep their own
+        assert list(autodir._util.thread_map(
+            lambda _: autodir.backend.current(), range(4))) == (
+                [mem_backend] * 4)
+
+        barrier = threading.Barrier(2)
+        seen = {}
+
+        def _use_own_backend(key):
+            with autodir.backend.using(autodir.backend.MemoryBackend()) as bk:
+                barrier.wait()
+                seen[key] = autodir.backend.current() is bk
+                barrier.wait()
+
+        threads = [threading.Thread(target=_use_own_backend, args=(key,))
+                   for key in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert seen == {0: True, 1: True}
+        assert autodir.backend.current() is mem_backend
+
+    assert isinstance(autodir.backend.current(),
+                      autodir.backend.FileSystemBackend)
+    assert mem_backend.isfile(autodir.lib.file_.energy('test').path(PREFIX))
+
+
+def test__backend__archive():
+    """ test the single-file archive backend
+    """
+    prefix = os.path.join(PREFIX, 'archive')
+    archive_pth = os.path.join(PREFIX, 'archive.sqlite')
+    os.mkdir(prefix)
+
+    spc_trunk_dsdir = autodir.lib.dir_.species_trunk()
+    spc_leaf_dsdir = autodir.lib.dir_.species_leaf(spc_trunk_dsdir)
+    thy_leaf_dsdir = autodir.lib.dir_.theory_leaf(spc_leaf_dsdir)
+    cnf_trunk_dsdir = autodir.lib.dir_.conformer_trunk(thy_leaf_dsdir)
+    cnf_leaf_dsdir = autodir.lib.dir_.conformer_leaf(cnf_trunk_dsdir)
+    ene_dsfile = autodir.model.DataSeriesFile(
+        cnf_leaf_dsdir, autodir.lib.file_.energy('test'))
+    hess_dsfile = autodir.model.DataSeriesFile(
+        cnf_leaf_dsdir, autodir.lib.file_.hessian_array('test'))
+
+    thy_specs = ('InChI=1S/CH3/h1H3', 2, 'hf', 'sto-3g', False)
+    ref_enes = (-39.51, -39.54, -39.50)
+    ref_hess = numpy.eye(12)
+    specs_lst = tuple(thy_specs + (autodir.lib.generate_new_conformer_id(),)
+                      for _ in ref_enes)
+    for specs, ene in zip(specs_lst, ref_enes):
+        cnf_leaf_dsdir.create(prefix, specs)
+        ene_dsfile.write(ene, prefix, specs)
+        hess_dsfile.write(ref_hess, prefix, specs)
+
+    ref_cnf_specs_lst = cnf_leaf_dsdir.existing(prefix, thy_specs)
+    assert autodir.archive.pack(prefix, archive_pth) == 11
+    shutil.rmtree(prefix)
+
+    arc_backend = autodir.archive.Backend(archive_pth, prefix)
+    with autodir.backend.using(arc_backend):
+        assert spc_leaf_dsdir.existing(prefix) == (thy_specs[:2],)
+        assert (cnf_leaf_dsdir.existing(prefix, thy_specs)
+                == ref_cnf_specs_lst)
+        assert numpy.allclose(
+            tuple(ene_dsfile.read_many(prefix, specs_lst, nworkers=2)),
+            ref_enes)
+        assert numpy.allclose(hess_dsfile.read(prefix, specs_lst[0]),
+                              ref_hess)
+        ene_specs_lst = autodir.query.lowest_energies(
+            ene_dsfile, prefix, thy_specs, nlowest=2)
+        assert [ene for ene, _ in ene_specs_lst] == [-39.54, -39.51]
+
+        with pytest.raises(ValueError):
+            ene_dsfile.write(-39.60, prefix, specs_lst[0])
+    arc_backend.close()
+    assert not os.path.exists(prefix)
+
+    # archives opened for writing can be added to
+    arc_backend = autodir.archive.Backend(archive_pth, prefix, writable=True)
+    with autodir.backend.using(arc_backend):
+        specs = thy_specs + (autodir.lib.generate_new_conformer_id(),)
+        cnf_leaf_dsdir.create(prefix, specs)
+        ene_dsfile.write(-39.60, prefix, specs)
+        ene_specs_lst = autodir.query.lowest_energies(
+            ene_dsfile, prefix, thy_specs, nlowest=2, cache=True)
+        assert ene_specs_lst == ((-39.60, specs[-1:]),
+                                 (-39.54, ene_specs_lst[1][1]))
+    arc_backend.close()
+
+
+def test__lazy_imports():
+    """ test that heavy dependencies aren't imported with the packages
+    """
+    heavy_modules = ('numpy', 'automol', 'autoparse', 'yaml', 'elstruct')
+    root_pth = os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))))
+    code = ("import sys, autodir.model, autodir.lib, autodir.query; "
+            "print(sorted(set(sys.modules) & set({!r})))"
+            .format(heavy_modules))
+    out = subprocess.check_output([sys.executable, '-c', code], cwd=root_pth,
+                                  universal_newlines=True)
+    assert out.strip() == '[]'
+
+
 if __name__ == '__main__':
     test__dir__species_trunk()
     test__dir__species_leaf()
     test__dir__theory_leaf()
     test__dir__conformer_trunk()
     test__dir__conformer_leaf()
+    test__dir__trusted()
+    test__dir__index()
+    test__dir__index_backend()
+    test__dir__create_concurrently()
+    test__series_file__read_many()
+    test__query__lowest_energy_geometries()
+    test__scan__energy_grid()
+    test__scan__sparse()
+    test__export()
+    test__export__many_arrays()
+    test__export__parquet()
+    test__aio()
     test__file__input_file()
     test__file__output_file()
     test__file__information()
@@ -419,8 +1498,16 @@ if __name__ == '__main__':
     test__file__geometry()
     test__file__gradient()
     test__file__hessian()
+    test__file__hessian_array()
+    test__file__cache()
+    test__file__instrument()
+    test__file__dedup()
     test__file__zmatrix()
     test__file__vmatrix()
     test__file__trajectory()
+    test__file__trajectory_append()
     test__file__lennard_jones_epsilon()
     test__file__lennard_jones_sigma()
+    test__backend__memory()
+    test__backend__archive()
+    test__lazy_imports()
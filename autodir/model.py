@@ -1,14 +1,21 @@
 """ defines the filesystem model for autodir
 """
 import os
-import glob
-import autofile
+import collections
+from autofile import instrument
+from autodir import index
+from autodir import backend
+from autodir._util import thread_map as _thread_map
 
 
-class DataFile():
+# each storage option (fsync, cache, store, mmap) is an independent,
+# optional setting, chosen per datatype by the autodir.lib.file_ constructors
+class DataFile():  # pylint: disable=too-many-instance-attributes
     """ file manager for a given datatype """
 
-    def __init__(self, name, writer_=(lambda _: _), reader_=(lambda _: _)):
+    def __init__(self, name, writer_=(lambda _: _), reader_=(lambda _: _),
+                 array=False, fallback=None, fsync=False, cache=None,
+                 store=None, mmap=False):
         """
         :param name: the file name
         :type name: str
@@ -16,10 +23,36 @@ class DataFile():
         :type writer_: callable[object->str]
         :param reader_: reads data from a string
         :type reader_: callable[str->object]
+        :param array: store the data as a binary numpy array, rather than a
+            string? (in which case `writer_` and `reader_` write to and read
+            from arrays)
+        :type array: bool
+        :param fallback: a DataFile to read from when this one doesn't exist,
+            such as an older format for the same data
+        :type fallback: DataFile
+        :param fsync: sync each write to disk before returning? (for many
+            writes, use `autofile.batch_commit()` instead)
+        :type fsync: bool
+        :param cache: a cache for values read from this file, which may be
+            shared with other DataFiles
+        :type cache: autodir.cache.ReadCache
+        :param store: a content-addressed store to write string data through,
+            so that identical files share their contents
+        :type store: autodir.dedup.BlobStore
+        :param mmap: memory-map array data on reads, rather than loading it?
+            (each map holds a file descriptor open while the value is alive,
+            so this is only worth it for large arrays read a few at a time)
+        :type mmap: bool
         """
         self.name = name
         self.writer_ = writer_
         self.reader_ = reader_
+        self.array = array
+        self.fallback = fallback
+        self.fsync = fsync
+        self.cache = cache
+        self.store = store
+        self.mmap = mmap
 
     def path(self, dir_pth):
         """ file path
@@ -30,25 +63,108 @@ class DataFile():
         """ does this file exist?
         """
         pth = self.path(dir_pth)
-        return os.path.isfile(pth)
+        with instrument.labeled(self.name):
+            return (backend.current().isfile(pth) or
+                    (self.fallback is not None and
+                     self.fallback.exists(dir_pth)))
 
-    def write(self, val, dir_pth):
+    def write(self, val, dir_pth, exclusive=False):
         """ write data to this file
+
+        (the file is replaced atomically, so an interrupted write leaves the
+        previous contents in place)
+
+        :param exclusive: raise FileExistsError if the file already exists,
+            rather than replacing it
+        :type exclusive: bool
         """
-        assert os.path.exists(dir_pth)
-        pth = self.path(dir_pth)
-        val_str = self.writer_(val)
-        autofile.write_file(pth, val_str)
+        with instrument.labeled(self.name):
+            bkend = backend.current()
+            assert bkend.isdir(dir_pth)
+            pth = self.path(dir_pth)
+            with instrument.timed('writer', cpu=True):
+                val_out = self.writer_(val)
+            if self.array:
+                bkend.write_array_file(pth, val_out, fsync=self.fsync,
+                                       exclusive=exclusive)
+            elif self.store is not None:
+                self.store.write(pth, val_out, fsync=self.fsync,
+                                 exclusive=exclusive)
+            else:
+                bkend.write_file(pth, val_out, fsync=self.fsync,
+                                 exclusive=exclusive)
+            self._invalidate(bkend, pth)
+
+    def append(self, val, dir_pth, newline=False):
+        """ append data to this file, creating it if it doesn't exist
+
+        (only for string data whose writer output can be concatenated, such as
+        trajectories)
+
+        :param newline: write the data on lines of its own? (starting a new
+            line if the file doesn't end with one, and ending the data with
+            one)
+        :type newline: bool
+        :returns: the byte offset at which the data was written
+        """
+        with instrument.labeled(self.name):
+            bkend = backend.current()
+            assert bkend.isdir(dir_pth) and not self.array
+            # files written through a store share their contents, so they
+            # can't be appended to
+            assert self.store is None
+            pth = self.path(dir_pth)
+            with instrument.timed('writer', cpu=True):
+                val_str = self.writer_(val)
+            sep = ''
+            if newline:
+                val_str = val_str if val_str.endswith('\n') else val_str + '\n'
+                sep = '' if _ends_with_newline(bkend, pth) else '\n'
+            offset = bkend.append_file(pth, sep + val_str) + len(sep)
+            self._invalidate(bkend, pth)
+        return offset
 
     def read(self, dir_pth):
         """ read data from this file
+
+        (with a cache, the value is only read if the file has changed since it
+        was last cached)
         """
+        with instrument.labeled(self.name):
+            return self._read_at(dir_pth)
+
+    # helpers
+    def _read_at(self, dir_pth):
+        bkend = backend.current()
         assert self.exists(dir_pth)
         pth = self.path(dir_pth)
-        val_str = autofile.read_file(pth)
-        val = self.reader_(val_str)
+        if not bkend.isfile(pth):
+            return self.fallback.read(dir_pth)
+
+        if self.cache is None:
+            return self._read(bkend, pth)
+
+        key = (bkend, os.path.abspath(pth))
+        version = bkend.version(pth)
+        hit, val = self.cache.get(key, version)
+        if not hit:
+            val = self._read(bkend, pth)
+            self.cache.put(key, version, val)
         return val
 
+    def _read(self, bkend, pth):
+        if self.array:
+            val_in = bkend.read_array_file(pth, mmap=self.mmap)
+        else:
+            val_in = bkend.read_file(pth)
+        with instrument.timed('reader', cpu=True):
+            val = self.reader_(val_in)
+        return val
+
+    def _invalidate(self, bkend, pth):
+        if self.cache is not None:
+            self.cache.invalidate((bkend, os.path.abspath(pth)))
+
 
 class DataSeriesDir():
     """ directory manager mapping specifier values to a directory series
@@ -71,88 +187,145 @@ class DataSeriesDir():
     def path(self, prefix, specs=()):
         """ absolute directory path
         """
-        if self.source is None:
-            pfx = prefix
-        else:
-            source_specs = self._source_specifiers(specs)
-            specs = self._self_specifiers(specs)
-            pfx = self.source.path(prefix, source_specs)
-        pfx = os.path.abspath(pfx)
+        with instrument.timed('path'):
+            return _path(self, prefix, specs)
 
-        assert len(specs) == self.nspecs
+    def paths(self, prefix, specs_iter):
+        """ absolute directory paths for a sequence of specifiers
 
-        pth = self.map_(specs)
-        assert _path_is_relative(pth)
-        assert _path_has_depth(pth, self.depth)
-        return os.path.join(pfx, pth)
+        The source path is resolved once for each distinct set of source
+        specifiers, rather than once per path.
+        """
+        src_pth_dct = {}
+        for specs in specs_iter:
+            with instrument.timed('path'):
+                source_specs = tuple(_source_specifiers(self, specs))
+                if source_specs not in src_pth_dct:
+                    src_pth_dct[source_specs] = (
+                        os.path.abspath(prefix) if self.source is None else
+                        _path(self.source, prefix, source_specs))
+
+                pfx = src_pth_dct[source_specs]
+                pth = os.path.join(
+                    pfx, _segment_path(self, _self_specifiers(self, specs)))
+            yield pth
 
     def exists(self, prefix, specs=()):
         """ does this directory exist?
         """
         pth = self.path(prefix, specs)
-        return os.path.isdir(pth)
+        return backend.current().isdir(pth)
 
-    def create(self, prefix, specs=()):
+    def create(self, prefix, specs=(), lock=False):
         """ create a directory at this prefix
-        """
-        # recursively create starting from the first source directory
-        if self.source is not None:
-            source_specs = self._source_specifiers(specs)
-            self.source.create(prefix, source_specs)
-
-        # create this directory in the chain, if it doesn't already exist
-        assert os.path.isdir(prefix)
-        if not self.exists(prefix, specs):
-            pth = self.path(prefix, specs)
-            os.makedirs(pth)
 
-            if self.spec_dfile is not None:
-                specs = self._self_specifiers(specs)
-                self.spec_dfile.write(specs, pth)
+        This is idempotent and safe to call concurrently on the same
+        directories from many processes.
 
-    def existing(self, prefix, source_specs=()):
+        :param lock: hold an advisory lock on each source directory while the
+            layer below it is being created
+        :type lock: bool
+        """
+        entries = [] if index.usable(prefix) else None
+        listings = []
+        created = _create(self, prefix, specs, lock, entries, listings)
+        # (entries already in the index are left alone, and those missing --
+        # say, because a process died after creating them -- are filled in;
+        # if there are none, the index isn't written to at all)
+        if entries and (created or not index.contains(
+                prefix, [(pth, depth) for pth, depth, _ in entries])):
+            index.add(prefix, entries, listings)
+
+    def existing(self, prefix, source_specs=(), nworkers=None):
         """ return the list of specifiers
+
+        :param nworkers: if set, scan the tree and read the specifier files on
+            a thread pool with this many workers
+        :type nworkers: int
         """
         if self.spec_dfile is None:
             raise ValueError("This function does not work "
                              "without a specifier DataFile")
 
-        pths = self.existing_paths(prefix, source_specs)
-        specs_lst = tuple(sorted(self.spec_dfile.read(pth) for pth in pths))
+        if index.usable(prefix):
+            pfx = self._source_path(prefix, source_specs)
+            if index.is_listed(prefix, pfx, self.depth):
+                return index.specifiers(prefix, pfx, self.depth)
+
+        pths = self.existing_paths(prefix, source_specs, nworkers=nworkers)
+        specs_lst = tuple(sorted(_thread_map(self.spec_dfile.read, pths,
+                                             nworkers=nworkers)))
         return specs_lst
 
-    def existing_paths(self, prefix, source_specs=()):
+    def existing_paths(self, prefix, source_specs=(), nworkers=None):
         """ specifiers for all existing paths at this prefix/source directory
+
+        :param nworkers: if set, scan the tree on a thread pool with this many
+            workers
+        :type nworkers: int
         """
-        if self.source is None:
-            pfx = prefix
-        else:
-            pfx = self.source.path(prefix, source_specs)
+        pfx = self._source_path(prefix, source_specs)
 
-        pfx = os.path.abspath(pfx)
-        assert os.path.isdir(pfx)
+        if index.usable(prefix) and index.is_listed(prefix, pfx, self.depth):
+            return index.paths(prefix, pfx, self.depth)
 
-        pth_pattern = os.path.join(pfx, *('*' * self.depth))
-        pths = filter(os.path.isdir, glob.glob(pth_pattern))
-        pths = tuple(os.path.join(pfx, pth) for pth in pths)
-        return pths
+        return _existing_paths_at(pfx, self.depth, nworkers=nworkers)
 
-    # helpers
-    def _self_specifiers(self, specs):
-        """ specifiers for this DataSeriesDir
+    def rebuild_index(self, prefix):
+        """ (re)build the index for this directory and its sources
+
+        Adds every existing directory along the source chain to the index at
+        this prefix, creating it if necessary, and drops entries for
+        directories that no longer exist.
+        """
+        assert isinstance(backend.current(), backend.FileSystemBackend)
+        index.create(prefix)
+        stale = tuple((pth, depth) for pth, depth, _ in index.entries(prefix)
+                      if not backend.current().isdir(pth))
+        index.remove(prefix, stale)
+
+        # the listings of each directory in the chain are now complete
+        dsdirs = []
+        dsdir = self
+        while dsdir is not None:
+            dsdirs.append(dsdir)
+            dsdir = dsdir.source
+        listings = [(os.path.abspath(prefix), dsdir.depth) for dsdir in dsdirs
+                    if dsdir.source is None and dsdir.spec_dfile is not None]
+        entries = []
+        for dsdir, pth, specs in _walk(self, prefix):
+            entries.append((pth, dsdir.depth, specs))
+            listings.extend((pth, child.depth) for child in dsdirs
+                            if child.source is dsdir and
+                            child.spec_dfile is not None)
+        index.update(prefix, entries, listings)
+
+    def verify_index(self, prefix):
+        """ is the index at this prefix consistent with the directory tree?
         """
-        nspecs = len(specs)
-        assert nspecs >= self.nspecs
-        source_nspecs = nspecs - self.nspecs
-        return specs[source_nspecs:]
+        if not index.usable(prefix):
+            return False
 
-    def _source_specifiers(self, specs):
-        """ specifiers for the source DataSeriesDir, if there is one
+        idx_entries = index.entries(prefix)
+        idx_keys = set(index.entry_key(*entry) for entry in idx_entries)
+        dir_keys = set(index.entry_key(pth, dsdir.depth, specs)
+                       for dsdir, pth, specs in _walk(self, prefix))
+        bkend = backend.current()
+        return (all(bkend.isdir(pth) for pth, _, _ in idx_entries) and
+                dir_keys <= idx_keys)
+
+    # helpers
+    def _source_path(self, prefix, source_specs):
+        """ absolute path to the source directory for this DataSeriesDir
         """
-        nspecs = len(specs)
-        assert nspecs >= self.nspecs
-        source_nspecs = nspecs - self.nspecs
-        return specs[:source_nspecs]
+        if self.source is None:
+            pfx = prefix
+        else:
+            pfx = self.source.path(prefix, source_specs)
+
+        pfx = os.path.abspath(pfx)
+        assert backend.current().isdir(pfx)
+        return pfx
 
 
 class DataSeriesFile():
@@ -166,29 +339,245 @@ class DataSeriesFile():
     def path(self, prefix, specs=()):
         """ absolute file path
         """
-        dir_pth = self.dir.path(prefix, specs)
+        dir_pth = self._dir_path(prefix, specs)
         return self.file.path(dir_pth)
 
     def exists(self, prefix, specs=()):
         """ does this file exist?
         """
-        dir_pth = self.dir.path(prefix, specs)
+        dir_pth = self._dir_path(prefix, specs)
         return self.file.exists(dir_pth)
 
     def write(self, val, prefix, specs=()):
         """ write data to this file
         """
-        dir_pth = self.dir.path(prefix, specs)
+        dir_pth = self._dir_path(prefix, specs)
         self.file.write(val, dir_pth)
 
     def read(self, prefix, specs=()):
         """ read data from this file
         """
-        dir_pth = self.dir.path(prefix, specs)
+        dir_pth = self._dir_path(prefix, specs)
         return self.file.read(dir_pth)
 
+    def write_many(self, vals, prefix, specs_iter, nworkers=None):
+        """ write data to this file for a sequence of specifiers
+
+        :param vals: the values to write, one per set of specifiers
+        :param nworkers: if set, write on a thread pool with this many workers
+        :type nworkers: int
+        """
+        vals = tuple(vals)
+        specs_lst = tuple(specs_iter)
+        assert len(vals) == len(specs_lst)
+        dir_pths = self._dir_paths(prefix, specs_lst)
+        results = _thread_map(self.file.write, vals, dir_pths,
+                              nworkers=nworkers)
+        collections.deque(results, maxlen=0)
+
+    def read_many(self, prefix, specs_iter, nworkers=None):
+        """ read data from this file for a sequence of specifiers
+
+        Values are returned lazily, in the order of the specifiers, so the
+        whole series is never held in memory at once.
+
+        :param nworkers: if set, read on a thread pool with this many workers
+            (useful for network filesystems)
+        :type nworkers: int
+        :rtype: iterator
+        """
+        dir_pths = self._dir_paths(prefix, specs_iter)
+        return _thread_map(self.file.read, dir_pths, nworkers=nworkers)
+
+    # helpers
+    def _dir_path(self, prefix, specs):
+        """ directory path (with its resolution recorded under the file name)
+        """
+        with instrument.labeled(self.file.name):
+            return self.dir.path(prefix, specs)
+
+    def _dir_paths(self, prefix, specs_iter):
+        """ directory paths, resolved lazily (with their resolution recorded
+        under the file name)
+        """
+        dir_pths = self.dir.paths(prefix, specs_iter)
+        while True:
+            with instrument.labeled(self.file.name):
+                dir_pth = next(dir_pths, None)
+            if dir_pth is None:
+                return
+            yield dir_pth
+
 
 # helpers
+def _path(dsdir, prefix, specs):
+    """ absolute directory path for a DataSeriesDir (untimed)
+    """
+    if dsdir.source is None:
+        pfx = prefix
+    else:
+        source_specs = _source_specifiers(dsdir, specs)
+        specs = _self_specifiers(dsdir, specs)
+        pfx = _path(dsdir.source, prefix, source_specs)
+    pfx = os.path.abspath(pfx)
+
+    pth = _segment_path(dsdir, specs)
+    return os.path.join(pfx, pth)
+
+
+def _create(dsdir, prefix, specs, lock, entries, listings):
+    """ create a DataSeriesDir's directory and its sources, if missing
+
+    :param entries: a list to add the index entries for the directories
+        to (or None, if there is no index)
+    :param listings: a list to add the listings which are complete to
+    :returns: was this directory created (rather than already there)?
+    """
+    # recursively create starting from the first source directory
+    source_created = False
+    if dsdir.source is not None:
+        source_specs = _source_specifiers(dsdir, specs)
+        source_created = _create(dsdir.source, prefix, source_specs, lock,
+                                 entries, listings)
+
+    # create this directory in the chain, if it doesn't already exist
+    bkend = backend.current()
+    assert bkend.isdir(prefix)
+    pth = dsdir.path(prefix, specs)
+    if lock:
+        with bkend.lock(_source_path_of(pth, dsdir.depth)):
+            created = _create_at(dsdir, pth, specs)
+    else:
+        created = _create_at(dsdir, pth, specs)
+
+    if entries is not None:
+        self_specs = None
+        if dsdir.spec_dfile is not None:
+            # (as read back from the specifier file)
+            self_specs = dsdir.spec_dfile.reader_(
+                dsdir.spec_dfile.writer_(_self_specifiers(dsdir, specs)))
+            # a new source directory has nothing else in it
+            if source_created:
+                listings.append((_source_path_of(pth, dsdir.depth),
+                                 dsdir.depth))
+        entries.append((pth, dsdir.depth, self_specs))
+
+    return created
+
+
+def _create_at(dsdir, pth, specs):
+    """ create a DataSeriesDir's directory and its specifier file, if missing
+
+    :returns: was the directory created (rather than already there)?
+    """
+    bkend = backend.current()
+    created = not bkend.isdir(pth)
+    if created:
+        bkend.makedirs(pth)
+
+    if dsdir.spec_dfile is not None:
+        self_specs = _self_specifiers(dsdir, specs)
+        if not dsdir.spec_dfile.exists(pth):
+            try:
+                dsdir.spec_dfile.write(self_specs, pth, exclusive=True)
+            except FileExistsError:
+                pass
+
+    return created
+
+
+def _walk(dsdir, prefix):
+    """ (DataSeriesDir, path, specifiers) for every existing directory along
+    a DataSeriesDir's source chain, found by scanning the directory tree
+    """
+    if dsdir.source is None:
+        pfxs = [os.path.abspath(prefix)]
+    else:
+        pfxs = []
+        for src_dsdir, pth, specs in _walk(dsdir.source, prefix):
+            yield (src_dsdir, pth, specs)
+            if src_dsdir is dsdir.source:
+                pfxs.append(pth)
+
+    for pfx in pfxs:
+        pths = _existing_paths_at(pfx, dsdir.depth)
+        # (a trunk may share its source with other directories)
+        if not dsdir.nspecs:
+            pths = [pth for pth in pths
+                    if pth == os.path.join(pfx, _segment_path(dsdir, ()))]
+        for pth in pths:
+            specs = (None if dsdir.spec_dfile is None else
+                     dsdir.spec_dfile.read(pth))
+            yield (dsdir, pth, specs)
+
+
+def _segment_path(dsdir, specs):
+    """ relative path to a DataSeriesDir's segment of the chain
+    """
+    assert len(specs) == dsdir.nspecs
+
+    pth = dsdir.map_(specs)
+    assert _path_is_relative(pth)
+    assert _path_has_depth(pth, dsdir.depth)
+    return pth
+
+
+def _self_specifiers(dsdir, specs):
+    """ specifiers for a DataSeriesDir itself
+    """
+    nspecs = len(specs)
+    assert nspecs >= dsdir.nspecs
+    source_nspecs = nspecs - dsdir.nspecs
+    return specs[source_nspecs:]
+
+
+def _source_specifiers(dsdir, specs):
+    """ specifiers for a DataSeriesDir's source, if there is one
+    """
+    nspecs = len(specs)
+    assert nspecs >= dsdir.nspecs
+    source_nspecs = nspecs - dsdir.nspecs
+    return specs[:source_nspecs]
+
+
+def _ends_with_newline(bkend, pth):
+    """ does this file end with a newline? (true if it is missing or empty)
+    """
+    if not bkend.isfile(pth):
+        return True
+
+    with bkend.open(pth, 'rb') as file_obj:
+        if not file_obj.seek(0, os.SEEK_END):
+            return True
+        file_obj.seek(-1, os.SEEK_END)
+        return file_obj.read(1) == b'\n'
+
+
+def _source_path_of(pth, depth):
+    """ the source directory path for a directory of a given depth
+    """
+    for _ in range(depth):
+        pth = os.path.dirname(pth)
+    return pth
+
+
+def _existing_paths_at(pfx, depth, nworkers=None):
+    """ existing directory paths of a given depth below a prefix
+
+    The tree is scanned one level at a time (on the file system, with
+    `os.scandir`, which reuses the directory entry types instead of stat-ing
+    each path). With `nworkers`, the directories at each level are scanned
+    concurrently.
+    """
+    bkend = backend.current()
+    pths = [pfx]
+    for _ in range(depth):
+        pths = [pth for sub_pths in _thread_map(bkend.subdirectories, pths,
+                                                nworkers=nworkers)
+                for pth in sub_pths]
+    return tuple(sorted(pths))
+
+
 def _path_is_relative(pth):
     """ is this a relative path?
     """
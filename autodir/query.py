@@ -0,0 +1,168 @@
+""" queries over the data in a directory series
+
+For example, the lowest-energy conformers at a given level of theory:
+
+    cnf_leaf_dsdir = autodir.lib.dir_.conformer_leaf(...)
+    ene_dsfile = model.DataSeriesFile(cnf_leaf_dsdir, file_.energy('geom'))
+    geo_dsfile = model.DataSeriesFile(cnf_leaf_dsdir, file_.geometry('geom'))
+    lowest_energy_geometries(ene_dsfile, geo_dsfile, prefix, thy_specs, 5)
+"""
+import os
+import heapq
+from autodir import backend
+from autodir import cache as _cache
+from autodir.lib import file_
+from autodir._util import thread_map as _thread_map
+
+ENERGY_COLUMN_FILE_PREFIX = 'energies'
+
+_ENERGY_COLUMN_CACHE = _cache.ReadCache(max_entries=64)
+
+
+def energies(ene_dsfile, prefix, source_specs=(), nworkers=None):
+    """ (energy, specifiers) pairs for each directory with an energy file
+
+    The energies are streamed, rather than read all at once.
+
+    :param ene_dsfile: the energy DataSeriesFile
+    :param source_specs: specifiers for the source directory to search
+    :param nworkers: if set, read on a thread pool with this many workers
+    :rtype: iterator
+    """
+    source_specs = tuple(source_specs)
+    specs_lst = tuple(
+        specs for specs in ene_dsfile.dir.existing(prefix, source_specs,
+                                                   nworkers=nworkers)
+        if ene_dsfile.exists(prefix, source_specs + specs))
+    enes = ene_dsfile.read_many(
+        prefix, (source_specs + specs for specs in specs_lst),
+        nworkers=nworkers)
+    return zip(enes, specs_lst)
+
+
+def lowest_energies(ene_dsfile, prefix, source_specs=(), nlowest=1,
+                    cache=False, nworkers=None):
+    """ the lowest (energy, specifiers) pairs, in order of increasing energy
+
+    :param nlowest: the number of pairs to return
+    :param cache: use the cached energy column in the source directory (see
+        `energy_column()`), which is kept sorted in memory, so that repeated
+        queries only slice it
+    """
+    if cache:
+        return energy_column(ene_dsfile, prefix, source_specs,
+                             nworkers=nworkers)[:nlowest]
+
+    ene_specs_iter = energies(ene_dsfile, prefix, source_specs,
+                              nworkers=nworkers)
+    return tuple(heapq.nsmallest(nlowest, ene_specs_iter))
+
+
+def lowest_energy_geometries(ene_dsfile, geo_dsfile, prefix, source_specs=(),
+                             nlowest=1, cache=False, nworkers=None):
+    """ the lowest (energy, specifiers, geometry) triples, in order of
+    increasing energy
+
+    Geometries are only read for the selected entries.
+    """
+    source_specs = tuple(source_specs)
+    ene_specs_lst = lowest_energies(ene_dsfile, prefix, source_specs,
+                                    nlowest=nlowest, cache=cache,
+                                    nworkers=nworkers)
+    geos = geo_dsfile.read_many(
+        prefix, (source_specs + specs for _, specs in ene_specs_lst),
+        nworkers=nworkers)
+    return tuple((ene, specs, geo)
+                 for (ene, specs), geo in zip(ene_specs_lst, geos))
+
+
+def energy_column(ene_dsfile, prefix, source_specs=(), nworkers=None):
+    """ all (energy, specifiers) pairs, sorted, from the cached energy column
+
+    The column is stored in the source directory, built by searching the tree
+    if there isn't one, and kept up to date by `write_energy()`. Reads are
+    cached in memory, sorted, until the column file changes. Directories
+    created (or energies written) other than through `write_energy()`, and
+    directories removed, aren't picked up -- call `update_energy_column()`
+    after doing that.
+    """
+    src_pth = _source_path(ene_dsfile, prefix, source_specs)
+    col_dfile = _energy_column()
+    if not col_dfile.exists(src_pth):
+        return update_energy_column(ene_dsfile, prefix, source_specs,
+                                    nworkers=nworkers)
+    return col_dfile.read(src_pth)
+
+
+def update_energy_column(ene_dsfile, prefix, source_specs=(), nworkers=None):
+    """ rebuild the cached energy column in the source directory from the
+    directory tree
+
+    :returns: all (energy, specifiers) pairs, sorted
+    """
+    source_specs = tuple(source_specs)
+    src_pth = _source_path(ene_dsfile, prefix, source_specs)
+    dir_pths = tuple(
+        pth for pth in ene_dsfile.dir.existing_paths(prefix, source_specs,
+                                                     nworkers=nworkers)
+        if ene_dsfile.file.exists(pth))
+    entries = _thread_map(_read_energy_entry, [ene_dsfile] * len(dir_pths),
+                          dir_pths, nworkers=nworkers)
+
+    col = tuple((os.path.relpath(pth, src_pth), ene, specs)
+                for pth, (ene, specs) in zip(dir_pths, entries))
+    if backend.current().isdir(src_pth):
+        _energy_column().write(col, src_pth)
+    return tuple(sorted((ene, specs) for _, ene, specs in col))
+
+
+def write_energy(ene_dsfile, ene, prefix, specs):
+    """ write an energy, and record it in the cached energy column of the
+    source directory, if there is one
+    """
+    specs = tuple(specs)
+    dsdir = ene_dsfile.dir
+    source_specs = specs[:len(specs) - dsdir.nspecs]
+    ene_dsfile.write(ene, prefix, specs)
+
+    src_pth = _source_path(ene_dsfile, prefix, source_specs)
+    col_dfile = _energy_column()
+    if col_dfile.exists(src_pth):
+        dir_pth = dsdir.path(prefix, specs)
+        # (the specifiers are recorded as they would be read back)
+        seg_specs = dsdir.spec_dfile.reader_(
+            dsdir.spec_dfile.writer_(list(specs[len(source_specs):])))
+        col_dfile.append(
+            [(os.path.relpath(dir_pth, src_pth), ene, seg_specs)], src_pth)
+
+
+# helpers
+def _source_path(ene_dsfile, prefix, source_specs):
+    dsdir = ene_dsfile.dir
+    return (os.path.abspath(prefix) if dsdir.source is None else
+            dsdir.source.path(prefix, source_specs))
+
+
+def _energy_column():
+    """ the energy column DataFile, read (and cached) as sorted (energy,
+    specifiers) pairs
+    """
+    col_dfile = file_.energy_column(ENERGY_COLUMN_FILE_PREFIX)
+    col_dfile.reader_ = _sorted_energy_column_reader(col_dfile.reader_)
+    col_dfile.cache = _ENERGY_COLUMN_CACHE
+    return col_dfile
+
+
+def _sorted_energy_column_reader(reader_):
+    def _read(col_str):
+        # (later entries for a directory replace earlier ones)
+        entry_dct = {name: (ene, specs) for name, ene, specs
+                     in reader_(col_str)}
+        return tuple(sorted(entry_dct.values()))
+    return _read
+
+
+def _read_energy_entry(ene_dsfile, pth):
+    ene = ene_dsfile.file.read(pth)
+    specs = ene_dsfile.dir.spec_dfile.read(pth)
+    return (ene, tuple(specs))
@@ -0,0 +1,203 @@
+""" dense arrays of data over scan grids
+
+A scan over coordinates `tors_dct` ({coordinate name: number of points})
+stores each grid point in its own leaf directory. The energies over the whole
+grid are read at once, on a thread pool, into an array with one axis per
+coordinate (in order of the sorted names) and NaN at the missing points:
+
+    scn_trunk_dsdir = autodir.lib.dir_.scan_trunk(thy_leaf_dsdir)
+    scn_branch_dsdir = autodir.lib.dir_.scan_branch(scn_trunk_dsdir)
+    scn_leaf_dsdir = autodir.lib.dir_.scan_leaf(scn_branch_dsdir)
+    ene_dsfile = model.DataSeriesFile(scn_leaf_dsdir, file_.energy('scan'))
+    enes = energy_grid(ene_dsfile, prefix, tors_dct, thy_specs, nworkers=16)
+
+The leaf specifiers are the source specifiers, followed by the (sorted)
+coordinate names and the grid indices of the point.
+
+Sparse or adaptively refined scans name their points by coordinate values
+instead, with `autodir.lib.dir_.sparse_scan_leaf()`. Their points are
+recorded in an index file in the scan directory as they are created, so they
+can be listed without searching the tree:
+
+    scn_leaf_dsdir = autodir.lib.dir_.sparse_scan_leaf(scn_branch_dsdir)
+    create_point(scn_leaf_dsdir, prefix, thy_specs + (tors_names, vals))
+    for vals in points(scn_leaf_dsdir, prefix, thy_specs + (tors_names,)):
+        ...
+"""
+import os
+import itertools
+import autofile
+from autofile._util import lazy_import as _lazy_import
+from autodir import backend
+from autodir._util import thread_map as _thread_map
+from autodir.lib import file_
+
+numpy = _lazy_import('numpy')
+
+POINT_INDEX_FILE_PREFIX = 'points'
+
+
+def grid_shape(tors_dct):
+    """ the shape of the scan grid, in order of the sorted coordinate names
+    """
+    return tuple(tors_dct[name] for name in sorted(tors_dct))
+
+
+def grid_indices(tors_dct):
+    """ the grid indices of each point on the scan grid, in order
+    """
+    return itertools.product(*map(range, grid_shape(tors_dct)))
+
+
+def grid_specifiers(tors_dct, source_specs=()):
+    """ the leaf specifiers of each point on the scan grid, in order
+    """
+    source_specs = tuple(source_specs) + (tuple(sorted(tors_dct)),)
+    return (source_specs + (idxs,) for idxs in grid_indices(tors_dct))
+
+
+def energy_grid(ene_dsfile, prefix, tors_dct, source_specs=(), cache=False,
+                nworkers=None):
+    """ the energies over the scan grid, as an array with NaN at the missing
+    points
+
+    :param ene_dsfile: the energy DataSeriesFile, on the scan leaves
+    :param tors_dct: the number of points for each coordinate, by name
+    :param source_specs: specifiers for the source of the scan trunk
+    :param cache: use the cached energy grid, stored as a .npy file next to
+        the scan directory (see `energy_grid_path()`)? Only the points that
+        were missing last time are read. Energies overwritten in place are
+        not picked up -- call `update_energy_grid()` after doing that.
+    :param nworkers: if set, read on a thread pool with this many workers
+    :rtype: numpy.ndarray
+    """
+    shape = grid_shape(tors_dct)
+    grid_pth = energy_grid_path(ene_dsfile, prefix, tors_dct, source_specs)
+    bkend = backend.current()
+
+    enes = None
+    if cache and bkend.isfile(grid_pth):
+        enes = numpy.array(bkend.read_array_file(grid_pth), dtype=float)
+        if enes.shape != shape:
+            enes = None
+    cached = enes is not None
+    if not cached:
+        enes = numpy.full(shape, numpy.nan)
+
+    specs_lst = tuple(specs for specs in grid_specifiers(tors_dct,
+                                                         source_specs)
+                      if numpy.isnan(enes[specs[-1]]))
+    dir_pths = ene_dsfile.dir.paths(prefix, specs_lst)
+    new_enes = _thread_map(_read_if_exists,
+                           [ene_dsfile.file] * len(specs_lst), dir_pths,
+                           nworkers=nworkers)
+
+    nnew = 0
+    for specs, ene in zip(specs_lst, new_enes):
+        if ene is not None:
+            enes[specs[-1]] = ene
+            nnew += 1
+
+    if (cache and (nnew or not cached) and
+            bkend.isdir(os.path.dirname(grid_pth))):
+        bkend.write_array_file(grid_pth, enes)
+
+    return enes
+
+
+def update_energy_grid(ene_dsfile, prefix, tors_dct, source_specs=(),
+                       nworkers=None):
+    """ rebuild the cached energy grid from scratch
+
+    :returns: the energies over the scan grid
+    """
+    grid_pth = energy_grid_path(ene_dsfile, prefix, tors_dct, source_specs)
+    bkend = backend.current()
+    if bkend.isfile(grid_pth):
+        bkend.remove(grid_pth)
+    return energy_grid(ene_dsfile, prefix, tors_dct, source_specs,
+                       cache=True, nworkers=nworkers)
+
+
+def energy_grid_path(ene_dsfile, prefix, tors_dct, source_specs=()):
+    """ the path to the cached energy grid, next to the scan directory
+    """
+    branch_specs = tuple(source_specs) + (tuple(sorted(tors_dct)),)
+    branch_pth = ene_dsfile.dir.source.path(prefix, branch_specs)
+    return os.path.join(os.path.dirname(branch_pth),
+                        autofile.name.energy_grid(
+                            os.path.basename(branch_pth)))
+
+
+def create_point(scn_leaf_dsdir, prefix, specs, lock=False):
+    """ create a sparse scan point directory, and record it in the point index
+
+    (see `DataSeriesDir.create()`) If there isn't a point index yet, it is
+    built from the tree, so that points created without one are kept.
+    """
+    if not scn_leaf_dsdir.exists(prefix, specs):
+        scn_leaf_dsdir.create(prefix, specs, lock=lock)
+        branch_pth = scn_leaf_dsdir.source.path(prefix, specs[:-1])
+        pt_idx_dfile = _point_index()
+        if pt_idx_dfile.exists(branch_pth):
+            pt_idx_dfile.append([specs[-1]], branch_pth)
+        else:
+            update_points(scn_leaf_dsdir, prefix, specs[:-1])
+
+
+def points(scn_leaf_dsdir, prefix, source_specs):
+    """ the coordinate values of each point in a sparse scan, sorted
+
+    The points are read from the point index, which is built by searching the
+    tree if there isn't one. Points removed by hand aren't dropped from the
+    index -- call `update_points()` after doing that.
+
+    :param source_specs: specifiers for the scan directory (ending with the
+        coordinate names)
+    """
+    branch_pth = scn_leaf_dsdir.source.path(prefix, source_specs)
+    pt_idx_dfile = _point_index()
+    if not pt_idx_dfile.exists(branch_pth):
+        return update_points(scn_leaf_dsdir, prefix, source_specs)
+    return tuple(sorted(set(pt_idx_dfile.read(branch_pth))))
+
+
+def update_points(scn_leaf_dsdir, prefix, source_specs):
+    """ rebuild the point index of a sparse scan from the directory tree
+
+    :returns: the coordinate values of each point, sorted
+    """
+    pts = tuple(sorted(tuple(vals) for vals, in
+                       scn_leaf_dsdir.existing(prefix, source_specs)))
+    branch_pth = scn_leaf_dsdir.source.path(prefix, source_specs)
+    if backend.current().isdir(branch_pth):
+        _point_index().write(pts, branch_pth)
+    return pts
+
+
+def point_energies(ene_dsfile, prefix, source_specs, nworkers=None):
+    """ (coordinate values, energy) pairs for each point in a sparse scan
+    with an energy file, in order of the points
+
+    :param ene_dsfile: the energy DataSeriesFile, on the sparse scan leaves
+    :param source_specs: specifiers for the scan directory (ending with the
+        coordinate names)
+    :param nworkers: if set, read on a thread pool with this many workers
+    :rtype: iterator
+    """
+    source_specs = tuple(source_specs)
+    pts = points(ene_dsfile.dir, prefix, source_specs)
+    dir_pths = ene_dsfile.dir.paths(
+        prefix, (source_specs + (pt,) for pt in pts))
+    enes = _thread_map(_read_if_exists, [ene_dsfile.file] * len(pts),
+                       dir_pths, nworkers=nworkers)
+    return ((pt, ene) for pt, ene in zip(pts, enes) if ene is not None)
+
+
+# helpers
+def _point_index():
+    return file_.scan_index(POINT_INDEX_FILE_PREFIX)
+
+
+def _read_if_exists(dfile, dir_pth):
+    return dfile.read(dir_pth) if dfile.exists(dir_pth) else None
@@ -0,0 +1,54 @@
+""" incrementally-written trajectory files
+
+Frames are appended to the end of a trajectory file, rather than rewriting
+the whole file, and their offsets and energies are appended to a small index
+file alongside it. The index gives an energy-sorted view of the trajectory,
+which is read by seeking to each frame.
+
+    traj_dfile = autodir.lib.file_.trajectory('conf')
+    idx_dfile = autodir.lib.file_.trajectory_index('conf')
+    append(traj_dfile, idx_dfile, [(comment, geo)], [ene], dir_pth)
+    for ene, comment, geo in sorted_frames(traj_dfile, idx_dfile, dir_pth):
+        ...
+"""
+import autofile
+from autofile import instrument
+from autodir import backend
+
+
+def append(traj_dfile, idx_dfile, traj, enes, dir_pth):
+    """ append frames to a trajectory file and record them in its index
+
+    :param traj_dfile: the trajectory DataFile
+    :param idx_dfile: the trajectory index DataFile
+    :param traj: the frames, as (comment-line, geometry) pairs
+    :param enes: the energy of each frame
+    """
+    traj = tuple(traj)
+    enes = tuple(enes)
+    assert len(traj) == len(enes)
+
+    offsets = [traj_dfile.append([frame], dir_pth, newline=True)
+               for frame in traj]
+    idx_dfile.append(tuple(zip(offsets, enes)), dir_pth)
+
+
+def sorted_frames(traj_dfile, idx_dfile, dir_pth, nframes=None):
+    """ lazily read (energy, comment-line, geometry) triples from a trajectory
+    file, in order of increasing energy
+
+    Only the frames which are read are parsed, by seeking to their offsets.
+
+    :param nframes: the number of frames to read (all of them, by default)
+    :rtype: iterator
+    """
+    idx = sorted(idx_dfile.read(dir_pth), key=lambda entry: entry[1])
+    idx = idx[:nframes]
+
+    traj_pth = traj_dfile.path(dir_pth)
+    with instrument.labeled(traj_dfile.name):
+        traj_file = backend.current().open(traj_pth, 'r')
+    with traj_file:
+        for offset, ene in idx:
+            comment, geo = autofile.read.trajectory_frame(traj_file, offset)
+            yield (ene, comment, geo)
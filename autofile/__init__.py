@@ -3,13 +3,27 @@
 from autofile import name
 from autofile import write
 from autofile import read
+from autofile import instrument
+from autofile import validate
 from autofile._util import read_file
 from autofile._util import write_file
+from autofile._util import append_file
+from autofile._util import link_file
+from autofile._util import read_array_file
+from autofile._util import write_array_file
+from autofile._util import batch_commit
 
 __all__ = [
     'name',
     'write',
     'read',
+    'instrument',
+    'validate',
     'write_file',
     'read_file',
+    'append_file',
+    'link_file',
+    'write_array_file',
+    'read_array_file',
+    'batch_commit',
 ]
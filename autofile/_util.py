@@ -1,19 +1,279 @@
 """ utilities
 """
 import os
+import sys
+import errno
+import time
+import types
+import shutil
+import binascii
+import threading
+import importlib
+import contextlib
+from autofile import instrument
+
+_NO_LINK_ERRNOS = (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP)
+
+
+class _BatchState(threading.local):
+    """ the batch commits open in a thread
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.file_paths = []
+
+
+_BATCH = _BatchState()
+
+
+def lazy_import(name):
+    """ a module which is only imported when one of its attributes is used
+
+    Heavy dependencies are imported this way, so that importing these
+    packages (to build a path, say) doesn't pay for them.
+    """
+    module = sys.modules.get(name)
+    return module if module is not None else _LazyModule(name)
+
+
+class _LazyModule(types.ModuleType):
+    """ a placeholder which imports the module on first attribute access
+    """
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+numpy = lazy_import('numpy')
 
 
 def read_file(file_path):
     """ read a file as a string
     """
     assert os.path.isfile(file_path)
+    start = time.perf_counter()
     with open(file_path, 'r') as file_obj:
         file_str = file_obj.read()
+    instrument.record('read', time.perf_counter() - start, len(file_str))
     return file_str
 
 
-def write_file(file_path, string):
+def write_file(file_path, string, fsync=False, exclusive=False):
     """ write a string to a file
+
+    The string is written to a temporary file in the same directory, which is
+    then moved into place, so an interrupted write never leaves a truncated
+    file behind.
+
+    :param fsync: sync the file and its directory to disk before returning?
+        (inside `batch_commit()`, this happens when the batch is committed)
+    :type fsync: bool
+    :param exclusive: raise FileExistsError if the file already exists,
+        rather than replacing it
+    :type exclusive: bool
+    """
+    start = time.perf_counter()
+    _write_atomic(file_path, 'x', lambda file_obj: file_obj.write(string),
+                  fsync=fsync, exclusive=exclusive)
+    instrument.record('write', time.perf_counter() - start, len(string))
+
+
+def link_file(src_file_path, file_path, fsync=False, exclusive=False):
+    """ hard-link a file into place (atomically, as for `write_file()`)
+
+    Where hard links aren't supported (such as across file systems), the
+    file is copied instead.
+
+    :param exclusive: raise FileExistsError if the file already exists,
+        rather than replacing it
+    :type exclusive: bool
+    """
+    file_path = os.path.abspath(file_path)
+    start = time.perf_counter()
+    tmp_file_path = None
+    try:
+        if exclusive:
+            os.link(src_file_path, file_path)
+        else:
+            # (already linked -- renaming onto a link to the same file is a
+            # no-op that would leave the temporary link behind)
+            if (os.path.exists(file_path) and
+                    os.path.samefile(src_file_path, file_path)):
+                return
+            tmp_file_path = _temporary_path(file_path)
+            os.link(src_file_path, tmp_file_path)
+            os.replace(tmp_file_path, file_path)
+            if os.path.lexists(tmp_file_path):
+                os.remove(tmp_file_path)
+    except OSError as err:
+        if err.errno not in _NO_LINK_ERRNOS:
+            raise
+        if tmp_file_path is not None and os.path.exists(tmp_file_path):
+            os.remove(tmp_file_path)
+        write_file(file_path, read_file(src_file_path), fsync=fsync,
+                   exclusive=exclusive)
+        return
+    instrument.record('write', time.perf_counter() - start)
+
+    if fsync and _BATCH.depth:
+        _BATCH.file_paths.append(file_path)
+    elif fsync:
+        _fsync_directory(os.path.dirname(file_path))
+
+
+def append_file(file_path, string):
+    """ append a string to a file (creating it if it doesn't exist)
+
+    :returns: the byte offset at which the string was written
+    """
+    start = time.perf_counter()
+    data = string.encode('utf-8')
+    with open(file_path, 'ab') as file_obj:
+        offset = file_obj.tell()
+        file_obj.write(data)
+    instrument.record('write', time.perf_counter() - start, len(data))
+    return offset
+
+
+def read_array_file(file_path, mmap=False):
+    """ read a numpy array from a binary (.npy) file
+
+    :param mmap: memory-map the file (read-only), rather than loading it?
+        (each map holds a file descriptor open for as long as the array is
+        alive, so this is for a few large arrays, not many small ones)
+    :type mmap: bool
+    """
+    assert os.path.isfile(file_path)
+    start = time.perf_counter()
+    arr = numpy.load(file_path, mmap_mode=('r' if mmap else None),
+                     allow_pickle=False)
+    instrument.record('read', time.perf_counter() - start, arr.nbytes)
+    return arr
+
+
+def write_array_file(file_path, arr, fsync=False, exclusive=False):
+    """ write a numpy array to a binary (.npy) file
+
+    (written atomically, as for `write_file()`)
+    """
+    start = time.perf_counter()
+    _write_atomic(file_path, 'xb',
+                  lambda file_obj: numpy.save(file_obj, arr,
+                                              allow_pickle=False),
+                  fsync=fsync, exclusive=exclusive)
+    instrument.record('write', time.perf_counter() - start,
+                      getattr(arr, 'nbytes', 0))
+
+
+@contextlib.contextmanager
+def batch_commit():
+    """ commit many writes to disk together
+
+    Inside this context, files written by this thread with `fsync=True` are
+    synced to disk once, when the context exits, and each directory they
+    were written to is synced only once, rather than paying for a file and
+    directory sync on every write. Writes without `fsync=True` are left
+    alone. (Batches are per thread; nested batches are committed together
+    with the outermost one.)
+    """
+    _BATCH.depth += 1
+
+    try:
+        yield
+    finally:
+        _BATCH.depth -= 1
+        file_paths = ()
+        if not _BATCH.depth:
+            file_paths = tuple(_BATCH.file_paths)
+            del _BATCH.file_paths[:]
+
+    for file_path in file_paths:
+        _fsync_path(file_path)
+    for dir_path in sorted(set(map(os.path.dirname, file_paths))):
+        _fsync_directory(dir_path)
+
+
+# helpers
+def _write_atomic(file_path, mode, write_, fsync=False, exclusive=False):
+    """ write to a temporary file and move it into place
+
+    :param mode: an exclusive-creation file mode ('x' or 'xb')
+    :param exclusive: link the file into place, which fails if it exists,
+        rather than replacing it (where hard links aren't supported, the file
+        is created exclusively and copied into instead, which isn't atomic)
+    """
+    file_path = os.path.abspath(file_path)
+    dir_path = os.path.dirname(file_path)
+    tmp_file_path = _temporary_path(file_path)
+
+    in_batch = fsync and bool(_BATCH.depth)
+    try:
+        with open(tmp_file_path, mode) as file_obj:
+            write_(file_obj)
+            if fsync and not in_batch:
+                file_obj.flush()
+                os.fsync(file_obj.fileno())
+        if exclusive:
+            try:
+                os.link(tmp_file_path, file_path)
+            except OSError as err:
+                if err.errno not in _NO_LINK_ERRNOS:
+                    raise
+                _copy_exclusive(tmp_file_path, file_path,
+                                fsync=(fsync and not in_batch))
+            os.remove(tmp_file_path)
+        else:
+            os.replace(tmp_file_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_file_path):
+            os.remove(tmp_file_path)
+        raise
+
+    if in_batch:
+        _BATCH.file_paths.append(file_path)
+    elif fsync:
+        _fsync_directory(dir_path)
+
+
+def _copy_exclusive(src_file_path, file_path, fsync=False):
+    """ copy a file to a new file, which must not exist already
+    """
+    fdesc = os.open(file_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+    try:
+        with os.fdopen(fdesc, 'wb') as file_obj, \
+                open(src_file_path, 'rb') as src_file_obj:
+            shutil.copyfileobj(src_file_obj, file_obj)
+            if fsync:
+                file_obj.flush()
+                os.fsync(file_obj.fileno())
+    except BaseException:
+        os.remove(file_path)
+        raise
+
+
+def _temporary_path(file_path):
+    """ a hidden, unique, temporary path next to a file
+    """
+    dir_path, file_name = os.path.split(file_path)
+    return os.path.join(dir_path, '.{}.{}.tmp'.format(
+        file_name, binascii.hexlify(os.urandom(4)).decode()))
+
+
+def _fsync_path(file_path):
+    """ sync a file to disk, by path
+    """
+    fdesc = os.open(file_path, os.O_RDONLY)
+    try:
+        os.fsync(fdesc)
+    finally:
+        os.close(fdesc)
+
+
+def _fsync_directory(dir_path):
+    """ sync a directory (and so the names in it) to disk
     """
-    with open(file_path, 'w') as file_obj:
-        file_obj.write(string)
+    if os.name == 'posix':
+        _fsync_path(dir_path)
@@ -0,0 +1,179 @@
+""" opt-in I/O instrumentation
+
+Counts and times file-system stats, file reads and writes (with their sizes),
+reader/writer CPU time and path resolution, by DataFile name:
+
+    with autofile.instrument.collect() as report:
+        ...
+    print(report.table())
+
+Events can also be forwarded to a metrics system as they happen, with a hook
+that is called as `hook(name, event, seconds, nbytes)`:
+
+    autofile.instrument.add_hook(hook)
+
+The events are:
+    'stat': a file-system metadata lookup (exists, isdir, stat, scandir)
+    'read': a file read (`nbytes` read)
+    'write': a file write or append (`nbytes` written)
+    'open': a file opened as a stream (reads through it aren't recorded)
+    'reader': the CPU time spent parsing data that was read
+    'writer': the CPU time spent serializing data to be written
+    'path': the time spent resolving directory paths from specifiers
+
+Events outside of any DataFile are recorded under the name ''. When neither
+a report nor a hook is active, instrumentation costs a single check.
+"""
+import time
+import threading
+import contextlib
+
+EVENTS = ('stat', 'read', 'write', 'open', 'reader', 'writer', 'path')
+
+_LOCK = threading.Lock()
+_REPORTS = []
+_HOOKS = []
+_LABEL = threading.local()
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+class Report():
+    """ counts, times and sizes of instrumented events, by name and event
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, event, seconds=0., nbytes=0):
+        """ add an event to the report
+        """
+        with self._lock:
+            entry = self._entries.setdefault((name, event), [0, 0., 0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += nbytes
+
+    def as_dict(self):
+        """ {name: {event: {'count': ..., 'seconds': ..., 'bytes': ...}}}
+        """
+        report_dct = {}
+        with self._lock:
+            for (name, event), (count, seconds, nbytes) in (
+                    sorted(self._entries.items())):
+                report_dct.setdefault(name, {})[event] = {
+                    'count': count, 'seconds': seconds, 'bytes': nbytes}
+        return report_dct
+
+    def totals(self):
+        """ {event: {'count': ..., 'seconds': ..., 'bytes': ...}}, summed
+        over names
+        """
+        total_dct = {}
+        for event_dct in self.as_dict().values():
+            for event, entry_dct in event_dct.items():
+                total_entry_dct = total_dct.setdefault(
+                    event, {'count': 0, 'seconds': 0., 'bytes': 0})
+                for key, val in entry_dct.items():
+                    total_entry_dct[key] += val
+        return total_dct
+
+    def table(self):
+        """ the report, formatted as a table
+        """
+        lines = ["{:<24s} {:<8s} {:>9s} {:>11s} {:>12s}".format(
+            'name', 'event', 'count', 'seconds', 'bytes')]
+        for name, event_dct in self.as_dict().items():
+            for event in EVENTS:
+                if event in event_dct:
+                    entry_dct = event_dct[event]
+                    lines.append("{:<24s} {:<8s} {:>9d} {:>11.6f} {:>12d}"
+                                 .format(name, event, entry_dct['count'],
+                                         entry_dct['seconds'],
+                                         entry_dct['bytes']))
+        return '\n'.join(lines)
+
+
+@contextlib.contextmanager
+def collect():
+    """ collect a report of the events in this context (from all threads)
+    """
+    report = Report()
+    with _LOCK:
+        _REPORTS.append(report)
+    try:
+        yield report
+    finally:
+        with _LOCK:
+            _REPORTS.remove(report)
+
+
+def add_hook(hook):
+    """ call `hook(name, event, seconds, nbytes)` on every event
+    """
+    with _LOCK:
+        _HOOKS.append(hook)
+
+
+def remove_hook(hook):
+    """ stop calling a hook
+    """
+    with _LOCK:
+        _HOOKS.remove(hook)
+
+
+def active():
+    """ is anything collecting events?
+    """
+    return bool(_REPORTS or _HOOKS)
+
+
+def record(event, seconds=0., nbytes=0):
+    """ record an event, under the current name
+    """
+    if not (_REPORTS or _HOOKS):
+        return
+
+    assert event in EVENTS
+    name = getattr(_LABEL, 'name', '')
+    for report in tuple(_REPORTS):
+        report.add(name, event, seconds, nbytes)
+    for hook in tuple(_HOOKS):
+        hook(name, event, seconds, nbytes)
+
+
+def timed(event, cpu=False):
+    """ a context which records an event with its (wall or CPU) time
+    """
+    if not (_REPORTS or _HOOKS):
+        return _NULL_CONTEXT
+    return _timed(event, cpu=cpu)
+
+
+def labeled(name):
+    """ a context in which events (on this thread) are recorded under a name
+    """
+    if not (_REPORTS or _HOOKS):
+        return _NULL_CONTEXT
+    return _labeled(name)
+
+
+# helpers
+@contextlib.contextmanager
+def _timed(event, cpu=False):
+    clock = time.thread_time if cpu else time.perf_counter
+    start = clock()
+    try:
+        yield
+    finally:
+        record(event, seconds=clock() - start)
+
+
+@contextlib.contextmanager
+def _labeled(name):
+    outer_name = getattr(_LABEL, 'name', '')
+    _LABEL.name = name
+    try:
+        yield
+    finally:
+        _LABEL.name = outer_name
@@ -11,10 +11,16 @@ class Extension():
     ENERGY = '.ene'
     GEOMETRY = '.xyz'
     TRAJECTORY = '.t.xyz'
+    TRAJECTORY_INDEX = '.t.idx'
+    SCAN_INDEX = '.s.idx'
+    ENERGY_COLUMN = '.e.idx'
     ZMATRIX = '.zmat'
     VMATRIX = '.vmat'
     GRADIENT = '.grad'
     HESSIAN = '.hess'
+    GRADIENT_ARRAY = '.grad.npy'
+    HESSIAN_ARRAY = '.hess.npy'
+    ENERGY_GRID = '.ene.npy'
     LJ_EPSILON = '.eps'
     LJ_SIGMA = '.sig'
 
@@ -61,6 +67,24 @@ def trajectory(file_name):
     return _add_extension(file_name, Extension.TRAJECTORY)
 
 
+def trajectory_index(file_name):
+    """ adds trajectory index extension, if missing
+    """
+    return _add_extension(file_name, Extension.TRAJECTORY_INDEX)
+
+
+def scan_index(file_name):
+    """ adds scan point index extension, if missing
+    """
+    return _add_extension(file_name, Extension.SCAN_INDEX)
+
+
+def energy_column(file_name):
+    """ adds energy column extension, if missing
+    """
+    return _add_extension(file_name, Extension.ENERGY_COLUMN)
+
+
 def zmatrix(file_name):
     """ adds zmatrix extension, if missing
     """
@@ -85,6 +109,24 @@ def hessian(file_name):
     return _add_extension(file_name, Extension.HESSIAN)
 
 
+def gradient_array(file_name):
+    """ adds binary gradient extension, if missing
+    """
+    return _add_extension(file_name, Extension.GRADIENT_ARRAY)
+
+
+def hessian_array(file_name):
+    """ adds binary hessian extension, if missing
+    """
+    return _add_extension(file_name, Extension.HESSIAN_ARRAY)
+
+
+def energy_grid(file_name):
+    """ adds binary energy grid extension, if missing
+    """
+    return _add_extension(file_name, Extension.ENERGY_GRID)
+
+
 def lennard_jones_epsilon(file_name):
     """ adds lennard-jones epsilon extension, if missing
     """
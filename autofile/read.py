@@ -1,10 +1,13 @@
 """ string readers
 """
+import json as _json
 from io import StringIO as _StringIO
-import numpy
-import automol
-import autoparse.find as apf
 import autoinf
+from autofile._util import lazy_import as _lazy_import
+
+numpy = _lazy_import('numpy')
+automol = _lazy_import('automol')
+apf = _lazy_import('autoparse.find')
 
 
 def information(inf_str):
@@ -28,6 +31,103 @@ def geometry(xyz_str):
     return geo
 
 
+def trajectory(traj_str):
+    """ read a series of geometries (bohr) from a string (angstrom)
+
+    (trajectory is returned as a sequence of comment-line, geometry pairs)
+    """
+    traj_str_io = _StringIO(traj_str)
+    traj = tuple(trajectory_frames(traj_str_io))
+    return traj
+
+
+def trajectory_frames(traj_file):
+    """ lazily read (comment-line, geometry) pairs from a trajectory file
+
+    :param traj_file: a trajectory file object, opened in text mode
+    :rtype: iterator
+    """
+    while True:
+        natoms_line = traj_file.readline()
+        if not natoms_line:
+            return
+        if not natoms_line.strip():
+            continue
+
+        natoms = int(natoms_line)
+        comment_line = traj_file.readline()
+        atom_lines = [traj_file.readline() for _ in range(natoms)]
+        xyz_str = ''.join([natoms_line, comment_line] + atom_lines)
+        geo = automol.geom.from_xyz_string(xyz_str)
+        yield (comment_line.rstrip('\r\n'), geo)
+
+
+def trajectory_frame_offsets(traj_file):
+    """ file offsets for each frame in a trajectory file
+
+    Only the atom-count lines are parsed, so this is much cheaper than reading
+    the frames. Pass an offset to `trajectory_frame()` to read that frame.
+
+    :param traj_file: a trajectory file object, opened in text mode
+    """
+    offsets = []
+    while True:
+        offset = traj_file.tell()
+        natoms_line = traj_file.readline()
+        if not natoms_line:
+            break
+        if not natoms_line.strip():
+            continue
+
+        offsets.append(offset)
+        for _ in range(int(natoms_line) + 1):
+            traj_file.readline()
+    return tuple(offsets)
+
+
+def trajectory_frame(traj_file, offset):
+    """ read the (comment-line, geometry) pair at an offset in a trajectory
+    file, as returned by `trajectory_frame_offsets()`
+    """
+    traj_file.seek(offset)
+    return next(trajectory_frames(traj_file))
+
+
+def trajectory_index(idx_str):
+    """ read a trajectory index from a string
+
+    (the index is returned as a sequence of frame-offset, energy pairs)
+    """
+    idx = []
+    for line in idx_str.splitlines():
+        if line.strip():
+            offset_str, ene_str = line.split()
+            idx.append((int(offset_str), _float(ene_str)))
+    return tuple(idx)
+
+
+def scan_index(idx_str):
+    """ read a scan point index from a string
+
+    (the index is returned as a sequence of points, each a tuple of
+    coordinate values)
+    """
+    pts = tuple(tuple(map(_float, line.split()))
+                for line in idx_str.splitlines() if line.strip())
+    return pts
+
+
+def energy_column(col_str):
+    """ read an energy column from a string
+
+    (the column is returned as a sequence of directory-name, energy,
+    specifiers triples)
+    """
+    col = tuple((name, ene, tuple(specs)) for name, ene, specs
+                in map(_json.loads, col_str.splitlines()))
+    return col
+
+
 def zmatrix(zma_str):
     """ read a zmatrix (bohr/radian) from a string (angstrom/degree)
     """
@@ -61,6 +161,28 @@ def hessian(hess_str):
     return tuple(map(tuple, hess))
 
 
+def gradient_array(grad_arr):
+    """ read a gradient (hartree bohr^-1) from a numpy array (hartree bohr^-1)
+
+    (the array is returned as-is, without copying it)
+    """
+    grad = numpy.asarray(grad_arr)
+    assert grad.ndim == 2 and grad.shape[1] == 3
+    return grad
+
+
+def hessian_array(hess_arr):
+    """ read a hessian (hartree bohr^-2) from a numpy array (hartree bohr^-2)
+
+    (the array is returned as-is, without copying it, so a memory-mapped
+    array stays mapped)
+    """
+    hess = numpy.asarray(hess_arr)
+    assert hess.ndim == 2
+    assert hess.shape[0] % 3 == 0 and hess.shape[0] == hess.shape[1]
+    return hess
+
+
 def lennard_jones_epsilon(eps_str):
     """ read a lennard-jones epsilon (waveunmbers) from a string (wavenumbers)
     """
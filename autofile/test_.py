@@ -1,8 +1,11 @@
 """ test the autofile module
 """
 import os
+import errno
 import tempfile
+import threading
 import numpy
+import pytest
 import automol
 import autoinf
 import autofile
@@ -53,6 +56,85 @@ def test__file():
     autofile.write_file(scr_file_path, scr_str)
 
 
+def test__write_file():
+    """ test atomic and batch-committed file writes
+    """
+    file_path = os.path.join(TMP_DIR, 'atomic.txt')
+
+    autofile.write_file(file_path, 'a', fsync=True)
+    autofile.write_file(file_path, 'b')
+    assert autofile.read_file(file_path) == 'b'
+
+    file_paths = [os.path.join(TMP_DIR, 'batch{:d}.txt'.format(idx))
+                  for idx in range(5)]
+    with autofile.batch_commit():
+        for idx, file_path in enumerate(file_paths):
+            autofile.write_file(file_path, str(idx), fsync=True)
+    assert [autofile.read_file(file_path) for file_path in file_paths] == (
+        ['0', '1', '2', '3', '4'])
+
+    # no temporary files are left behind
+    assert not [file_name for file_name in os.listdir(TMP_DIR)
+                if file_name.endswith('.tmp')]
+
+
+def test__write_file__no_links():
+    """ test exclusive writes where hard links aren't supported
+    """
+    def _link(src_file_path, file_path):
+        raise OSError(errno.EXDEV, os.strerror(errno.EXDEV), file_path)
+
+    link = os.link
+    os.link = _link
+    try:
+        file_path = os.path.join(TMP_DIR, 'nolink.txt')
+        autofile.write_file(file_path, 'a', fsync=True, exclusive=True)
+        assert autofile.read_file(file_path) == 'a'
+        with pytest.raises(FileExistsError):
+            autofile.write_file(file_path, 'b', exclusive=True)
+        assert autofile.read_file(file_path) == 'a'
+
+        # (links fall back on exclusive writes, too)
+        link_path = os.path.join(TMP_DIR, 'nolink_copy.txt')
+        autofile.link_file(file_path, link_path, exclusive=True)
+        assert autofile.read_file(link_path) == 'a'
+        assert not os.path.samefile(file_path, link_path)
+    finally:
+        os.link = link
+
+    assert not [file_name for file_name in os.listdir(TMP_DIR)
+                if file_name.endswith('.tmp')]
+
+
+def test__batch_commit():
+    """ test that batches only sync the files that asked for it, in their own
+    thread
+    """
+    synced_paths = []
+    fsync_path = autofile._util._fsync_path
+    autofile._util._fsync_path = synced_paths.append
+    try:
+        sync_path = os.path.join(TMP_DIR, 'batch_sync.txt')
+        nosync_path = os.path.join(TMP_DIR, 'batch_nosync.txt')
+        thread_path = os.path.join(TMP_DIR, 'batch_thread.txt')
+        with autofile.batch_commit():
+            autofile.write_file(sync_path, 'a', fsync=True)
+            autofile.write_file(nosync_path, 'b')
+
+            # (a write in another thread isn't held by this thread's batch)
+            thread = threading.Thread(
+                target=autofile.write_file, args=(thread_path, 'c'),
+                kwargs={'fsync': True})
+            thread.start()
+            thread.join()
+            assert synced_paths == [TMP_DIR]
+            del synced_paths[:]
+
+        assert synced_paths == [sync_path, TMP_DIR]
+    finally:
+        autofile._util._fsync_path = fsync_path
+
+
 def test__energy():
     """ test the energy read/write functions
     """
@@ -118,12 +200,26 @@ def test__trajectory():
 
     traj_file_name = autofile.name.trajectory('test')
     traj_file_path = os.path.join(TMP_DIR, traj_file_name)
-    traj_str = autofile.write.trajectory(ref_geo_lst, ref_comments)
+    traj_str = autofile.write.trajectory(list(zip(ref_comments, ref_geo_lst)))
 
     assert not os.path.isfile(traj_file_path)
     autofile.write_file(traj_file_path, traj_str)
     assert os.path.isfile(traj_file_path)
 
+    traj_str = autofile.read_file(traj_file_path)
+    traj = autofile.read.trajectory(traj_str)
+    assert [comment for comment, _ in traj] == ref_comments
+    assert all(automol.geom.almost_equal(ref_geo, geo)
+               for ref_geo, (_, geo) in zip(ref_geo_lst, traj))
+
+    # read the last frame by seeking to it
+    with open(traj_file_path) as traj_file:
+        offsets = autofile.read.trajectory_frame_offsets(traj_file)
+        assert len(offsets) == 2
+        comment, geo = autofile.read.trajectory_frame(traj_file, offsets[-1])
+    assert comment == ref_comments[-1]
+    assert automol.geom.almost_equal(ref_geo_lst[-1], geo)
+
 
 def test__zmatrix():
     """ test the zmatrix read/write functions
@@ -238,6 +334,89 @@ def test__hessian():
     assert numpy.allclose(ref_hess, hess)
 
 
+def test__hessian_array():
+    """ test the binary hessian read/write functions
+    """
+    ref_hess = (
+        (0.70455411073336, -0.08287472697212, 0.0, -0.0798647434566,
+         0.05385932364624, 0.0, -0.62468936727659, 0.02901540332588, 0.0),
+        (-0.08287472697212, 0.73374800936533, 0.0, -0.06694564915575,
+         -0.63928635896955, 0.0, 0.14982037612785, -0.09446165039567, 0.0),
+        (0.0, 0.0, 0.00019470176975, 0.0, 0.0, -9.734161519e-05, 0.0, 0.0,
+         -9.736015438e-05),
+        (-0.0798647434566, -0.06694564915575, 0.0, 0.08499297871932,
+         -0.02022391947876, 0.0, -0.00512823526272, 0.0871695686345, 0.0),
+        (0.05385932364624, -0.63928635896955, 0.0, -0.02022391947876,
+         0.65384367318451, 0.0, -0.03363540416748, -0.01455731421496, 0.0),
+        (0.0, 0.0, -9.734161519e-05, 0.0, 0.0, 4.370597581e-05, 0.0, 0.0,
+         5.363563938e-05),
+        (-0.62468936727659, 0.14982037612785, 0.0, -0.00512823526272,
+         -0.03363540416748, 0.0, 0.6298176025393, -0.11618497196038, 0.0),
+        (0.02901540332588, -0.09446165039567, 0.0, 0.0871695686345,
+         -0.01455731421496, 0.0, -0.11618497196038, 0.10901896461063, 0.0),
+        (0.0, 0.0, -9.736015438e-05, 0.0, 0.0, 5.363563938e-05, 0.0, 0.0,
+         4.3724515e-05)
+    )
+
+    hess_file_name = autofile.name.hessian_array('test')
+    hess_file_path = os.path.join(TMP_DIR, hess_file_name)
+    hess_arr = autofile.write.hessian_array(ref_hess)
+
+    assert not os.path.isfile(hess_file_path)
+    autofile.write_array_file(hess_file_path, hess_arr)
+    assert os.path.isfile(hess_file_path)
+
+    hess_arr = autofile.read_array_file(hess_file_path)
+    hess = autofile.read.hessian_array(hess_arr)
+    assert numpy.allclose(ref_hess, hess)
+
+
+def test__validate():
+    """ test the writer validation policies
+    """
+    ref_grad = ((0., 0., 0.1), (0., 0.1, 0.))
+    bad_grad = ((0., 0.), (0.1, 0.))
+
+    assert autofile.validate.current() == 'strict'
+    autofile.write.gradient_array(ref_grad)
+    with pytest.raises(AssertionError):
+        autofile.write.gradient_array(bad_grad)
+
+    with autofile.validate.using('off'):
+        autofile.write.gradient_array(bad_grad)
+
+    # deferred checks run when the outermost deferred context exits
+    with pytest.raises(AssertionError):
+        with autofile.validate.using('deferred'):
+            with autofile.validate.using('deferred'):
+                autofile.write.gradient_array(ref_grad)
+                autofile.write.gradient_array(bad_grad)
+            autofile.write.gradient_array(ref_grad)
+            # (and strict checks inside still run immediately)
+            with autofile.validate.using('strict'):
+                with pytest.raises(AssertionError):
+                    autofile.write.gradient_array(bad_grad)
+
+    with autofile.validate.using('deferred'):
+        autofile.write.gradient_array(ref_grad)
+    assert autofile.validate.current() == 'strict'
+
+    # policies are per context (so, per thread)
+    errors = []
+
+    def _write_bad_gradient():
+        try:
+            autofile.write.gradient_array(bad_grad)
+        except AssertionError as err:
+            errors.append(err)
+
+    with autofile.validate.using('off'):
+        thread = threading.Thread(target=_write_bad_gradient)
+        thread.start()
+        thread.join()
+    assert len(errors) == 1
+
+
 def test__lennard_jones_epsilon():
     """ test the epsilon read/write functions
     """
@@ -275,6 +454,8 @@ def test__lennard_jones_sigma():
 
 
 if __name__ == '__main__':
+    test__write_file__no_links()
+    test__batch_commit()
     # test__energy()
     # test__geometry()
     # test__zmatrix()
@@ -286,3 +467,4 @@ if __name__ == '__main__':
     # test__hessian()
     test__trajectory()
     test__vmatrix()
+    test__validate()
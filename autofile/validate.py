@@ -0,0 +1,112 @@
+""" validation policy for writers
+
+The writers check the values they are given (that a geometry is valid, that
+a hessian is square, and so on) according to the current policy:
+
+    'strict': check each value as it is written (the default)
+    'deferred': collect the checks, and run them all at once when the
+        outermost deferred context exits (or on `flush()`)
+    'off': skip the checks
+
+High-volume writers, whose values have already been checked upstream, can
+skip or batch the per-call checks:
+
+    with autofile.validate.using('deferred'):
+        for geo in geo_lst:
+            ...
+    # (raises an AssertionError here, if any of the geometries was invalid)
+
+Policies are set per context (thread, or asyncio task), and are carried over
+to the worker threads of `autodir` thread pools and `autodir.aio` executors.
+Deferred checks hold on to their values until they are run, and run after
+the data has already been written -- a failed check reports the bad values,
+but doesn't undo the writes.
+"""
+import threading
+import contextlib
+import contextvars
+
+STRICT = 'strict'
+DEFERRED = 'deferred'
+OFF = 'off'
+POLICIES = (STRICT, DEFERRED, OFF)
+
+_LOCK = threading.Lock()
+_POLICIES = contextvars.ContextVar('autofile.validate.policies',
+                                   default=(STRICT,))
+# (the deferred checks of the outermost deferred context, if there is one)
+_PENDING = contextvars.ContextVar('autofile.validate.pending', default=None)
+
+
+def current():
+    """ the current validation policy
+    """
+    return _POLICIES.get()[-1]
+
+
+@contextlib.contextmanager
+def using(policy):
+    """ use a validation policy in this context
+
+    (deferred checks are run when the outermost deferred context exits)
+    """
+    assert policy in POLICIES
+    policies_token = _POLICIES.set(_POLICIES.get() + (policy,))
+    pending_token = None
+    if policy == DEFERRED and _PENDING.get() is None:
+        pending_token = _PENDING.set([])
+
+    completed = False
+    try:
+        yield policy
+        completed = True
+    finally:
+        _POLICIES.reset(policies_token)
+        if pending_token is not None:
+            pending = _PENDING.get()
+            _PENDING.reset(pending_token)
+            # (if the context was left by an exception, drop the checks)
+            if completed:
+                _run(pending)
+
+
+def check(function, *args):
+    """ check that `function(*args)` is true, according to the current policy
+    """
+    policy = _POLICIES.get()[-1]
+    if policy == STRICT:
+        assert function(*args)
+    elif policy == DEFERRED:
+        with _LOCK:
+            _PENDING.get().append((function, args))
+
+
+def flush():
+    """ run the deferred checks
+
+    :raises AssertionError: if any of them failed
+    """
+    pending = _PENDING.get()
+    if pending is not None:
+        _run(pending)
+
+
+# helpers
+def _run(pending):
+    """ run (and clear) a list of deferred checks
+    """
+    with _LOCK:
+        checks = tuple(pending)
+        del pending[:]
+
+    nfailed = 0
+    names = set()
+    for function, args in checks:
+        if not function(*args):
+            nfailed += 1
+            names.add(getattr(function, '__name__', repr(function)))
+
+    if nfailed:
+        raise AssertionError(
+            "{:d} of {:d} deferred checks failed ({})"
+            .format(nfailed, len(checks), ', '.join(sorted(names))))
@@ -1,10 +1,14 @@
 """ string writers
 """
+import json as _json
 from io import StringIO as _StringIO
 from numbers import Real as _Real
-import numpy
-import automol
 import autoinf
+from autofile import validate as _validate
+from autofile._util import lazy_import as _lazy_import
+
+numpy = _lazy_import('numpy')
+automol = _lazy_import('automol')
 
 
 def information(inf_obj):
@@ -25,7 +29,7 @@ def energy(ene):
 def geometry(geo):
     """ write a geometry (bohr) to a string (angstrom)
     """
-    assert automol.geom.is_valid(geo)
+    _validate.check(automol.geom.is_valid, geo)
     xyz_str = automol.geom.xyz_string(geo)
     return xyz_str
 
@@ -38,16 +42,53 @@ def trajectory(traj):
     comments, geo_lst = zip(*traj)
     assert all(isinstance(comment, str) and len(comment.splitlines()) == 1
                for comment in comments)
-    assert all(map(automol.geom.is_valid, geo_lst))
+    _validate.check(_all_valid_geometries, geo_lst)
     xyz_traj_str = automol.geom.xyz_trajectory_string(geo_lst,
                                                       comments=comments)
     return xyz_traj_str
 
 
+def trajectory_index(idx):
+    """ write a trajectory index to a string
+
+    (the index is given by a sequence of frame-offset, energy pairs)
+    """
+    assert all(isinstance(offset, int) and isinstance(ene, _Real)
+               for offset, ene in idx)
+    idx_str = ''.join('{:d} {}\n'.format(offset, _float(ene))
+                      for offset, ene in idx)
+    return idx_str
+
+
+def scan_index(pts):
+    """ write a scan point index to a string
+
+    (the index is given by a sequence of points, each a sequence of
+    coordinate values)
+    """
+    assert all(pt and all(isinstance(val, _Real) for val in pt)
+               for pt in pts)
+    idx_str = ''.join(' '.join(map(_float, pt)) + '\n' for pt in pts)
+    return idx_str
+
+
+def energy_column(col):
+    """ write an energy column to a string
+
+    (the column is given by a sequence of directory-name, energy, specifiers
+    triples, one per line)
+    """
+    assert all(isinstance(name, str) and isinstance(ene, _Real)
+               for name, ene, _ in col)
+    col_str = ''.join(_json.dumps([name, float(ene), list(specs)]) + '\n'
+                      for name, ene, specs in col)
+    return col_str
+
+
 def zmatrix(zma):
     """ write a zmatrix (bohr/radian) to a string (angstroms/degree)
     """
-    assert automol.zmatrix.is_valid(zma)
+    _validate.check(automol.zmatrix.is_valid, zma)
     zma_str = automol.zmatrix.string(zma)
     return zma_str
 
@@ -55,7 +96,7 @@ def zmatrix(zma):
 def vmatrix(vma):
     """ write a variable zmatrix (bohr/radian) to a string (angstroms/degree)
     """
-    assert automol.zmatrix.v.is_valid(vma)
+    _validate.check(automol.zmatrix.v.is_valid, vma)
     vma_str = automol.zmatrix.v.string(vma)
     return vma_str
 
@@ -64,7 +105,7 @@ def gradient(grad):
     """ write a gradient (hartree bohr^-1) to a string (hartree bohr^-1)
     """
     grad = numpy.array(grad)
-    assert grad.ndim == 2 and grad.shape[1] == 3
+    _validate.check(_is_gradient, grad)
 
     grad_str_io = _StringIO()
     numpy.savetxt(grad_str_io, grad)
@@ -77,8 +118,7 @@ def hessian(hess):
     """ write a hessian (hartree bohr^-2) to a string (hartree bohr^-2)
     """
     hess = numpy.array(hess)
-    assert hess.ndim == 2
-    assert hess.shape[0] % 3 == 0 and hess.shape[0] == hess.shape[1]
+    _validate.check(_is_hessian, hess)
 
     hess_str_io = _StringIO()
     numpy.savetxt(hess_str_io, hess)
@@ -87,6 +127,22 @@ def hessian(hess):
     return hess_str
 
 
+def gradient_array(grad):
+    """ write a gradient (hartree bohr^-1) to a numpy array (hartree bohr^-1)
+    """
+    grad = numpy.array(grad, dtype=float)
+    _validate.check(_is_gradient, grad)
+    return grad
+
+
+def hessian_array(hess):
+    """ write a hessian (hartree bohr^-2) to a numpy array (hartree bohr^-2)
+    """
+    hess = numpy.array(hess, dtype=float)
+    _validate.check(_is_hessian, hess)
+    return hess
+
+
 def lennard_jones_epsilon(eps):
     """ write a lennard-jones epsilon (waveunmbers) to a string (wavenumbers)
     """
@@ -101,6 +157,19 @@ def lennard_jones_sigma(sig):
     return sig_str
 
 
+def _all_valid_geometries(geo_lst):
+    return all(map(automol.geom.is_valid, geo_lst))
+
+
+def _is_gradient(grad):
+    return grad.ndim == 2 and grad.shape[1] == 3
+
+
+def _is_hessian(hess):
+    return (hess.ndim == 2 and hess.shape[0] % 3 == 0 and
+            hess.shape[0] == hess.shape[1])
+
+
 def _float(val):
     assert isinstance(val, _Real)
     val_str = str(val)
@@ -1,13 +1,17 @@
 """ implements an class for YAML-style information
 """
-from types import SimpleNamespace
 try:
     from collections.abc import Sequence as _Sequence
 except ImportError:
     from collections import Sequence as _Sequence
-import yaml
+import weakref
+import functools
+import operator
+import importlib
 from autoinf._inspect import function_keys as _function_keys
 
+TUPLE_TAG = 'tag:yaml.org,2002:python/tuple'
+
 
 def object_(inf_dct):
     """ create an information object from a dictionary
@@ -22,72 +26,216 @@ def object_(inf_dct):
 def string(inf_obj):
     """ write an information object to a YAML string
     """
+    yaml, yaml_classes = _yaml()
     inf_dct = dict(inf_obj)
-    inf_str = yaml.dump(inf_dct, default_flow_style=False)
+    inf_str = yaml.dump(inf_dct, Dumper=yaml_classes['DUMPER'],
+                        default_flow_style=False)
     return inf_str
 
 
 def from_string(inf_str):
     """ read an information object from a YAML string
     """
-    inf_dct = yaml.load(inf_str, Loader=yaml.FullLoader)
+    yaml, yaml_classes = _yaml()
+    inf_dct = yaml.load(inf_str, Loader=yaml_classes['LOADER'])
     inf_obj = object_(inf_dct)
     return inf_obj
 
 
 def matches_function_signature(inf_obj, function):
     """ does the information object match this function signature?
+
+    (the signature keys are only computed the first time a function is
+    checked, and compared by identity after that)
     """
     assert isinstance(inf_obj, Info)
-    return inf_obj.keys_() == _function_keys(function)
+    return _shape_of(inf_obj) is _signature_shape(function)
 
 
-class Info(SimpleNamespace):
+class Info():
     """ information container class, implemented as a frozen namespace
 
     (values can change, but you can't add keys after initialization)
-    """
-    _frozen = False
 
-    def _freeze(self):
-        self._frozen = True
+    Keys are stored once per "shape" (sorted key tuple), shared between all
+    objects with the same keys, and values are stored in a per-object list.
+    """
+    __slots__ = ('_shape', '_vals')
 
     def __init__(self, **kwargs):
         kwargs = {key: list(val) if _is_nonstring_sequence(val) else val
                   for key, val in kwargs.items()}
-        super(Info, self).__init__(**kwargs)
-        self._freeze()
+        shape = _shape(tuple(sorted(kwargs.keys())))
+        object.__setattr__(self, '_shape', shape)
+        object.__setattr__(self, '_vals', list(map(kwargs.__getitem__,
+                                                   shape.keys)))
 
     def keys_(self):
         """ keys for this instance """
-        keys = frozenset(key for key in vars(self).keys()
-                         if not key == '_frozen')
-        return keys
+        return self._shape.keyset
 
     def _dict(self):
-        keys = self.keys_()
-        return {key: val for key, val in vars(self).items() if key in keys}
+        return dict(zip(self._shape.keys, self._vals))
+
+    def __getattr__(self, key):
+        if key in Info.__slots__:
+            raise AttributeError(key)
+        idx = self._shape.index.get(key)
+        if idx is None:
+            raise AttributeError("'{}' object has no attribute '{}'"
+                                 .format(self.__class__.__name__, key))
+        return self._vals[idx]
 
     def __iter__(self):
         """ used by the dict() function for conversion to dictionary """
-        for key, val in self._dict().items():
+        for key, val in zip(self._shape.keys, self._vals):
             val = val if not isinstance(val, self.__class__) else dict(val)
             yield key, val
 
     def __eq__(self, other):
-        return self.__dict__ == other.__dict__
+        if not isinstance(other, Info):
+            return NotImplemented
+        return self._shape is other._shape and self._vals == other._vals
+
+    __hash__ = None
 
     def __repr__(self):
-        dct = self._dict()
-        items = ("{}={!r}".format(k, dct[k]) for k in sorted(dct.keys()))
+        items = ("{}={!r}".format(key, val)
+                 for key, val in zip(self._shape.keys, self._vals))
         return "Info({})".format(", ".join(items))
 
+    def __reduce__(self):
+        return (_info_from_items, (self._shape.keys, tuple(self._vals)))
+
     def __setattr__(self, key, value):
         """ prevent adding new keys after the object is frozen """
-        if self._frozen and not hasattr(self, key):
+        idx = self._shape.index.get(key)
+        if idx is None:
             raise TypeError("'{}' object does not support item assignment"
                             .format(self.__class__.__name__))
-        object.__setattr__(self, key, value)
+        self._vals[idx] = value
+
+    def __delattr__(self, key):
+        raise TypeError("'{}' object does not support item deletion"
+                        .format(self.__class__.__name__))
+
+
+class _Shape():
+    """ the (shared) keys for information objects with a given set of keys
+    """
+    __slots__ = ('keys', 'keyset', 'index')
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.keyset = frozenset(keys)
+        self.index = {key: idx for idx, key in enumerate(keys)}
+
+
+_SHAPES = {}
+
+# the shape of an information object (for use outside of the class)
+_shape_of = operator.attrgetter('_shape')
+
+
+def _shape(keys):
+    """ the shared shape for a sorted tuple of keys
+    """
+    shape = _SHAPES.get(keys)
+    if shape is None:
+        shape = _SHAPES.setdefault(keys, _Shape(keys))
+    return shape
+
+
+_SIGNATURE_SHAPES = weakref.WeakKeyDictionary()
+
+
+def _signature_shape(function):
+    """ the shared shape for the keys of a function signature, registered on
+    first use
+    """
+    try:
+        return _SIGNATURE_SHAPES[function]
+    except (KeyError, TypeError):
+        pass
+
+    shape = _shape(tuple(sorted(_function_keys(function))))
+    try:
+        _SIGNATURE_SHAPES[function] = shape
+    except TypeError:
+        # (builtins, say, can't be weakly referenced, so aren't registered)
+        pass
+    return shape
+
+
+def _info_from_items(keys, vals):
+    """ rebuild an information object from its keys and values (for pickling)
+    """
+    return Info(**dict(zip(keys, vals)))
+
+
+# YAML loaders and dumpers
+def _loader(base):
+    """ a safe YAML loader class for information objects
+
+    (tuples are tagged as python tuples, for compatibility with files written
+    by the default dumper)
+    """
+    class _Loader(base):
+        pass
+
+    _Loader.add_constructor(TUPLE_TAG, _construct_tuple)
+    return _Loader
+
+
+def _dumper(base):
+    """ a safe YAML dumper class for information objects
+    """
+    class _Dumper(base):
+        pass
+
+    _Dumper.add_representer(tuple, _represent_tuple)
+    _Dumper.add_representer(Info, _represent_info)
+    return _Dumper
+
+
+def _construct_tuple(loader, node):
+    return tuple(loader.construct_sequence(node))
+
+
+def _represent_tuple(dumper, data):
+    return dumper.represent_sequence(TUPLE_TAG, data)
+
+
+def _represent_info(dumper, data):
+    return dumper.represent_dict(dict(data))
+
+
+@functools.lru_cache(maxsize=None)
+def _yaml():
+    """ the yaml module and the loader and dumper classes, which are only
+    set up on first use (yaml is slow to import)
+
+    The libyaml-backed loader and dumper are used when available.
+    """
+    yaml = importlib.import_module('yaml')
+    safe_loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    safe_dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+    yaml_classes = {'PY_LOADER': _loader(yaml.SafeLoader),
+                    'PY_DUMPER': _dumper(yaml.SafeDumper),
+                    'LOADER': _loader(safe_loader),
+                    'DUMPER': _dumper(safe_dumper)}
+    return yaml, yaml_classes
+
+
+def __getattr__(name):
+    """ the YAML loader and dumper classes (PY_LOADER, PY_DUMPER, LOADER,
+    DUMPER) are created on first access
+    """
+    if name not in ('PY_LOADER', 'PY_DUMPER', 'LOADER', 'DUMPER'):
+        raise AttributeError("module '{}' has no attribute '{}'"
+                             .format(__name__, name))
+    _, yaml_classes = _yaml()
+    return yaml_classes[name]
 
 
 def _is_nonstring_sequence(obj):
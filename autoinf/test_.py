@@ -1,6 +1,12 @@
 """ test the autoinf module
 """
+import gc
+import pickle
+import weakref
+import pytest
+import yaml
 import autoinf
+from autoinf import _info
 
 
 def test_():
@@ -13,5 +19,80 @@ def test_():
     print(dict(autoinf.object_({'a': ('b', 'c', 'd', 'e'), 'x': {'y': 1, 'z': 2}})))
 
 
+def test__info():
+    """ test the Info namespace behaviour
+    """
+    inf_obj = autoinf.Info(y=1, z=2)
+    assert inf_obj.y == 1 and inf_obj.keys_() == frozenset({'y', 'z'})
+
+    inf_obj.y = 3
+    assert dict(inf_obj) == {'y': 3, 'z': 2}
+    with pytest.raises(TypeError):
+        inf_obj.w = 4
+    with pytest.raises(AttributeError):
+        print(inf_obj.w)
+
+    assert inf_obj == autoinf.Info(z=2, y=3)
+    assert inf_obj != autoinf.Info(y=3)
+    assert inf_obj.keys_() is autoinf.Info(z=5, y=6).keys_()
+    assert pickle.loads(pickle.dumps(inf_obj)) == inf_obj
+    assert repr(inf_obj) == 'Info(y=3, z=2)'
+
+
+def test__matches_function_signature():
+    """ test autoinf.matches_function_signature
+    """
+    def _function(method, basis, orb_restricted=True):
+        return (method, basis, orb_restricted)
+
+    inf_obj = autoinf.Info(method='hf', basis='sto-3g', orb_restricted=False)
+    assert autoinf.matches_function_signature(inf_obj, _function)
+    assert not autoinf.matches_function_signature(
+        autoinf.Info(method='hf', basis='sto-3g'), _function)
+    assert not autoinf.matches_function_signature(
+        autoinf.Info(method='hf', basis='sto-3g', orb_restricted=False,
+                     program='psi4'), _function)
+
+    # the signature keys are registered once, and shared with the objects
+    assert _info._SIGNATURE_SHAPES[_function] is _info._shape_of(inf_obj)
+    assert autoinf.matches_function_signature(
+        autoinf.object_(dict(inf_obj)), _function)
+    assert autoinf.matches_function_signature(
+        autoinf.Info(method='hf', basis='sto-3g', orb_restricted=False),
+        lambda method, basis, orb_restricted: None)
+
+    # (and checked functions aren't kept alive by the registry)
+    def _temporary_function(method):
+        return method
+
+    assert autoinf.matches_function_signature(autoinf.Info(method='hf'),
+                                              _temporary_function)
+    function_ref = weakref.ref(_temporary_function)
+    del _temporary_function
+    gc.collect()
+    assert function_ref() is None
+
+
+def test__string():
+    """ test YAML round-trips, with both the libyaml and pure-python loaders
+    """
+    inf_obj = autoinf.Info(a=['b', ('c', 'd'), 1.5], x=autoinf.Info(y=1, z=2),
+                           w=None, v=True)
+    inf_str = autoinf.string(inf_obj)
+    assert autoinf.from_string(inf_str) == inf_obj
+    assert (yaml.dump(dict(inf_obj), Dumper=_info.PY_DUMPER,
+                      default_flow_style=False) == inf_str)
+
+    # files written with the default dumper tag tuples as python tuples
+    old_inf_str = yaml.dump(dict(inf_obj), default_flow_style=False)
+    old_inf_dct = yaml.load(old_inf_str, Loader=yaml.FullLoader)
+    assert yaml.load(old_inf_str, Loader=_info.LOADER) == old_inf_dct
+    assert yaml.load(old_inf_str, Loader=_info.PY_LOADER) == old_inf_dct
+    assert autoinf.from_string(old_inf_str) == inf_obj
+
+
 if __name__ == '__main__':
     test_()
+    test__info()
+    test__matches_function_signature()
+    test__string()
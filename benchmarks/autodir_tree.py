@@ -0,0 +1,237 @@
+""" benchmark autodir operations on a synthetic species/theory/conformer tree
+
+Generates a tree with the requested numbers of species (linear alkanes, in
+singlet and triplet states), theories and conformers in a temporary
+directory, times DataSeriesDir and DataSeriesFile operations on it, and
+prints the timings as JSON, for comparison across commits.
+
+With `--compare`, the per-call times are also compared against an earlier
+report, and the ratios (new / old) are printed to stderr.
+
+usage: python benchmarks/autodir_tree.py [-h] [--nspecies N] [--ntheories N]
+           [--nconformers N] [--output FILE] [--compare FILE]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import autoinf
+import autodir.model
+import autodir.lib
+
+METHODS = ('hf', 'b3lyp', 'mp2', 'ccsd(t)', 'm062x', 'wb97xd')
+BASES = ('sto-3g', '6-31g*', 'cc-pvdz', 'cc-pvtz')
+
+GEOMETRY = (('C', (0., 0., 0.)), ('H', (0., 0., 2.)),
+            ('H', (0., 1.7, -1.)), ('H', (0., -1.7, -1.)),
+            ('H', (1.7, 0., -1.)))
+VMATRIX = (('C', (None, None, None), (None, None, None)),
+           ('H', (0, None, None), ('r1', None, None)),
+           ('H', (0, 1, None), ('r2', 'a1', None)),
+           ('H', (0, 1, 2), ('r3', 'a2', 'd1')),
+           ('H', (0, 1, 2), ('r4', 'a3', 'd2')))
+ZMATRIX = (VMATRIX, {'r1': 2.067, 'r2': 2.067, 'r3': 2.067, 'r4': 2.067,
+                     'a1': 1.911, 'a2': 1.911, 'a3': 1.911,
+                     'd1': 2.094, 'd2': 4.189})
+INFORMATION = autoinf.Info(
+    program='psi4', method='hf', basis='sto-3g', status='succeeded')
+
+
+def alkane_inchi(ncarbons):
+    """ a (valid) InChI for the linear alkane with this many carbons
+    """
+    assert ncarbons > 0
+    if ncarbons == 1:
+        return 'InChI=1S/CH4/h1H4'
+    if ncarbons == 2:
+        return 'InChI=1S/C2H6/c1-2/h1-2H3'
+
+    # the chain is numbered from both ends: 1-3-5-...-6-4-2
+    chain = (list(range(1, ncarbons + 1, 2)) +
+             list(range(ncarbons - ncarbons % 2, 1, -2)))
+    hydrogens = '3H2' if ncarbons == 3 else '3-{:d}H2'.format(ncarbons)
+    return 'InChI=1S/C{:d}H{:d}/c{}/h{},1-2H3'.format(
+        ncarbons, 2 * ncarbons + 2, '-'.join(map(str, chain)), hydrogens)
+
+
+def species_specifiers(nspecies):
+    """ (inchi, multiplicity) specifiers for a number of species
+    """
+    return tuple((alkane_inchi(idx // 2 + 1), 1 + 2 * (idx % 2))
+                 for idx in range(nspecies))
+
+
+def theory_specifiers(ntheories):
+    """ (method, basis, restricted) specifiers for a number of theories
+    """
+    thy_specs_lst = tuple((method, basis, orb_restricted)
+                          for orb_restricted in (True, False)
+                          for method in METHODS for basis in BASES)
+    assert ntheories <= len(thy_specs_lst)
+    return thy_specs_lst[:ntheories]
+
+
+def data_files():
+    """ (name, DataFile, value) for each data type
+    """
+    natoms = len(GEOMETRY)
+    grad = tuple((0.01 * idx, 0., -0.01 * idx) for idx in range(natoms))
+    hess = tuple(tuple(0.001 * (idx + jdx) for jdx in range(3 * natoms))
+                 for idx in range(3 * natoms))
+    traj = (('energy: -39.5', GEOMETRY), ('energy: -39.4', GEOMETRY))
+    file_ = autodir.lib.file_
+    return (('information', file_.information('bench'), INFORMATION),
+            ('energy', file_.energy('bench'), -39.5),
+            ('geometry', file_.geometry('bench'), GEOMETRY),
+            ('zmatrix', file_.zmatrix('bench'), ZMATRIX),
+            ('vmatrix', file_.vmatrix('bench'), VMATRIX),
+            ('trajectory', file_.trajectory('bench'), traj),
+            ('gradient', file_.gradient('bench'), grad),
+            ('hessian', file_.hessian('bench'), hess),
+            ('gradient_array', file_.gradient_array('bench'), grad),
+            ('hessian_array', file_.hessian_array('bench'), hess),
+            ('lennard_jones_epsilon', file_.lennard_jones_epsilon('bench'),
+             247.88),
+            ('lennard_jones_sigma', file_.lennard_jones_sigma('bench'),
+             3.55))
+
+
+def clear_path_caches(dsdir):
+    """ clear the memoized path lookups of a DataSeriesDir and its sources
+    """
+    while dsdir is not None:
+        cache_clear = getattr(dsdir.map_, 'cache_clear', None)
+        if cache_clear is not None:
+            cache_clear()
+        dsdir = dsdir.source
+
+
+def timed(function, args_lst):
+    """ call a function on each set of arguments
+
+    :returns: the total and per-call time, and the number of calls
+    """
+    args_lst = tuple(args_lst)
+    start = time.perf_counter()
+    for args in args_lst:
+        function(*args)
+    total = time.perf_counter() - start
+    ncalls = len(args_lst)
+    return {'total': total, 'per_call': total / max(ncalls, 1),
+            'ncalls': ncalls}
+
+
+def run(prefix, nspecies, ntheories, nconformers):
+    """ generate the tree and time the operations
+
+    :returns: timings, by operation
+    """
+    spc_trunk_dsdir = autodir.lib.dir_.species_trunk()
+    spc_leaf_dsdir = autodir.lib.dir_.species_leaf(spc_trunk_dsdir)
+    thy_leaf_dsdir = autodir.lib.dir_.theory_leaf(spc_leaf_dsdir)
+    cnf_trunk_dsdir = autodir.lib.dir_.conformer_trunk(thy_leaf_dsdir)
+    cnf_leaf_dsdir = autodir.lib.dir_.conformer_leaf(cnf_trunk_dsdir)
+
+    spc_specs_lst = species_specifiers(nspecies)
+    thy_specs_lst = tuple(spc_specs + thy_specs
+                          for spc_specs in spc_specs_lst
+                          for thy_specs in theory_specifiers(ntheories))
+    cnf_specs_lst = tuple(
+        thy_specs + (autodir.lib.generate_new_conformer_id(),)
+        for thy_specs in thy_specs_lst for _ in range(nconformers))
+
+    cnf_args_lst = tuple((prefix, specs) for specs in cnf_specs_lst)
+    results = {}
+    results['create'] = timed(cnf_leaf_dsdir.create, cnf_args_lst)
+    # (path lookups are memoized, so time them from cold and warm caches)
+    clear_path_caches(cnf_leaf_dsdir)
+    results['path'] = timed(cnf_leaf_dsdir.path, cnf_args_lst)
+    results['path/cached'] = timed(cnf_leaf_dsdir.path, cnf_args_lst)
+    results['exists'] = timed(cnf_leaf_dsdir.exists, cnf_args_lst)
+
+    for name, dsdir, args_lst in (
+            ('species', spc_leaf_dsdir, [(prefix,)]),
+            ('theory', thy_leaf_dsdir,
+             [(prefix, specs) for specs in spc_specs_lst]),
+            ('conformer', cnf_leaf_dsdir,
+             [(prefix, specs) for specs in thy_specs_lst])):
+        results['existing/' + name] = timed(dsdir.existing, args_lst)
+        results['existing_paths/' + name] = timed(dsdir.existing_paths,
+                                                  args_lst)
+
+    for name, dfile, val in data_files():
+        dsfile = autodir.model.DataSeriesFile(cnf_leaf_dsdir, dfile)
+        results['write/' + name] = timed(
+            dsfile.write, [(val,) + args for args in cnf_args_lst])
+        results['read/' + name] = timed(dsfile.read, cnf_args_lst)
+
+    return results
+
+
+def main(argv=None):
+    """ run the benchmark and print or save the results as JSON
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--nspecies', type=int, default=4)
+    parser.add_argument('--ntheories', type=int, default=2)
+    parser.add_argument('--nconformers', type=int, default=25)
+    parser.add_argument('--output', help="write the JSON here, not stdout")
+    parser.add_argument('--compare', help="an earlier JSON report")
+    args = parser.parse_args(argv)
+
+    prefix = tempfile.mkdtemp()
+    try:
+        results = run(prefix, args.nspecies, args.ntheories,
+                      args.nconformers)
+    finally:
+        shutil.rmtree(prefix)
+
+    report = {
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'parameters': {'nspecies': args.nspecies,
+                       'ntheories': args.ntheories,
+                       'nconformers': args.nconformers},
+        'results': results,
+    }
+    report_str = json.dumps(report, indent=2, sort_keys=True)
+    if args.output is None:
+        print(report_str)
+    else:
+        with open(args.output, 'w') as report_file:
+            report_file.write(report_str + '\n')
+
+    if args.compare is not None:
+        with open(args.compare) as ref_report_file:
+            ref_results = json.load(ref_report_file)['results']
+        compare(results, ref_results)
+
+
+def compare(results, ref_results):
+    """ print the per-call time ratios (new / old) for each operation
+    """
+    for name in sorted(set(results) & set(ref_results)):
+        ratio = results[name]['per_call'] / ref_results[name]['per_call']
+        print("{:<28s} {:>6.2f}x".format(name, ratio), file=sys.stderr)
+
+
+# helpers
+def _git_commit():
+    """ the current commit of the repository, if there is one
+    """
+    root_pth = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=root_pth,
+            stderr=subprocess.DEVNULL, universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
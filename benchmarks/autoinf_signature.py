@@ -0,0 +1,101 @@
+""" benchmark information signature checks, with and without the signature
+key registry
+
+Times `autoinf.matches_function_signature` against the check it replaced
+(which called `inspect.getfullargspec` on every comparison), and bulk
+information file writes and reads with each check, on an in-memory backend.
+
+usage: python benchmarks/autoinf_signature.py [number of files]
+"""
+import os
+import sys
+import timeit
+import inspect
+import autoinf
+import autofile
+import autodir.model
+import autodir.backend
+import autodir.lib
+
+
+def run_information(program, version, method, basis, orb_restricted, job,
+                    status, hostname):
+    """ a run information generator function
+    """
+    return autoinf.Info(
+        program=program, version=version, method=method, basis=basis,
+        orb_restricted=orb_restricted, job=job, status=status,
+        hostname=hostname)
+
+
+def uncached_matches_function_signature(inf_obj, function):
+    """ the signature check, without the registry
+    """
+    return inf_obj.keys_() == frozenset(inspect.getfullargspec(function).args)
+
+
+def information_file(file_prefix, matches_):
+    """ an information DataFile which checks its signature with `matches_`
+    """
+    def writer_(inf_obj):
+        assert matches_(inf_obj, run_information)
+        return autofile.write.information(inf_obj)
+
+    def reader_(inf_str):
+        inf_obj = autofile.read.information(inf_str)
+        assert matches_(inf_obj, run_information)
+        return inf_obj
+
+    name = autofile.name.information(file_prefix)
+    return autodir.model.DataFile(name=name, writer_=writer_, reader_=reader_)
+
+
+def bulk_io_time(dfile, inf_obj, number):
+    """ time writing and reading an information file in `number` directories
+    """
+    bkend = autodir.backend.MemoryBackend()
+    dir_pths = [os.path.join('/bench', str(idx)) for idx in range(number)]
+    with autodir.backend.using(bkend):
+        for dir_pth in dir_pths:
+            bkend.makedirs(dir_pth)
+
+        def _write_and_read():
+            for dir_pth in dir_pths:
+                dfile.write(inf_obj, dir_pth)
+                dfile.read(dir_pth)
+
+        return timeit.timeit(_write_and_read, number=1)
+
+
+def main(number):
+    """ print timings for the checks and for bulk information file I/O
+    """
+    inf_obj = run_information(
+        program='psi4', version='1.3.2', method='b3lyp', basis='6-31g*',
+        orb_restricted=False, job='optimization', status='succeeded',
+        hostname='node042')
+
+    print("{:<24s} {:>12s} {:>12s} {:>8s}".format(
+        'operation', 'uncached', 'registry', 'speedup'))
+
+    old_time = timeit.timeit(
+        lambda: uncached_matches_function_signature(inf_obj, run_information),
+        number=number)
+    new_time = timeit.timeit(
+        lambda: autoinf.matches_function_signature(inf_obj, run_information),
+        number=number)
+    print("{:<24s} {:>11.4f}s {:>11.4f}s {:>7.1f}x".format(
+        'signature check', old_time, new_time, old_time / new_time))
+
+    old_time = bulk_io_time(
+        information_file('run', uncached_matches_function_signature),
+        inf_obj, number)
+    new_time = bulk_io_time(
+        autodir.lib.file_.information('run', function=run_information),
+        inf_obj, number)
+    print("{:<24s} {:>11.4f}s {:>11.4f}s {:>7.1f}x".format(
+        'information write+read', old_time, new_time, old_time / new_time))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
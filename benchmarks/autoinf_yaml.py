@@ -0,0 +1,64 @@
+""" benchmark autoinf YAML reading/writing, libyaml vs. pure-python
+
+usage: python benchmarks/autoinf_yaml.py [number of repeats]
+"""
+import sys
+import timeit
+import yaml
+import autoinf
+from autoinf import _info
+
+
+def species_information():
+    """ a species specifier (dir.yaml) information object
+    """
+    return autoinf.Info(inchi='InChI=1S/C5H5O/c1-2-3-4-5-6/h1-5H/b4-3-',
+                        smiles='C=CC=CC=O', multiplicity=2)
+
+
+def run_information():
+    """ a run information object
+    """
+    return autoinf.Info(
+        program='psi4', version='1.3.2', method='b3lyp', basis='6-31g*',
+        orb_restricted=False, job='optimization', status='succeeded',
+        hostname='node042', utc_start_time='2019-05-06 21:48:02.418316',
+        utc_end_time='2019-05-06 21:49:17.913845',
+        tors_info=autoinf.Info(
+            names=['d{:d}'.format(idx) for idx in range(12)],
+            ranges=[[0., 6.283185307] for _ in range(12)]),
+        nsamp=500)
+
+
+def benchmark(inf_obj, loader, dumper, number):
+    """ time `number` writes and reads of an information object
+    """
+    inf_dct = dict(inf_obj)
+    inf_str = yaml.dump(inf_dct, Dumper=dumper, default_flow_style=False)
+    dump_time = timeit.timeit(
+        lambda: yaml.dump(inf_dct, Dumper=dumper, default_flow_style=False),
+        number=number)
+    load_time = timeit.timeit(
+        lambda: yaml.load(inf_str, Loader=loader), number=number)
+    return dump_time, load_time
+
+
+def main(number):
+    """ print timings for each information object and loader
+    """
+    print("libyaml available: {}".format(yaml.__with_libyaml__))
+    print("{:<10s} {:>12s} {:>12s} {:>12s} {:>12s} {:>8s}".format(
+        'info', 'py dump', 'c dump', 'py load', 'c load', 'speedup'))
+    for name, inf_obj in (('species', species_information()),
+                          ('run', run_information())):
+        py_dump, py_load = benchmark(inf_obj, _info.PY_LOADER,
+                                     _info.PY_DUMPER, number)
+        c_dump, c_load = benchmark(inf_obj, _info.LOADER, _info.DUMPER,
+                                   number)
+        speedup = (py_dump + py_load) / (c_dump + c_load)
+        print("{:<10s} {:>11.4f}s {:>11.4f}s {:>11.4f}s {:>11.4f}s {:>7.1f}x"
+              .format(name, py_dump, c_dump, py_load, c_load, speedup))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
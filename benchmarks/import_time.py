@@ -0,0 +1,70 @@
+""" benchmark the import time of the autodir/autofile/autoinf packages
+
+Imports the packages in a fresh interpreter with `python -X importtime` and
+reports the cumulative time for each, along with any heavy dependencies that
+were imported eagerly. Exits with an error if the total import time exceeds
+the threshold, or if a heavy dependency was imported, so this can be used as
+a regression check.
+
+usage: python benchmarks/import_time.py [threshold in seconds]
+"""
+import os
+import sys
+import subprocess
+
+MODULES = ('autoinf', 'autofile', 'autodir.model', 'autodir.lib')
+HEAVY_MODULES = ('numpy', 'automol', 'autoparse', 'yaml', 'elstruct')
+THRESHOLD = 0.25
+
+
+def import_times(modules):
+    """ cumulative import times (in seconds), by module, for importing these
+    modules in a fresh interpreter
+    """
+    root_pth = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        filter(None, (root_pth, env.get('PYTHONPATH'))))
+    cmd = [sys.executable, '-X', 'importtime', '-c',
+           '; '.join('import {}'.format(module) for module in modules)]
+    proc = subprocess.run(cmd, env=env, stderr=subprocess.PIPE,
+                          universal_newlines=True, check=True)
+
+    # lines look like "import time: self [us] | cumulative | imported package"
+    time_dct = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cum_time, name = line.split(':', 1)[1].split('|')
+        if cum_time.strip().isdigit():
+            time_dct[name.strip()] = int(cum_time) * 1e-6
+    return time_dct
+
+
+def main(threshold):
+    """ print the import times and check them against the threshold
+    """
+    time_dct = import_times(MODULES)
+    total_time = sum(time_dct[module] for module in MODULES
+                     if module in time_dct)
+    heavy_modules = sorted(module for module in HEAVY_MODULES
+                           if module in time_dct)
+
+    for module in MODULES:
+        print("{:<16s} {:>9.4f}s".format(module, time_dct.get(module, 0.)))
+    print("{:<16s} {:>9.4f}s (threshold {:.4f}s)"
+          .format('total', total_time, threshold))
+
+    failed = False
+    if heavy_modules:
+        print("heavy dependencies imported eagerly: {}"
+              .format(', '.join(heavy_modules)))
+        failed = True
+    if total_time > threshold:
+        print("import time exceeds the threshold")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(float(sys.argv[1]) if len(sys.argv) > 1 else THRESHOLD))